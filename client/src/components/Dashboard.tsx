@@ -11,6 +11,8 @@ export const Dashboard: React.FC = () => {
 
   const [tasks, setTasks] = useState<any[]>([]);
   const [loadingTasks, setLoadingTasks] = useState(true);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [newTaskTitle, setNewTaskTitle] = useState('');
   const [creatingTask, setCreatingTask] = useState(false);
   const [message, setMessage] = useState<string | null>(null);
@@ -22,10 +24,11 @@ export const Dashboard: React.FC = () => {
   useEffect(() => {
   const fetchTasks = async () => {
     try {
-      const data = await tasksAPI.getTasks();
-      const arr = Array.isArray(data) ? data : data.results || [];
+      const data = await tasksAPI.getDashboard();
+      const arr = data.tasks.results || [];
       console.log('Tarefas recebidas da API:', arr);
       setTasks(arr);
+      setNextPage(data.tasks.next || null);
     } catch (err) {
       setTasks([]);
     } finally {
@@ -35,6 +38,25 @@ export const Dashboard: React.FC = () => {
   fetchTasks();
 }, []);
 
+  // The dashboard brings the first page only; the rest follow its `next` links.
+  const handleLoadMore = async () => {
+    if (!nextPage) return;
+    setLoadingMore(true);
+    try {
+      const page = await tasksAPI.getTasksPage(nextPage);
+      setTasks((prev) => {
+        const seen = new Set(prev.map((t) => t.id));
+        return [...prev, ...(page.results || []).filter((t: any) => !seen.has(t.id))];
+      });
+      setNextPage(page.next || null);
+    } catch {
+      setMessage('Erro ao carregar mais tarefas.');
+      setTimeout(() => setMessage(null), 3000);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleLogout = () => {
     logout();
     navigate('/login');
@@ -223,6 +245,17 @@ export const Dashboard: React.FC = () => {
             onDelete={handleDeleteTask}
              onEdit={handleEditTask}
           />
+          {nextPage && !loadingTasks && (
+            <div className="mt-4 flex justify-center">
+              <button
+                onClick={handleLoadMore}
+                disabled={loadingMore}
+                className="bg-emerald-100 hover:bg-emerald-200 text-emerald-700 px-4 py-2 rounded-md text-sm font-medium transition-colors disabled:opacity-50"
+              >
+                {loadingMore ? 'Carregando...' : 'Carregar mais tarefas'}
+              </button>
+            </div>
+          )}
 
               
             
@@ -85,6 +85,18 @@ export const tasksAPI = {
     return response.data;
   },
 
+  // Next page of tasks, from the `next` link of a page (an /api/tasks/ URL).
+  getTasksPage: async (url: string) => {
+    const response = await api.get(url);
+    return response.data;
+  },
+
+  // Profile, first page of tasks, stats and overdue tasks in one request.
+  getDashboard: async () => {
+    const response = await api.get('/dashboard/');
+    return response.data;
+  },
+
   createTask: async (data: any) => {
     const response = await api.post('/tasks/', data);
     return response.data;
@@ -32,6 +32,13 @@ export interface TaskCreate {
   due_date?: string;
 }
 
+export interface TaskChanges {
+  changed: Task[];
+  deleted: number[];
+  cursor: string;
+  has_more: boolean;
+}
+
 export interface LoginData {
   email: string;
   password: string;
@@ -109,6 +116,13 @@ export const taskService = {
     await api.delete(`/tasks/${id}/`);
   },
 
+  // Tasks changed and deleted since `since` (the cursor from the previous
+  // call; omit it for a full sync). A 410 means the cursor expired.
+  getChanges: async (since?: string): Promise<TaskChanges> => {
+    const response = await api.get('/tasks/changes/', { params: since ? { since } : {} });
+    return response.data;
+  },
+
   getKanbanTasks: async () => {
     const response = await api.get('/tasks/kanban/');
     return response.data;
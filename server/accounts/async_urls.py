@@ -0,0 +1,8 @@
+from django.urls import path
+from . import async_views
+
+
+urlpatterns = [
+    path('login/', async_views.login_view, name='async_login'),
+    path('profile/', async_views.profile_view, name='async_profile'),
+]
@@ -0,0 +1,56 @@
+"""Native async login and profile endpoints, for ASGI deployments."""
+from asgiref.sync import sync_to_async
+
+from todolist.async_api import async_api_view, render
+
+from .backends import PooledPasswordBackend
+from .tokens import RefreshToken
+
+
+@async_api_view(methods=('POST',), authenticated=False)
+async def login_view(request):
+    """Login de usuário"""
+    email = request.drf.data.get('email')
+    password = request.drf.data.get('password')
+
+    if not email or not password:
+        return render({
+            'error': 'Email e senha são obrigatórios.'
+        }, status=400)
+
+    # Password hashing is CPU-bound; it runs in the pool, off the event loop
+    # and off the thread shared by every thread-sensitive sync_to_async call.
+    user = await PooledPasswordBackend().aauthenticate(request, email=email, password=password)
+
+    if not user:
+        return render({
+            'error': 'Credenciais inválidas.'
+        }, status=401)
+
+    # Records the token in the outstanding token table.
+    refresh = await sync_to_async(RefreshToken.for_user)(user)
+    return render({
+        'access_token': str(refresh.access_token),
+        'refresh_token': str(refresh),
+        'user': {
+            'id': user.id,
+            'name': f"{user.first_name} {user.last_name}",
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name
+        }
+    })
+
+
+@async_api_view()
+async def profile_view(request):
+    """Perfil do usuário"""
+    user = request.user
+    return render({
+        'id': user.id,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'name': f"{user.first_name} {user.last_name}",
+        'date_joined': user.date_joined
+    })
@@ -0,0 +1,169 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from todolist.routers import set_request_user
+
+
+class UserCache:
+    """Bounded in-process LRU of authenticated users with a TTL.
+
+    When ``backend`` names a Django cache alias, entries are also shared
+    through that cache so other workers can skip the database lookup. Only
+    ``shared_fields`` go there, never the password hash; users read back
+    from it have the other fields deferred, loaded on first access.
+    """
+
+    key_prefix = 'accounts:user:fields:'
+    # What authentication, permissions and the profile responses read.
+    shared_fields = (
+        'id', 'email', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser', 'date_joined'
+    )
+
+    def __init__(self, max_size=10000, ttl=30, backend=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'AUTH_USER_CACHE', {})
+        return cls(
+            max_size=options.get('MAX_SIZE', 10000),
+            ttl=options.get('TTL', 30),
+            backend=options.get('BACKEND'),
+        )
+
+    @property
+    def shared(self):
+        return caches[self.backend] if self.backend else None
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, user = entry
+                if expires_at > now:
+                    self._entries.move_to_end(user_id)
+                    return copy.copy(user)
+                del self._entries[user_id]
+
+        if self.shared is not None:
+            values = self.shared.get(f'{self.key_prefix}{user_id}')
+            if values is not None:
+                user = self.load(values)
+                self._store(user_id, user, now)
+                return copy.copy(user)
+        return None
+
+    def set(self, user_id, user):
+        self._store(user_id, copy.copy(user), time.monotonic())
+        if self.shared is not None:
+            values = {name: getattr(user, name) for name in self.shared_fields}
+            self.shared.set(f'{self.key_prefix}{user_id}', values, self.ttl)
+
+    def load(self, values):
+        """A user with the ``values`` loaded and its other fields deferred."""
+        model = get_user_model()
+        # from_db() takes the values in field order.
+        names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+        return model.from_db(DEFAULT_DB_ALIAS, names, [values[name] for name in names])
+
+    def _store(self, user_id, user, now):
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if self.shared is not None:
+            self.shared.delete(f'{self.key_prefix}{user_id}')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache.from_settings()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the token's user through ``user_cache``.
+
+    The user is also recorded for database routing (todolist.routers).
+
+    ``aauthenticate`` does the same for async views, loading cache misses
+    with the async ORM.
+    """
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        set_request_user(user_id)
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+            return user
+        return self.check_user(user, validated_token)
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        set_request_user(user_id)
+        user = user_cache.get(user_id)
+        if user is None:
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            user = self.check_user(user, validated_token)
+            user_cache.set(user_id, user)
+            return user
+        return self.check_user(user, validated_token)
+
+    async def aauthenticate(self, request):
+        """Async authenticate() for plain Django async views."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def check_user(self, user, validated_token):
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
@@ -0,0 +1,61 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .hashing import password_pool
+
+
+UserModel = get_user_model()
+
+
+class PooledPasswordBackend(ModelBackend):
+    """ModelBackend verifying passwords in ``password_pool``.
+
+    Hashes made with anything but the first PASSWORD_HASHERS entry (or with
+    an outdated work factor) are replaced on a successful login.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown emails take as long as wrong passwords.
+            password_pool.hash(password)
+            return None
+
+        valid, rehashed = password_pool.verify(password, user.password)
+        if not valid:
+            return None
+        if rehashed:
+            user.password = rehashed
+            user.save(update_fields=['password'])
+        return user if self.user_can_authenticate(user) else None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        """authenticate() for async views.
+
+        Queries run on the shared thread of thread-sensitive sync_to_async;
+        waiting on the pool does not, so concurrent logins hash in parallel.
+        """
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await sync_to_async(UserModel._default_manager.get_by_natural_key)(username)
+        except UserModel.DoesNotExist:
+            await sync_to_async(password_pool.hash, thread_sensitive=False)(password)
+            return None
+
+        verify = sync_to_async(password_pool.verify, thread_sensitive=False)
+        valid, rehashed = await verify(password, user.password)
+        if not valid:
+            return None
+        if rehashed:
+            user.password = rehashed
+            await user.asave(update_fields=['password'])
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,129 @@
+"""Password hashing offloaded to a bounded process pool.
+
+Hashing is pure CPU, so running it on request threads lets a burst of
+logins starve every other request of the GIL. The pool runs it in worker
+processes, caps the number of hashes in flight and fails fast with a 503
+once that cap is reached.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, try again shortly.'
+    default_code = 'password_hashing_busy'
+    # Sent as Retry-After by DRF's exception handler.
+    wait = 1
+
+
+def verify_password(password, encoded):
+    """Return (valid, new_encoded); new_encoded is set when the hash needs upgrading."""
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False, None
+    if not hasher.verify(password, encoded):
+        return False, None
+    preferred = get_hasher('default')
+    if hasher.algorithm != preferred.algorithm or preferred.must_update(encoded):
+        return True, make_password(password)
+    return True, None
+
+
+def hash_password(password):
+    return make_password(password)
+
+
+class PasswordPool:
+    """Run password hashing in up to ``workers`` processes.
+
+    At most ``max_pending`` hashes may be queued or running; further calls
+    raise PasswordHashingBusy instead of waiting. ``workers=0`` hashes
+    inline on the calling thread.
+    """
+
+    def __init__(self, workers=2, max_pending=64, timeout=10):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'PASSWORD_POOL', {})
+        return cls(
+            workers=options.get('WORKERS', 2),
+            max_pending=options.get('MAX_PENDING', 64),
+            timeout=options.get('TIMEOUT', 10),
+        )
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawned, not forked: the server process has threads and
+                # open database connections.
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PasswordHashingBusy()
+            self._pending += 1
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self._release()
+            raise
+        # Released when the job is done rather than when the caller stops
+        # waiting: a running job can't be cancelled and still holds a worker.
+        future.add_done_callback(self._release)
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise PasswordHashingBusy()
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def verify(self, password, encoded):
+        return self.run(verify_password, password, encoded)
+
+    def hash(self, password):
+        return self.run(hash_password, password)
+
+    def configure(self, workers=None, max_pending=None, timeout=None):
+        """Change the pool size or limits, restarting the worker processes."""
+        self.shutdown()
+        if workers is not None:
+            self.workers = workers
+        if max_pending is not None:
+            self.max_pending = max_pending
+        if timeout is not None:
+            self.timeout = timeout
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+password_pool = PasswordPool.from_settings()
@@ -0,0 +1,264 @@
+"""Signing keys for access and refresh tokens.
+
+Keys live in ``JWT_KEYS['DIRECTORY']`` as ``<kid>.pem`` files, and the
+algorithm follows from the key type: RSA keys sign RS256, P-256 keys ES256
+and Ed25519 keys EdDSA. Tokens are signed by the ``ACTIVE`` key, which must
+be a private key, and carry its kid in their header. Any key in the
+directory verifies them, including public-only keys. To rotate, add a key
+(``manage.py generate_signing_key``) and make it ACTIVE. Delete the old
+key's file once REFRESH_TOKEN_LIFETIME has passed.
+
+Other services verify tokens with the public keys served as a JWKS at
+/api/auth/jwks/. Keys are parsed once per process and reused. PyJWT
+parses PEM strings on every call, and loading an RSA private key costs
+about a hundred signatures. A token whose kid is unknown triggers a
+reload, at most every ``RELOAD_INTERVAL`` seconds, so a worker started
+before a rotation still verifies the new key's tokens. A reload that fails,
+say on a directory caught mid-rotation, is logged and the keys already
+loaded stay in use.
+
+Without a directory, tokens keep using simplejwt's HS256 with SECRET_KEY.
+With ``ACCEPT_LEGACY_HS256``, such tokens (which have no kid) stay valid
+after keys are configured, until they expire.
+"""
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+
+import jwt
+import jwt.algorithms
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_settings():
+    return getattr(settings, 'JWT_KEYS', {})
+
+
+def key_algorithm(key):
+    """The JWS algorithm for a cryptography key object."""
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return 'RS256'
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return 'EdDSA'
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        if isinstance(key.curve, ec.SECP256R1):
+            return 'ES256'
+    raise ImproperlyConfigured(f'Unsupported signing key type {type(key).__name__}.')
+
+
+def generate_key(algorithm):
+    """A new private key for ``algorithm`` (RS256, ES256 or EdDSA)."""
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if algorithm == 'RS256':
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if algorithm == 'ES256':
+        return ec.generate_private_key(ec.SECP256R1())
+    if algorithm == 'EdDSA':
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(f'Unsupported signing algorithm {algorithm!r}.')
+
+
+def private_pem(key):
+    from cryptography.hazmat.primitives import serialization
+
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+
+
+class SigningKey:
+    """A parsed key: the private key, if known, and the public key."""
+
+    def __init__(self, kid, key):
+        self.kid = kid
+        self.algorithm = key_algorithm(key)
+        self.private_key = key if hasattr(key, 'public_key') else None
+        self.public_key = key.public_key() if self.private_key is not None else key
+
+    @classmethod
+    def from_pem(cls, kid, pem):
+        from cryptography.hazmat.primitives import serialization
+
+        try:
+            if b'PRIVATE KEY' in pem:
+                key = serialization.load_pem_private_key(pem, password=None)
+            else:
+                key = serialization.load_pem_public_key(pem)
+        except ValueError as exc:
+            raise ImproperlyConfigured(f'Could not load signing key {kid!r}: {exc}') from exc
+        return cls(kid, key)
+
+    def public_pem(self):
+        from cryptography.hazmat.primitives import serialization
+
+        return self.public_key.public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+
+    def jwk(self):
+        jwk = jwt.get_algorithm_by_name(self.algorithm).to_jwk(self.public_key, as_dict=True)
+        return {**jwk, 'kid': self.kid, 'alg': self.algorithm, 'use': 'sig'}
+
+
+class KeyRegistry:
+    """The signing keys of a directory, loaded on first use."""
+
+    def __init__(self, directory=None, active=None, reload_interval=30):
+        self.directory = Path(directory) if directory else None
+        self.active_kid = active
+        self.reload_interval = reload_interval
+        self._keys = None
+        self._jwks = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = get_settings()
+        return cls(
+            directory=options.get('DIRECTORY'),
+            active=options.get('ACTIVE'),
+            reload_interval=options.get('RELOAD_INTERVAL', 30),
+        )
+
+    @property
+    def enabled(self):
+        return self.directory is not None
+
+    @property
+    def keys(self):
+        if self._keys is None:
+            self.load()
+        return self._keys
+
+    def load(self):
+        keys = {}
+        if self.enabled:
+            if not jwt.algorithms.has_crypto:
+                raise ImproperlyConfigured('JWT_KEYS["DIRECTORY"] requires the cryptography package.')
+            for path in sorted(self.directory.glob('*.pem')):
+                keys[path.stem] = SigningKey.from_pem(path.stem, path.read_bytes())
+            active = keys.get(self.active_kid)
+            if active is None or active.private_key is None:
+                raise ImproperlyConfigured(
+                    f'JWT_KEYS["ACTIVE"] must name a private key in {self.directory}, '
+                    f'not {self.active_kid!r}.'
+                )
+        with self._lock:
+            self._keys = keys
+            self._jwks = None
+            self._loaded_at = time.monotonic()
+
+    @property
+    def active(self):
+        return self.keys[self.active_kid] if self.enabled else None
+
+    def get(self, kid):
+        """The key ``kid``, reloading the directory if it is unknown."""
+        key = self.keys.get(kid)
+        if key is None and self.enabled and time.monotonic() - self._loaded_at >= self.reload_interval:
+            try:
+                self.load()
+            except Exception:
+                # The kid comes from the token: a bad directory must not
+                # turn it into a server error. Retried after the interval.
+                logger.exception('Could not reload the signing keys from %s', self.directory)
+                with self._lock:
+                    self._loaded_at = time.monotonic()
+                return None
+            key = self._keys.get(kid)
+        return key
+
+    def jwks(self):
+        """The public keys as a serialized JWK set."""
+        if self._jwks is None:
+            keys = [key.jwk() for key in self.keys.values()]
+            self._jwks = json.dumps({'keys': keys}).encode()
+        return self._jwks
+
+
+key_registry = KeyRegistry.from_settings()
+
+
+class KeyRegistryBackend(TokenBackend):
+    """simplejwt's TokenBackend signing with ``key_registry``'s active key.
+
+    Falls back to simplejwt's HS256 signing when no keys are configured.
+    """
+
+    def __init__(self, registry, accept_legacy=True, **kwargs):
+        super().__init__(**kwargs)
+        self.registry = registry
+        self.accept_legacy = accept_legacy
+
+    @classmethod
+    def from_settings(cls, registry):
+        return cls(
+            registry,
+            accept_legacy=get_settings().get('ACCEPT_LEGACY_HS256', True),
+            algorithm=api_settings.ALGORITHM,
+            signing_key=api_settings.SIGNING_KEY,
+            verifying_key=api_settings.VERIFYING_KEY,
+            audience=api_settings.AUDIENCE,
+            issuer=api_settings.ISSUER,
+            leeway=api_settings.LEEWAY,
+            json_encoder=api_settings.JSON_ENCODER,
+        )
+
+    def encode(self, payload):
+        key = self.registry.active
+        if key is None:
+            return super().encode(payload)
+        payload = payload.copy()
+        if self.audience is not None:
+            payload['aud'] = self.audience
+        if self.issuer is not None:
+            payload['iss'] = self.issuer
+        return jwt.encode(
+            payload, key.private_key, algorithm=key.algorithm,
+            headers={'kid': key.kid}, json_encoder=self.json_encoder,
+        )
+
+    def decode(self, token, verify=True):
+        if not self.registry.enabled:
+            return super().decode(token, verify)
+        try:
+            kid = jwt.get_unverified_header(token).get('kid')
+        except jwt.InvalidTokenError as exc:
+            raise TokenBackendError(_('Token is invalid or expired')) from exc
+        if kid is None:
+            if self.accept_legacy:
+                return super().decode(token, verify)
+            raise TokenBackendError(_('Token is invalid or expired'))
+
+        key = self.registry.get(kid)
+        if key is None:
+            raise TokenBackendError(_('Token is invalid or expired'))
+        try:
+            return jwt.decode(
+                token,
+                key.public_key,
+                algorithms=[key.algorithm],
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.get_leeway(),
+                options={'verify_aud': self.audience is not None, 'verify_signature': verify},
+            )
+        except jwt.InvalidTokenError as exc:
+            raise TokenBackendError(_('Token is invalid or expired')) from exc
+
+
+token_backend = KeyRegistryBackend.from_settings(key_registry)
@@ -0,0 +1,66 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from accounts.hashing import password_pool
+from todolist.benchmarks import percentile
+
+
+BENCHMARK_EMAIL = 'login-benchmark@benchmark.example.com'
+BENCHMARK_PASSWORD = 'benchmark-pass'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure logins/sec (and per core) through the authentication backend, hashing '
+        'inline and in password pools of different sizes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, nargs='+', default=[0, 1, os.cpu_count() or 1],
+            help='Pool sizes to measure; 0 hashes on the request threads.'
+        )
+        parser.add_argument('--logins', type=int, default=200, help='Logins per pool size.')
+        parser.add_argument('--clients', type=int, default=16, help='Concurrent login threads.')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.settings_dict['NAME'] == ':memory:':
+            raise CommandError('An in-memory SQLite database is not shared between threads.')
+
+        User = get_user_model()
+        User.objects.filter(email=BENCHMARK_EMAIL).delete()
+        user = User.objects.create_user(BENCHMARK_EMAIL, 'Login', 'Benchmark', BENCHMARK_PASSWORD)
+        saved = (password_pool.workers, password_pool.max_pending)
+        self.stdout.write(f'Hasher: {get_hasher().algorithm}')
+        self.stdout.write(f'{"workers":>7} {"logins/s":>9} {"per core":>9} {"p99 ms":>8}')
+        try:
+            for workers in options['workers']:
+                password_pool.configure(workers=workers, max_pending=options['clients'])
+                # Start the worker processes outside the measurement.
+                password_pool.hash(BENCHMARK_PASSWORD)
+                self.measure(workers, options['logins'], options['clients'])
+        finally:
+            password_pool.configure(workers=saved[0], max_pending=saved[1])
+            user.delete()
+
+    def measure(self, workers, logins, clients):
+        def login(_):
+            started = time.perf_counter()
+            user = authenticate(None, email=BENCHMARK_EMAIL, password=BENCHMARK_PASSWORD)
+            connection.close()
+            if user is None:
+                raise CommandError('Benchmark login failed.')
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(clients) as executor:
+            latencies = list(executor.map(login, range(logins)))
+        rate = logins / (time.perf_counter() - started)
+        cores = max(workers, 1)
+        self.stdout.write(f'{workers:>7} {rate:>9.1f} {rate / cores:>9.1f} {percentile(latencies, 99):>8.1f}')
@@ -0,0 +1,87 @@
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import jwt
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.backends import TokenBackend
+
+from accounts.keys import KeyRegistry, KeyRegistryBackend, SigningKey, generate_key, private_pem
+from accounts.tokens import AccessToken
+
+
+ALGORITHMS = ['HS256', 'RS256', 'ES256', 'EdDSA']
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure access token issue and verify operations per second for each signing '
+        'algorithm, with the parsed keys of accounts.keys and with keys parsed from PEM per token.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--algorithms', nargs='+', choices=ALGORITHMS, default=ALGORITHMS)
+        parser.add_argument('--operations', type=int, default=2000, help='Operations per measurement.')
+        parser.add_argument('--output', help='Write JSON results to this file ("-" for stdout).')
+
+    def handle(self, *args, **options):
+        payload = AccessToken().payload
+        payload['user_id'] = 1
+        results = []
+        self.stderr.write(
+            f'{"algorithm":<10} {"issue/s":>9} {"verify/s":>9} {"issue PEM/s":>12} '
+            f'{"verify PEM/s":>13} {"bytes":>6}'
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for algorithm in options['algorithms']:
+                result = self.measure(algorithm, Path(directory), payload, options['operations'])
+                self.stderr.write(
+                    f'{algorithm:<10} {result["issue_per_second"]:>9,.0f} {result["verify_per_second"]:>9,.0f} '
+                    f'{result["issue_pem_per_second"] or 0:>12,.0f} '
+                    f'{result["verify_pem_per_second"] or 0:>13,.0f} {result["token_bytes"]:>6}'
+                )
+                results.append({'algorithm': algorithm, **result})
+
+        if options['output']:
+            payload = json.dumps({'operations': options['operations'], 'results': results}, indent=2)
+            if options['output'] == '-':
+                sys.stdout.write(payload + '\n')
+            else:
+                with open(options['output'], 'w') as output_file:
+                    output_file.write(payload + '\n')
+
+    def backend(self, algorithm, directory):
+        """The backend for ``algorithm`` and the PEM its verifying key is parsed from."""
+        if algorithm == 'HS256':
+            return TokenBackend('HS256', settings.SECRET_KEY), None
+        key = generate_key(algorithm)
+        (directory / f'{algorithm}.pem').write_bytes(private_pem(key))
+        registry = KeyRegistry(directory, active=algorithm)
+        return KeyRegistryBackend(registry, algorithm='HS256', signing_key=settings.SECRET_KEY), private_pem(key)
+
+    def measure(self, algorithm, directory, payload, operations):
+        backend, pem = self.backend(algorithm, directory)
+        token = backend.encode(payload)
+
+        def rate(operation):
+            started = time.perf_counter()
+            for _ in range(operations):
+                operation()
+            return round(operations / (time.perf_counter() - started), 1)
+
+        result = {
+            'issue_per_second': rate(lambda: backend.encode(payload)),
+            'verify_per_second': rate(lambda: backend.decode(token)),
+            'issue_pem_per_second': None,
+            'verify_pem_per_second': None,
+            'token_bytes': len(token),
+        }
+        if pem is not None:
+            # What PyJWT does with keys given as PEM strings: parse them per token.
+            public_pem = SigningKey.from_pem(algorithm, pem).public_pem()
+            result['issue_pem_per_second'] = rate(lambda: jwt.encode(payload, pem, algorithm=algorithm))
+            result['verify_pem_per_second'] = rate(lambda: jwt.decode(token, public_pem, algorithms=[algorithm]))
+        return result
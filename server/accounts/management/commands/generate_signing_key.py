@@ -0,0 +1,40 @@
+import os
+import secrets
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.keys import generate_key, get_settings, private_pem
+
+
+class Command(BaseCommand):
+    help = (
+        'Write a new token signing key to JWT_KEYS_DIR. Tokens are signed with it once '
+        'JWT_ACTIVE_KEY names it; until then it is only published in the JWKS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--algorithm', choices=['EdDSA', 'ES256', 'RS256'], default='EdDSA')
+        parser.add_argument('--kid', help='Key id (default: the date and a random suffix).')
+        parser.add_argument('--directory', default=get_settings().get('DIRECTORY'),
+                            help='Key directory (default: JWT_KEYS_DIR).')
+
+    def handle(self, *args, **options):
+        if not options['directory']:
+            raise CommandError('Set JWT_KEYS_DIR or pass --directory.')
+        directory = Path(options['directory'])
+        kid = options['kid'] or f'{timezone.now():%Y%m%d}-{secrets.token_hex(4)}'
+        path = directory / f'{kid}.pem'
+        if path.exists():
+            raise CommandError(f'{path} already exists.')
+
+        directory.mkdir(parents=True, exist_ok=True)
+        descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(descriptor, 'wb') as key_file:
+            key_file.write(private_pem(generate_key(options['algorithm'])))
+        self.stdout.write(f'Wrote {options["algorithm"]} key {kid} to {path}.')
+        self.stdout.write(
+            'Deploy it to every worker, then set JWT_ACTIVE_KEY to sign with it. Keep the '
+            'previous key until the tokens it signed have expired.'
+        )
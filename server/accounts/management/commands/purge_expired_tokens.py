@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.tokens import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=getattr(settings, 'TOKEN_REVOCATION', {}).get('PURGE_BATCH_SIZE', 1000),
+            help='Tokens deleted per transaction.'
+        )
+        parser.add_argument('--loop', action='store_true', help='Keep purging until interrupted.')
+        parser.add_argument('--interval', type=float, default=3600, help='Seconds between purges with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            result = purge_expired_tokens(batch_size=options['batch_size'])
+            self.stdout.write(
+                f'Deleted {result.outstanding} expired tokens ({result.blacklisted} blacklisted) '
+                f'in {result.batches} batches, {(time.monotonic() - started) * 1000:.1f} ms.'
+            )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
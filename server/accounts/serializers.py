@@ -1,6 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from .models import CustomUser
+from .tokens import RefreshToken
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -57,3 +62,36 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         instance.last_name = validated_data.get('last_name', instance.last_name)
         instance.save()
         return instance
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    token_class = RefreshToken
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """Refresh with accounts.tokens.RefreshToken, rejecting reused rotated tokens.
+
+    The revocation check is served from memory; with rotation the blacklist
+    insert of the old token is the authoritative one.
+    """
+
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                if not refresh.blacklist():
+                    raise TokenError(_('Token is blacklisted'))
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                # So that its own rotation takes the one-statement path.
+                refresh.outstand()
+
+        return data
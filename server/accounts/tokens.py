@@ -0,0 +1,211 @@
+"""Refresh token revocation.
+
+simplejwt's token_blacklist app stores issued refresh tokens
+(OutstandingToken) and revoked ones (BlacklistedToken). On every use it
+checks the blacklist with a query. RefreshToken below checks
+``revoked_tokens`` instead. That is a per-process index of the JTIs of
+revoked tokens that haven't expired yet. The index takes every blacklist
+row added since the last sync, at most every
+``TOKEN_REVOCATION['SYNC_INTERVAL']`` seconds. Revocations made in this
+process show up at once; those made in other workers take up to that
+interval.
+
+Rotation doesn't depend on the index. The insert that blacklists the
+rotated token does nothing if the token was blacklisted already, so a
+refresh token is only ever exchanged once.
+
+purge_expired_tokens() deletes expired outstanding and blacklisted tokens in
+batches, keeping both tables (and the index) proportional to the tokens
+still in use.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
+
+from .keys import token_backend
+
+
+PurgeResult = namedtuple('PurgeResult', ['outstanding', 'blacklisted', 'batches'])
+
+# Seconds between removals of expired JTIs from the index.
+PRUNE_INTERVAL = 60
+
+
+def get_settings():
+    return getattr(settings, 'TOKEN_REVOCATION', {})
+
+
+class RevocationIndex:
+    """JTIs of revoked, unexpired tokens, synced from the blacklist table."""
+
+    def __init__(self, sync_interval=1.0):
+        self.sync_interval = sync_interval
+        self._revoked = {}
+        # Highest blacklist ids seen by the previous two syncs. Each sync
+        # reads from the older one, so rows committed out of id order
+        # during a sync are picked up by the next.
+        self._watermarks = (0, 0)
+        self._synced_at = None
+        self._pruned_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(sync_interval=get_settings().get('SYNC_INTERVAL', 1.0))
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def due(self):
+        return self._synced_at is None or time.monotonic() - self._synced_at >= self.sync_interval
+
+    def is_revoked(self, jti):
+        if self.due():
+            self.sync(if_due=True)
+        return jti in self._revoked
+
+    def add(self, jti, exp):
+        self._revoked[jti] = exp
+
+    def sync(self, if_due=False):
+        """Load blacklist rows added since the last sync."""
+        with self._lock:
+            if if_due and not self.due():
+                # Another thread synced while this one waited.
+                return
+            now = aware_utcnow()
+            rows = list(
+                BlacklistedToken.objects
+                .filter(id__gt=self._watermarks[0], token__expires_at__gt=now)
+                .values_list('id', 'token__jti', 'token__expires_at')
+            )
+            for _, jti, expires_at in rows:
+                self._revoked[jti] = expires_at.timestamp()
+            latest = max((row[0] for row in rows), default=self._watermarks[1])
+            self._watermarks = (self._watermarks[1], max(latest, self._watermarks[1]))
+            self._synced_at = time.monotonic()
+            if self._synced_at - self._pruned_at >= PRUNE_INTERVAL:
+                self.prune(now.timestamp())
+
+    def prune(self, now):
+        # Expired tokens fail verification before the index is consulted.
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        self._pruned_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._revoked = {}
+            self._watermarks = (0, 0)
+            self._synced_at = None
+
+
+revoked_tokens = RevocationIndex.from_settings()
+
+
+class KeyRegistryMixin:
+    """Sign and verify with accounts.keys instead of simplejwt's backend."""
+
+    @property
+    def token_backend(self):
+        return token_backend
+
+
+class AccessToken(KeyRegistryMixin, tokens.AccessToken):
+    pass
+
+
+class RefreshToken(KeyRegistryMixin, tokens.RefreshToken):
+    """RefreshToken checked against ``revoked_tokens`` instead of the database."""
+
+    access_token_class = AccessToken
+
+    def check_blacklist(self):
+        if revoked_tokens.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        """Blacklist the token; return False if it had already been blacklisted.
+
+        One statement for tokens in the outstanding token table; others (such
+        as those rotated before this class was used) are added to it first.
+        """
+        jti = self.payload[api_settings.JTI_CLAIM]
+        revoked_tokens.add(jti, self.payload['exp'])
+        created = insert_blacklisted(jti)
+        if created is None:
+            OutstandingToken.objects.get_or_create(
+                jti=jti,
+                defaults={
+                    'user_id': self.payload.get(api_settings.USER_ID_CLAIM),
+                    'token': str(self),
+                    'expires_at': datetime_from_epoch(self.payload['exp']),
+                },
+            )
+            created = insert_blacklisted(jti)
+        return bool(created)
+
+    def outstand(self):
+        """Record a token issued by rotation in the outstanding token table."""
+        OutstandingToken.objects.create(
+            user_id=self.payload.get(api_settings.USER_ID_CLAIM),
+            jti=self.payload[api_settings.JTI_CLAIM],
+            token=str(self),
+            created_at=self.current_time,
+            expires_at=datetime_from_epoch(self.payload['exp']),
+        )
+
+
+def insert_blacklisted(jti):
+    """Blacklist the outstanding token ``jti`` in one statement.
+
+    Returns True if it was blacklisted now, False if it already was and None
+    if it is not an outstanding token. The conflict clause makes concurrent
+    calls agree on a single winner.
+    """
+    connection = connections[router.db_for_write(BlacklistedToken)]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(BlacklistedToken._meta.db_table)} (token_id, blacklisted_at) '
+            f'SELECT id, %s FROM {quote(OutstandingToken._meta.db_table)} WHERE jti = %s '
+            f'ON CONFLICT (token_id) DO NOTHING RETURNING id',
+            [timezone.now(), jti],
+        )
+        if cursor.fetchone() is not None:
+            return True
+    return False if OutstandingToken.objects.filter(jti=jti).exists() else None
+
+
+def purge_expired_tokens(now=None, batch_size=1000):
+    """Delete expired outstanding tokens and their blacklist rows, in batches."""
+    now = now or aware_utcnow()
+    outstanding = blacklisted = batches = 0
+    last_id = 0
+    while True:
+        # Walks the primary key: tokens expire roughly in the order they
+        # were issued, and expires_at is not indexed.
+        ids = list(
+            OutstandingToken.objects
+            .filter(id__gt=last_id, expires_at__lte=now)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return PurgeResult(outstanding, blacklisted, batches)
+        with transaction.atomic():
+            # Cascades to the blacklist rows.
+            _, deleted = OutstandingToken.objects.filter(id__in=ids).delete()
+        outstanding += deleted.get(OutstandingToken._meta.label, 0)
+        blacklisted += deleted.get(BlacklistedToken._meta.label, 0)
+        batches += 1
+        last_id = ids[-1]
@@ -2,11 +2,17 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated  
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
 from django.contrib.auth import authenticate
-from django.contrib.auth.hashers import make_password
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+from .authentication import user_cache
+from .hashing import PasswordHashingBusy, password_pool
+from .keys import get_settings as get_key_settings, key_registry
 from .models import CustomUser
 from .serializers import UserSerializer, UserRegistrationSerializer
+from .tokens import RefreshToken
 from rest_framework import generics, status, permissions
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -66,7 +72,7 @@ def register_view(request):
             email=data.get('email'),
             first_name=data.get('first_name'),
             last_name=data.get('last_name'),
-            password=make_password(data.get('password'))
+            password=password_pool.hash(data.get('password'))
         )
 
         refresh = RefreshToken.for_user(user)
@@ -84,6 +90,8 @@ def register_view(request):
         }
         }, status=status.HTTP_200_OK)
         
+    except PasswordHashingBusy:
+        raise
     except Exception as e:
         return Response({
             'error': str(e)
@@ -125,6 +133,8 @@ def login_view(request):
             }
         }, status=status.HTTP_200_OK)
         
+    except PasswordHashingBusy:
+        raise
     except Exception as e:
         return Response({
             'error': str(e)
@@ -134,20 +144,24 @@ def login_view(request):
 @permission_classes([IsAuthenticated])
 def profile_view(request):
     """Perfil do usuário"""
-    user = request.user
-    return Response({
+    return Response(profile_data(request.user))
+
+
+def profile_data(user):
+    return {
         'id': user.id,
         'email': user.email,
         'first_name': user.first_name,
         'last_name': user.last_name,
         'name': f"{user.first_name} {user.last_name}",
         'date_joined': user.date_joined
-    })
+    }
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout_view(request):
     """Logout do usuário"""
+    user_cache.invalidate(request.user.pk)
     try:
         refresh_token = request.data.get('refresh_token')
         if refresh_token:
@@ -158,7 +172,16 @@ def logout_view(request):
             'message': 'Logout realizado com sucesso.'
         }, status=status.HTTP_200_OK)
         
-    except Exception as e:
+    except TokenError:
+        # Expired, invalid or already revoked: nothing left to revoke.
         return Response({
             'message': 'Logout realizado com sucesso.'
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+
+
+@require_GET
+def jwks_view(request):
+    """Public keys verifying access tokens (accounts.keys), as a JWK set."""
+    response = HttpResponse(key_registry.jwks(), content_type='application/json')
+    patch_cache_control(response, public=True, max_age=get_key_settings().get('JWKS_MAX_AGE', 300))
+    return response
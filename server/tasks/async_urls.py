@@ -0,0 +1,11 @@
+from django.urls import path
+from . import async_views
+
+
+urlpatterns = [
+    path('', async_views.task_list, name='async-task-list'),
+    path('overdue/', async_views.task_overdue, name='async-task-overdue'),
+    path('stats/', async_views.task_stats, name='async-task-stats'),
+    path('stream/', async_views.task_stream, name='async-task-stream'),
+    path('<int:pk>/', async_views.task_detail, name='async-task-detail'),
+]
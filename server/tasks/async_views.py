@@ -0,0 +1,150 @@
+"""Native async versions of the task read endpoints, for ASGI deployments.
+
+Responses match TaskViewSet's list, retrieve, overdue and stats actions,
+validators included; queries go through the async ORM so no worker thread
+is held while waiting on the database. The event stream is async only.
+"""
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+
+from todolist.async_api import async_api_view, render, renderer
+from .conditional import async_collection_conditional, async_task_conditional
+from .events import get_event_hub, get_settings as get_event_settings
+from .models import Task
+from .pagination import TaskCursorPagination
+from .search import InvertedIndexSearchBackend, get_search_backend
+from .serializers import TaskRowSerializer
+from .services import TaskService
+from .stats import aget_user_stats
+from .views import TaskViewSet
+
+
+def task_view(request, action):
+    """A TaskViewSet bound to the request, for its filter configuration."""
+    return TaskViewSet(request=request.drf, format_kwarg=None, action=action, args=(), kwargs={})
+
+
+async def filter_tasks(request, action):
+    view = task_view(request, action)
+    queryset = Task.objects.filter(user=request.user)
+    searching = request.drf.query_params.get('search')
+    if searching and isinstance(get_search_backend(queryset.db), InvertedIndexSearchBackend):
+        # The in-process index may need to load the user's tasks.
+        return await sync_to_async(view.filter_queryset)(queryset)
+    return view.filter_queryset(queryset)
+
+
+@async_api_view()
+@async_collection_conditional
+async def task_list(request):
+    queryset = TaskRowSerializer.values(await filter_tasks(request, 'list'))
+    paginator = TaskCursorPagination()
+    page = await paginator.apaginate_queryset(queryset, request.drf)
+    data = TaskRowSerializer(page, user=request.user, many=True).data
+    return render(paginator.get_paginated_response(data).data)
+
+
+@async_api_view()
+@async_task_conditional
+async def task_detail(request, pk):
+    queryset = TaskRowSerializer.values(await filter_tasks(request, 'retrieve'))
+    row = await queryset.filter(pk=pk).afirst()
+    if row is None:
+        raise NotFound()
+    return render(TaskRowSerializer(row, user=request.user).data)
+
+
+@async_api_view()
+@async_collection_conditional
+async def task_overdue(request):
+    queryset = TaskService.get_overdue_tasks(Task.objects.filter(user=request.user))
+    rows = [row async for row in TaskRowSerializer.values(queryset)]
+    return render(TaskRowSerializer(rows, user=request.user, many=True).data)
+
+
+@async_api_view()
+@async_collection_conditional
+async def task_stats(request):
+    return render(await aget_user_stats(request.user))
+
+
+def format_event(event, user):
+    # Every stream of the user receives the same event dict: encode it once.
+    encoded = event.get('encoded')
+    if encoded is None:
+        data = event['data']
+        if 'task' in data:
+            data = {**data, 'task': TaskRowSerializer(data['task'], user=user, now=timezone.now()).data}
+        encoded = event['encoded'] = b'id: %d\nevent: %s\ndata: %s\n\n' % (
+            event['id'], event['type'].encode(), renderer.render(data)
+        )
+    return encoded
+
+
+class EventStream:
+    """The user's task events as server-sent events.
+
+    StreamingHttpResponse closes its content once the response is done,
+    which drops the subscription even if iteration never started.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.options = get_event_settings()
+        self.subscription = get_event_hub().subscribe(user.pk)
+
+    def __aiter__(self):
+        return self.events()
+
+    async def events(self):
+        heartbeat = self.options.get('HEARTBEAT_SECONDS', 15)
+        # Streams end after a while so a client that vanished without the
+        # server noticing is dropped; EventSource reconnects by itself.
+        closes_at = time.monotonic() + self.options.get('MAX_STREAM_SECONDS', 300)
+        try:
+            yield b'retry: %d\n\n' % self.options.get('RETRY_MS', 3000)
+            while (remaining := closes_at - time.monotonic()) > 0:
+                try:
+                    event = await asyncio.wait_for(self.subscription.get(), min(heartbeat, remaining))
+                except asyncio.TimeoutError:
+                    yield b': keepalive\n\n'
+                    continue
+                # Events queued meanwhile go out in the same chunk.
+                yield b''.join(
+                    format_event(event, self.user) for event in [event, *self.subscription.drain()]
+                )
+        finally:
+            # Reached when a failed send to a gone client aborts the response.
+            self.close()
+
+    def close(self):
+        self.subscription.close()
+
+
+@async_api_view()
+async def task_stream(request):
+    """Server-sent events for the user's task changes.
+
+    Event types are task.created, task.updated and task.status_updated
+    (data: the task as in the list), task.deleted (data: id),
+    tasks.bulk_created/updated/deleted (data: ids) and resync when the
+    client fell too far behind. After a reconnect or resync, catch up with
+    /api/tasks/changes/.
+    """
+    if not isinstance(request, ASGIRequest):
+        return render(
+            {'error': 'The event stream requires an ASGI server.'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    response = StreamingHttpResponse(EventStream(request.user), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,233 @@
+"""Read-through cache for task detail rows, stats and overdue lists.
+
+Entries are kept per user in the ``TASK_CACHE['ALIAS']`` cache, tagged with
+the user's cache generation. Task writes bump the generation (see
+tasks.signals and the overdue sweep), which turns every entry of that user
+stale at once, bulk writes included. An entry is fetched
+together with the generation in one get_many(), so a hit is one round trip.
+
+Concurrent misses for the same entry within a process are coalesced: one
+request computes the value while the others wait for its result.
+
+The cache must be shared by every worker (Redis): with a per-process cache,
+a write would only invalidate the entries of the worker that made it. On a
+local cache it is therefore off unless ``SINGLE_PROCESS`` says a single
+process serves the API.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from todolist.cache import evictions, is_shared
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_settings():
+    return getattr(settings, 'TASK_CACHE', {})
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its result."""
+
+    class Call:
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.waiters = 0
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def waiters(self, key):
+        """Number of callers waiting for the running call of ``key``."""
+        with self._lock:
+            call = self._calls.get(key)
+            return call.waiters if call is not None else 0
+
+    def do(self, key, func, timeout=None):
+        """Return ``(result, shared)``, ``shared`` telling whether another caller ran func.
+
+        A caller that waited ``timeout`` seconds in vain runs func itself.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self.Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            if call.done.wait(timeout):
+                if call.error is not None:
+                    raise call.error
+                return call.result, True
+            return func(), False
+
+        try:
+            call.result = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class TaskCache:
+    """Per-user read-through cache invalidated by generation.
+
+    Values computed as None are not cached. Cache errors are logged and the
+    value is computed from the database, so an unavailable cache server only
+    costs performance.
+    """
+
+    key_prefix = 'tasks:'
+
+    def __init__(self, alias='default', timeout=300, coalesce_timeout=5, enabled=True, single_process=False):
+        self.alias = alias
+        self.timeout = timeout
+        self.coalesce_timeout = coalesce_timeout
+        self.enabled = enabled
+        self.single_process = single_process
+        self.flights = SingleFlight()
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = get_settings()
+        return cls(
+            alias=options.get('ALIAS', 'default'),
+            timeout=options.get('TIMEOUT', 300),
+            coalesce_timeout=options.get('COALESCE_TIMEOUT', 5),
+            enabled=options.get('ENABLED', True),
+            single_process=options.get('SINGLE_PROCESS', False),
+        )
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def active(self):
+        return self.enabled and (self.single_process or is_shared(self.cache))
+
+    @property
+    def shared(self):
+        """Whether the entries are active and seen alike by every worker."""
+        return self.enabled and is_shared(self.cache)
+
+    @contextmanager
+    def single_process_mode(self):
+        """Use a local cache within the block, for requests all served by this process."""
+        previous = self.single_process
+        self.single_process = True
+        try:
+            yield
+        finally:
+            self.single_process = previous
+
+    def generation_key(self, user_id):
+        return f'{self.key_prefix}{user_id}:generation'
+
+    def entry_key(self, user_id, kind, arg=None):
+        return f'{self.key_prefix}{user_id}:{kind}' + ('' if arg is None else f':{arg}')
+
+    def count(self, kind, outcome):
+        with self._lock:
+            self._counts[kind, outcome] += 1
+
+    def get_or_compute(self, user_id, kind, compute, arg=None):
+        """Return the cached ``kind`` entry of the user, computing it on a miss."""
+        if not self.active:
+            return compute()
+        key = self.entry_key(user_id, kind, arg)
+        generation_key = self.generation_key(user_id)
+        try:
+            found = self.cache.get_many([generation_key, key])
+            generation = found.get(generation_key)
+            if generation is None:
+                generation = self.new_generation(user_id)
+        except Exception:
+            logger.warning('Task cache unavailable', exc_info=True)
+            self.count(kind, 'errors')
+            return compute()
+
+        entry = found.get(key)
+        if entry is not None and entry[0] == generation:
+            self.count(kind, 'hits')
+            return entry[1]
+        self.count(kind, 'misses' if entry is None else 'stale')
+
+        # Keyed by generation: callers that saw a newer one must not share
+        # a value read before the write that bumped it.
+        value, shared = self.flights.do((key, generation), compute, self.coalesce_timeout)
+        if shared:
+            self.count(kind, 'coalesced')
+        elif value is not None:
+            try:
+                self.cache.set(key, (generation, value), self.timeout)
+            except Exception:
+                logger.warning('Task cache unavailable', exc_info=True)
+                self.count(kind, 'errors')
+        return value
+
+    def new_generation(self, user_id):
+        # Clock-based, so a generation lost to eviction never comes back.
+        key = self.generation_key(user_id)
+        self.cache.add(key, time.time_ns(), None)
+        return self.cache.get(key)
+
+    def invalidate(self, user_id):
+        """Make every cached entry of the user stale."""
+        if not self.active:
+            return
+        key = self.generation_key(user_id)
+        try:
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, time.time_ns(), None)
+        except Exception:
+            logger.warning('Task cache unavailable; entries of user %s expire in %s s',
+                           user_id, self.timeout, exc_info=True)
+
+    def invalidate_on_write(self, user_id):
+        """Invalidate for a write in the current transaction: now, and again on commit.
+
+        The second bump drops values read before the commit; the first takes
+        effect even when the transaction never commits, as in TestCase.
+        """
+        self.invalidate(user_id)
+        transaction.on_commit(partial(self.invalidate, user_id))
+
+    def metrics(self):
+        """Lookup counts per entry kind plus the backend's evictions."""
+        with self._lock:
+            counts = self._counts.copy()
+        kinds = {}
+        for (kind, outcome), count in sorted(counts.items()):
+            kinds.setdefault(kind, {})[outcome] = count
+        try:
+            evicted = evictions(self.cache)
+        except Exception:
+            evicted = None
+        return {'alias': self.alias, 'active': self.active, 'kinds': kinds, 'evictions': evicted}
+
+
+task_cache = TaskCache.from_settings()
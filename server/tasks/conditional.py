@@ -0,0 +1,181 @@
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+from . import stats
+from .cache import task_cache
+from .models import Task
+from .serializers import TaskRowSerializer
+
+
+def time_window():
+    """Start of the current window for time-derived fields.
+
+    ``is_overdue`` and ``days_until_due`` change as time passes without any
+    write, so validators roll over every ``TASK_ETAG_TIME_WINDOW`` seconds.
+    """
+    size = settings.TASK_ETAG_TIME_WINDOW
+    now = timezone.now().timestamp()
+    return datetime.fromtimestamp(now - now % size, tz=dt_timezone.utc)
+
+
+def make_etag(request, *parts):
+    # The owner's name is part of every task representation.
+    parts = (str(request.user), request.META.get('HTTP_ACCEPT', ''), *parts)
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def validator_source(user_id, kind, compute, arg=None):
+    """Read a value validators derive from, through the task cache if shared.
+
+    A 304 tells the client its copy is current, so a stale entry left in
+    another worker's local cache must not answer it: validators come from
+    the database unless every worker sees the same cache.
+    """
+    if task_cache.shared:
+        return task_cache.get_or_compute(user_id, kind, compute, arg=arg)
+    return compute()
+
+
+def user_stats_row(request):
+    """The user's UserTaskStats values, fetched at most once per request."""
+    if not hasattr(request, '_task_stats_row'):
+        request._task_stats_row = validator_source(
+            request.user.pk, 'stats_row', partial(stats.get_user_row, request.user.pk)
+        )
+    return request._task_stats_row
+
+
+def collection_state(request):
+    state = getattr(request, '_task_collection_state', None)
+    if state is None:
+        row = user_stats_row(request)
+        version, changed_at = (row['version'], row['changed_at']) if row else (0, None)
+        state = request._task_collection_state = (version, changed_at, time_window())
+    return state
+
+
+def collection_etag(request, *args, **kwargs):
+    version, _, window = collection_state(request)
+    return make_etag(request, 'tasks', request.user.pk, version, window.timestamp(), request.get_full_path())
+
+
+def collection_last_modified(request, *args, **kwargs):
+    _, changed_at, window = collection_state(request)
+    return max(changed_at, window) if changed_at else window
+
+
+def dashboard_etag(request, *args, **kwargs):
+    # The profile part isn't covered by the task collection's version.
+    user = request.user
+    return make_etag(request, 'dashboard', collection_etag(request), user.first_name, user.last_name)
+
+
+def fetch_task_row(user, pk):
+    return TaskRowSerializer.values(Task.objects.filter(user=user, pk=pk)).first()
+
+
+def task_row(request, pk):
+    """The user's task ``pk`` as a TaskRowSerializer row, or None; cached."""
+    if not hasattr(request, '_task_row'):
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            request._task_row = None
+        else:
+            request._task_row = validator_source(
+                request.user.pk, 'task', partial(fetch_task_row, request.user, pk), arg=pk
+            )
+    return request._task_row
+
+
+def task_state(request, pk):
+    state = getattr(request, '_task_state', None)
+    if state is None:
+        row = task_row(request, pk)
+        state = request._task_state = (row and row['updated_at'], time_window())
+    return state
+
+
+def task_etag(request, pk=None, *args, **kwargs):
+    updated_at, window = task_state(request, pk)
+    if updated_at is None:
+        return None
+    # Filters in the query string decide between the task and a 404.
+    return make_etag(request, 'task', pk, updated_at.isoformat(), window.timestamp(), request.get_full_path())
+
+
+def task_last_modified(request, pk=None, *args, **kwargs):
+    updated_at, window = task_state(request, pk)
+    if updated_at is None:
+        return None
+    return max(updated_at, window)
+
+
+def conditional(etag_func, last_modified_func):
+    """Method decorator answering conditional GETs with 304 before the view runs."""
+    def decorator(func):
+        conditioned = condition(etag_func=etag_func, last_modified_func=last_modified_func)(func)
+
+        @wraps(func)
+        def inner(request, *args, **kwargs):
+            response = conditioned(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Accept', 'Authorization'))
+            return response
+        return inner
+    return method_decorator(decorator)
+
+
+def validators(etag_func, last_modified_func, request, *args, **kwargs):
+    """The quoted ETag and the Last-Modified timestamp, as condition() computes them."""
+    etag = etag_func(request, *args, **kwargs)
+    last_modified = last_modified_func(request, *args, **kwargs) if last_modified_func else None
+    return (
+        quote_etag(etag) if etag is not None else None,
+        int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def async_conditional(etag_func, last_modified_func):
+    """conditional() for the async views in tasks.async_views.
+
+    Django's condition() only wraps sync views. Goes inside async_api_view,
+    which sets the user the validators are computed for.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            # The validators may query the database.
+            etag, last_modified = await sync_to_async(validators)(
+                etag_func, last_modified_func, request, *args, **kwargs
+            )
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                if last_modified and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(last_modified)
+                if etag:
+                    response.headers.setdefault('ETag', etag)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Accept', 'Authorization'))
+            return response
+        return inner
+    return decorator
+
+
+collection_conditional = conditional(collection_etag, collection_last_modified)
+task_conditional = conditional(task_etag, task_last_modified)
+async_collection_conditional = async_conditional(collection_etag, collection_last_modified)
+async_task_conditional = async_conditional(task_etag, task_last_modified)
+# ETag only: Last-Modified would miss profile changes.
+dashboard_conditional = conditional(dashboard_etag, None)
@@ -0,0 +1,159 @@
+"""Task change events pushed to the owner's open streams.
+
+Writes publish an event per task change once their transaction commits;
+``/api/tasks/stream/`` subscribes to the user's events and sends them as
+server-sent events. The hub fans events out to the streams of this process
+only. With several server processes, set ``TASK_EVENTS['HUB']`` to a
+subclass whose publish() sends events through a shared broker and which
+calls deliver() for every event it receives from it.
+"""
+import asyncio
+import itertools
+import threading
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .serializers import TaskRowSerializer
+
+
+def get_settings():
+    return getattr(settings, 'TASK_EVENTS', {})
+
+
+class Subscription:
+    """One stream's queue of events, consumed on its event loop."""
+
+    def __init__(self, hub, user_id, max_queue):
+        self.hub = hub
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(max_queue)
+
+    def put(self, event):
+        # Called on self.loop. A consumer this far behind is told to
+        # resynchronize rather than holding an unbounded backlog.
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {'id': event['id'], 'type': 'resync', 'data': {}}
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def drain(self):
+        """Return the events already queued, without waiting."""
+        events = []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class EventHub:
+    """In-process fan-out of events to the subscriptions of their user.
+
+    Events are dicts with ``type`` and ``data``; publish() adds a
+    process-wide increasing ``id``. It can be called from any thread.
+    """
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+        self._ids = itertools.count(1)
+
+    @classmethod
+    def from_settings(cls):
+        return cls(max_queue=get_settings().get('QUEUE_SIZE', 100))
+
+    def subscribe(self, user_id):
+        """Subscribe to the user's events; call from the consuming event loop."""
+        subscription = Subscription(self, user_id, self.max_queue)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id, event):
+        """Send an event to the user's subscriptions; return its id."""
+        event = {'id': next(self._ids), **event}
+        self.deliver(user_id, event)
+        return event['id']
+
+    def deliver(self, user_id, event):
+        with self._lock:
+            subscriptions = self._subscriptions.get(user_id)
+            if not subscriptions:
+                return
+            # One wake-up per event loop, not per subscription.
+            per_loop = defaultdict(list)
+            for subscription in subscriptions:
+                per_loop[subscription.loop].append(subscription)
+        for loop, targets in per_loop.items():
+            try:
+                loop.call_soon_threadsafe(_put_all, targets, event)
+            except RuntimeError:
+                # The loop has closed; its streams are gone.
+                pass
+
+    def connections(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+def _put_all(subscriptions, event):
+    for subscription in subscriptions:
+        subscription.put(event)
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_event_hub():
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = import_string(get_settings().get('HUB', 'tasks.events.EventHub')).from_settings()
+        return _hub
+
+
+def publish_on_commit(user_id, event_type, data):
+    """Publish the event once the current transaction, if any, commits."""
+    transaction.on_commit(partial(get_event_hub().publish, user_id, {'type': event_type, 'data': data}))
+
+
+def task_row(task):
+    return {column: getattr(task, column) for column in TaskRowSerializer.columns}
+
+
+def task_saved(task, created, previous_status):
+    if created:
+        event_type = 'task.created'
+    elif previous_status != task.status:
+        event_type = 'task.status_updated'
+    else:
+        event_type = 'task.updated'
+    publish_on_commit(task.user_id, event_type, {'task': task_row(task)})
+
+
+def task_deleted(task):
+    publish_on_commit(task.user_id, 'task.deleted', {'id': task.pk})
+
+
+def tasks_changed_in_bulk(user_id, action, task_ids):
+    publish_on_commit(user_id, f'tasks.bulk_{action}', {'ids': task_ids})
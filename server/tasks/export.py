@@ -0,0 +1,108 @@
+"""Streaming CSV and NDJSON export of a user's tasks.
+
+Rows come from a server-side cursor in chunks of ``TASK_EXPORT_CHUNK_SIZE``
+and are encoded one chunk at a time, so memory stays flat whatever the
+number of tasks.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+from .serializers import TaskRowSerializer, TaskSerializer
+
+
+FIELDS = TaskSerializer.Meta.fields
+
+# Text a spreadsheet would evaluate as a formula when the file is opened;
+# only the free-text fields can hold it.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+TEXT_FIELDS = ['user', 'title', 'description']
+
+
+class TaskExportRenderer(BaseRenderer):
+    """Selects an export format; the rows are encoded by encode_rows()."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only errors reach render(); exported rows are streamed.
+        return json.dumps(data).encode()
+
+
+class TaskCSVRenderer(TaskExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def header(self):
+        return self.encode([FIELDS])
+
+    def encode(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(rows)
+        return buffer.getvalue().encode()
+
+    def encode_rows(self, tasks):
+        rows = []
+        for task in tasks:
+            for field in TEXT_FIELDS:
+                value = task[field]
+                if value and value.startswith(FORMULA_PREFIXES):
+                    task[field] = "'" + value
+            rows.append([task[field] for field in FIELDS])
+        return self.encode(rows)
+
+
+class TaskNDJSONRenderer(TaskExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def header(self):
+        return b''
+
+    def encode_rows(self, tasks):
+        return ''.join(
+            json.dumps(task, ensure_ascii=False, separators=(',', ':')) + '\n' for task in tasks
+        ).encode()
+
+
+def export_chunks(renderer, rows, serializer):
+    yield renderer.header()
+    rows = iter(rows)
+    while chunk := list(islice(rows, settings.TASK_EXPORT_CHUNK_SIZE)):
+        yield renderer.encode_rows(map(serializer.to_representation, chunk))
+
+
+async def aexport_chunks(renderer, queryset, serializer):
+    yield renderer.header()
+    chunk = []
+    async for row in queryset.aiterator(chunk_size=settings.TASK_EXPORT_CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) == settings.TASK_EXPORT_CHUNK_SIZE:
+            yield renderer.encode_rows(map(serializer.to_representation, chunk))
+            chunk = []
+    if chunk:
+        yield renderer.encode_rows(map(serializer.to_representation, chunk))
+
+
+def export_response(request, queryset, renderer):
+    """Stream the queryset's tasks in the renderer's format."""
+    queryset = TaskRowSerializer.values(queryset)
+    serializer = TaskRowSerializer(None, user=request.user)
+    if isinstance(request._request, ASGIRequest):
+        # Django would read a synchronous iterator to the end before
+        # sending anything under ASGI.
+        content = aexport_chunks(renderer, queryset, serializer)
+    else:
+        content = export_chunks(
+            renderer, queryset.iterator(chunk_size=settings.TASK_EXPORT_CHUNK_SIZE), serializer
+        )
+    response = StreamingHttpResponse(content, content_type=f'{renderer.media_type}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="tasks.{renderer.format}"'
+    return response
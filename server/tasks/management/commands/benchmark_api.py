@@ -0,0 +1,92 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from tasks import stats
+from tasks.seeding import seed_tasks, seed_users
+from todolist.benchmarks import BenchmarkContext, check_budgets, run_benchmarks
+
+
+BENCHMARK_PASSWORD = 'benchmark-pass'
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every task and auth API route against seeded data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Number of seed users.')
+        parser.add_argument('--tasks-per-user', type=int, default=1000, help='Tasks created per seed user.')
+        parser.add_argument('--iterations', type=int, default=50, help='Measured requests per route.')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per route.')
+        parser.add_argument('--routes', nargs='+', help='Only benchmark these route names.')
+        parser.add_argument('--output', help='Write JSON results to this file ("-" for stdout).')
+        parser.add_argument('--budgets', help='JSON file of per-route query and p90 latency budgets.')
+        parser.add_argument(
+            '--fail-on-budget',
+            action='store_true',
+            help='Exit with an error when a route fails or exceeds its budget.'
+        )
+        parser.add_argument('--keep', action='store_true', help='Commit the seeded rows instead of rolling back.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                users = seed_users(options['users'], password=BENCHMARK_PASSWORD, prefix='bench')
+                created = seed_tasks(users, options['tasks_per_user'])
+                for user in users:
+                    stats.rebuild_counters(user.pk)
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE tasks_task')
+                self.stderr.write(f'Seeded {created} tasks for {len(users)} users.')
+
+                context = BenchmarkContext(users[len(users) // 2], BENCHMARK_PASSWORD)
+                results = run_benchmarks(
+                    context, options['iterations'], options['warmup'], options['routes']
+                )
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            pass
+
+        self.report(results, options)
+
+        if options['budgets']:
+            with open(options['budgets']) as budget_file:
+                budgets = json.load(budget_file)
+            violations = check_budgets(results, budgets)
+            for violation in violations:
+                self.stderr.write(self.style.WARNING(violation))
+            if violations and options['fail_on_budget']:
+                raise CommandError(f'{len(violations)} budget violations.')
+
+    def report(self, results, options):
+        self.stderr.write(
+            f'{"route":<24} {"status":>6} {"p50 ms":>8} {"p90 ms":>8} {"p99 ms":>8} '
+            f'{"queries":>7} {"peak KiB":>9}'
+        )
+        for result in results:
+            self.stderr.write(
+                f'{result.name:<24} {result.status:>6} {result.p50_ms:>8.2f} {result.p90_ms:>8.2f} '
+                f'{result.p99_ms:>8.2f} {result.queries:>7} {result.peak_kib:>9.1f}'
+            )
+
+        if options['output']:
+            payload = json.dumps({
+                'database': connection.vendor,
+                'users': options['users'],
+                'tasks_per_user': options['tasks_per_user'],
+                'iterations': options['iterations'],
+                'routes': [result._asdict() for result in results],
+            }, indent=2)
+            if options['output'] == '-':
+                sys.stdout.write(payload + '\n')
+            else:
+                with open(options['output'], 'w') as output_file:
+                    output_file.write(payload + '\n')
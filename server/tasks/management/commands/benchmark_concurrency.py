@@ -0,0 +1,201 @@
+import asyncio
+import io
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test.utils import override_settings
+
+from accounts.tokens import AccessToken
+from tasks import stats
+from tasks.models import Task
+from tasks.seeding import seed_tasks, seed_users
+from tasks.signals import bulk_writes
+from todolist.async_api import dispatch_async_api
+from todolist.benchmarks import percentile
+
+
+# (WSGI path, ASGI path) per benchmarked endpoint; {task} is a task id.
+ROUTES = {
+    'list': ('/api/tasks/', '/api/async/tasks/'),
+    'retrieve': ('/api/tasks/{task}/', '/api/async/tasks/{task}/'),
+    'overdue': ('/api/tasks/overdue/', '/api/async/tasks/overdue/'),
+    'stats': ('/api/tasks/stats/', '/api/async/tasks/stats/'),
+    'profile': ('/api/auth/profile/', '/api/async/auth/profile/'),
+}
+
+HOST = 'localhost'
+
+
+def call_wsgi(application, path, token, method='GET', body=b''):
+    path, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'HTTP_AUTHORIZATION': f'Bearer {token}',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'wsgi.version': (1, 0),
+    }
+    status = []
+    body = application(environ, lambda code, headers, exc_info=None: status.append(code))
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return int(status[0].split()[0])
+
+
+async def call_asgi(application, path, token):
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', HOST.encode()), (b'authorization', f'Bearer {token}'.encode())],
+        'server': (HOST, 80),
+        'client': ('127.0.0.1', 0),
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    status = []
+
+    async def receive():
+        return messages.pop() if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+async def drive(call, concurrency, requests):
+    """Run ``requests`` calls from ``concurrency`` concurrent clients."""
+    latencies = []
+    errors = 0
+    pending = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for _ in pending:
+            started = time.perf_counter()
+            status = await call()
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests_per_second': round(requests / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'errors': errors,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests/sec and p99 latency of the WSGI task API with the native async '
+        'endpoints under ASGI, at increasing client concurrency. Needs a database that '
+        'other threads can see (Postgres or a file-backed SQLite).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[100, 250, 500, 1000])
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per route and level.')
+        parser.add_argument('--routes', nargs='+', choices=list(ROUTES), default=list(ROUTES))
+        parser.add_argument('--tasks', type=int, default=1000, help='Tasks seeded for the benchmark user.')
+        parser.add_argument(
+            '--wsgi-threads', type=int, default=16,
+            help='Worker threads serving the WSGI application, as in a threaded WSGI server.'
+        )
+        parser.add_argument('--output', help='Write JSON results to this file ("-" for stdout).')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.settings_dict['NAME'] == ':memory:':
+            raise CommandError('An in-memory SQLite database is not shared between threads.')
+
+        # Committed, not rolled back: the worker threads use their own connections.
+        user = seed_users(1, prefix='concurrency')[0]
+        try:
+            seed_tasks([user], options['tasks'])
+            stats.rebuild_counters(user.pk)
+            # One user sends every request: measure them, not the rate limits.
+            with override_settings(API_THROTTLES={**settings.API_THROTTLES, 'ENABLED': False}):
+                results = self.benchmark(user, options)
+        finally:
+            with bulk_writes():
+                Task.objects.filter(user=user).delete()
+            user.delete()
+
+        if options['output']:
+            payload = json.dumps({'database': connection.vendor, 'results': results}, indent=2)
+            if options['output'] == '-':
+                sys.stdout.write(payload + '\n')
+            else:
+                with open(options['output'], 'w') as output_file:
+                    output_file.write(payload + '\n')
+
+    def benchmark(self, user, options):
+        token = str(AccessToken.for_user(user))
+        task_id = Task.objects.filter(user=user).values_list('id', flat=True).first()
+        wsgi = get_wsgi_application()
+        asgi = dispatch_async_api(get_asgi_application())
+        # Close this thread's connection so every server thread starts alike.
+        connection.close()
+
+        self.stderr.write(
+            f'{"route":<10} {"clients":>7} {"WSGI req/s":>11} {"WSGI p99":>9} '
+            f'{"ASGI req/s":>11} {"ASGI p99":>9}'
+        )
+        results = []
+        for route in options['routes']:
+            wsgi_path, asgi_path = (path.format(task=task_id) for path in ROUTES[route])
+            for concurrency in options['concurrency']:
+                with ThreadPoolExecutor(options['wsgi_threads']) as pool:
+                    async def wsgi_call():
+                        loop = asyncio.get_running_loop()
+                        return await loop.run_in_executor(pool, call_wsgi, wsgi, wsgi_path, token)
+                    wsgi_result = asyncio.run(drive(wsgi_call, concurrency, options['requests']))
+
+                async def asgi_call():
+                    return await call_asgi(asgi, asgi_path, token)
+                asgi_result = asyncio.run(drive(asgi_call, concurrency, options['requests']))
+
+                self.stderr.write(
+                    f'{route:<10} {concurrency:>7} {wsgi_result["requests_per_second"]:>11,.0f} '
+                    f'{wsgi_result["p99_ms"]:>9.1f} {asgi_result["requests_per_second"]:>11,.0f} '
+                    f'{asgi_result["p99_ms"]:>9.1f}'
+                )
+                results.append({
+                    'route': route, 'concurrency': concurrency, 'wsgi': wsgi_result, 'asgi': asgi_result,
+                })
+        return results
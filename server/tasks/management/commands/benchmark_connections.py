@@ -0,0 +1,162 @@
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test.utils import override_settings
+
+from accounts.tokens import AccessToken
+from tasks.models import Task
+from tasks.seeding import seed_tasks, seed_users
+from tasks.signals import bulk_writes
+from todolist.benchmarks import percentile
+from todolist.db.postgresql.base import pool_metrics
+
+from .benchmark_concurrency import call_wsgi
+
+
+# Short requests: (method, path); {task} is a task id.
+ROUTES = {
+    'update_status': ('PATCH', '/api/tasks/{task}/update_status/'),
+    'list': ('GET', '/api/tasks/?page_size=1'),
+}
+
+MODES = ['connect', 'persistent', 'pool']
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the throughput of short WSGI requests from a pool of server threads when '
+        'every request connects to Postgres (connect), when each thread keeps its '
+        'connection (persistent) and with the connection pool (pool).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+        parser.add_argument('--routes', nargs='+', choices=list(ROUTES), default=list(ROUTES))
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per route and mode.')
+        parser.add_argument('--threads', type=int, default=16, help='Server threads sending requests.')
+        parser.add_argument(
+            '--pool-size', type=int, default=None,
+            help='Maximum pool size (default: the configured one, or --threads).'
+        )
+        parser.add_argument('--output', help='Write JSON results to this file ("-" for stdout).')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql' or not hasattr(connection, 'close_pool'):
+            raise CommandError('Needs the todolist.db.postgresql database backend.')
+
+        user = seed_users(1, prefix='connections')[0]
+        settings_dict = connections.settings[DEFAULT_DB_ALIAS]
+        original = (settings_dict['CONN_MAX_AGE'], dict(settings_dict['OPTIONS']))
+        try:
+            seed_tasks([user], 10)
+            # One user sends every request: measure them, not the rate limits.
+            with override_settings(API_THROTTLES={**settings.API_THROTTLES, 'ENABLED': False}):
+                results = self.benchmark(user, settings_dict, options)
+        finally:
+            settings_dict['CONN_MAX_AGE'], settings_dict['OPTIONS'] = original
+            connection.close_pool()
+            with bulk_writes():
+                Task.objects.filter(user=user).delete()
+            user.delete()
+
+        if options['output']:
+            payload = json.dumps({'threads': options['threads'], 'results': results}, indent=2)
+            if options['output'] == '-':
+                sys.stdout.write(payload + '\n')
+            else:
+                with open(options['output'], 'w') as output_file:
+                    output_file.write(payload + '\n')
+
+    def configure(self, settings_dict, mode, options):
+        """Switch the connection settings that worker threads start with."""
+        pool = settings_dict['OPTIONS'].get('pool')
+        pool = dict(pool) if isinstance(pool, dict) else {}
+        pool['max_size'] = options['pool_size'] or pool.get('max_size') or options['threads']
+        pool['min_size'] = min(pool.get('min_size', 2), pool['max_size'])
+        options_dict = {key: value for key, value in settings_dict['OPTIONS'].items() if key != 'pool'}
+        if mode == 'pool':
+            options_dict['pool'] = pool
+        settings_dict['OPTIONS'] = options_dict
+        settings_dict['CONN_MAX_AGE'] = 600 if mode == 'persistent' else 0
+
+    def benchmark(self, user, settings_dict, options):
+        token = str(AccessToken.for_user(user))
+        task_id = Task.objects.filter(user=user).values_list('id', flat=True).first()
+        wsgi = get_wsgi_application()
+        connection.close()
+
+        self.stderr.write(
+            f'{"route":<14} {"mode":<11} {"req/s":>8} {"p50 ms":>7} {"p99 ms":>7} '
+            f'{"connects":>9} {"acquire ms":>11}'
+        )
+        results = []
+        for route in options['routes']:
+            method, path = ROUTES[route]
+            path = path.format(task=task_id)
+            for mode in options['modes']:
+                connection.close_pool()
+                self.configure(settings_dict, mode, options)
+                result = self.run(wsgi, method, path, token, options)
+                self.stderr.write(
+                    f'{route:<14} {mode:<11} {result["requests_per_second"]:>8,.0f} '
+                    f'{result["p50_ms"]:>7.2f} {result["p99_ms"]:>7.2f} '
+                    f'{result["acquisitions"]:>9} {result["acquire_mean_ms"]:>11.3f}'
+                )
+                results.append({'route': route, 'mode': mode, **result})
+        return results
+
+    def run(self, wsgi, method, path, token, options):
+        statuses = ['todo', 'in_progress', 'done']
+        counter = iter(range(options['requests']))
+        lock = threading.Lock()
+        latencies = []
+        errors = 0
+
+        def client():
+            nonlocal errors
+            while True:
+                with lock:
+                    n = next(counter, None)
+                if n is None:
+                    break
+                body = json.dumps({'status': statuses[n % 3]}).encode() if method == 'PATCH' else b''
+                started = time.perf_counter()
+                status = call_wsgi(wsgi, path, token, method, body)
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    errors += status != 200
+
+        before = pool_metrics().get(DEFAULT_DB_ALIAS, {}).get('acquire_ms') or {'buckets': {}, 'sum': 0}
+        threads = options['threads']
+        with ThreadPoolExecutor(threads) as executor:
+            started = time.perf_counter()
+            for future in [executor.submit(client) for _ in range(threads)]:
+                future.result()
+            elapsed = time.perf_counter() - started
+
+            # Close every worker thread's connection before the next mode.
+            barrier = threading.Barrier(threads)
+            def close():
+                barrier.wait()
+                connections.close_all()
+            for future in [executor.submit(close) for _ in range(threads)]:
+                future.result()
+        after = pool_metrics()[DEFAULT_DB_ALIAS]['acquire_ms']
+
+        acquisitions = sum(after['buckets'].values()) - sum(before['buckets'].values())
+        return {
+            'requests_per_second': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'errors': errors,
+            'acquisitions': acquisitions,
+            'acquire_mean_ms': round((after['sum'] - before['sum']) / acquisitions, 3) if acquisitions else 0.0,
+        }
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from accounts.tokens import AccessToken
+from tasks.events import get_event_hub
+from tasks.seeding import seed_users
+from todolist.async_api import dispatch_async_api
+from todolist.benchmarks import percentile
+
+
+HOST = 'localhost'
+
+
+class Connection:
+    """An SSE client driving the ASGI application in-process."""
+
+    def __init__(self, application, path, token, arrivals):
+        self.application = application
+        self.path = path
+        self.token = token
+        self.arrivals = arrivals
+        self.status = None
+        self.disconnected = asyncio.Event()
+
+    async def run(self):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': self.path,
+            'raw_path': self.path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (b'host', HOST.encode()),
+                (b'accept', b'text/event-stream'),
+                (b'authorization', f'Bearer {self.token}'.encode()),
+            ],
+            'server': (HOST, 80),
+            'client': ('127.0.0.1', 0),
+        }
+        await self.application(scope, self.receive, self.send)
+
+    async def receive(self):
+        if self.status is None:
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+        elif message.get('body', b'').startswith(b'id: '):
+            arrived = time.perf_counter()
+            for event in message['body'].split(b'\n\n')[:-1]:
+                event_id = int(event[4:event.index(b'\n')])
+                self.arrivals.setdefault(event_id, []).append(arrived)
+
+
+class Command(BaseCommand):
+    help = (
+        'Open many /api/tasks/stream/ connections in one process and measure memory per '
+        'connection and the latency from publishing a task event to its delivery on every '
+        'connection of the owner. Needs a database other threads can see (Postgres or a '
+        'file-backed SQLite).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, nargs='+', default=[100, 1000, 5000])
+        parser.add_argument('--users', type=int, default=10, help='Connections are spread over this many users.')
+        parser.add_argument('--events', type=int, default=200, help='Events published per connection level.')
+        parser.add_argument('--interval', type=float, default=0.005, help='Seconds between published events.')
+        parser.add_argument('--path', default='/api/tasks/stream/')
+        parser.add_argument('--output', help='Write JSON results to this file ("-" for stdout).')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.settings_dict['NAME'] == ':memory:':
+            raise CommandError('An in-memory SQLite database is not shared between threads.')
+
+        users = seed_users(options['users'], prefix='events')
+        try:
+            tokens = [(user.pk, str(AccessToken.for_user(user))) for user in users]
+            connection.close()
+            events = {**settings.TASK_EVENTS, 'HEARTBEAT_SECONDS': 3600, 'MAX_STREAM_SECONDS': 3600}
+            # Thousands of streams per user: measure them, not the rate limits.
+            throttles = {**settings.API_THROTTLES, 'ENABLED': False}
+            with override_settings(TASK_EVENTS=events, API_THROTTLES=throttles):
+                application = dispatch_async_api(get_asgi_application())
+                self.stderr.write(
+                    f'{"clients":>7} {"KiB/conn":>9} {"open s":>7} {"deliveries/s":>13} '
+                    f'{"p50 ms":>7} {"p99 ms":>7} {"fan-out p99":>12}'
+                )
+                results = [
+                    asyncio.run(self.benchmark(application, tokens, count, options))
+                    for count in options['connections']
+                ]
+        finally:
+            for user in users:
+                user.delete()
+
+        if options['output']:
+            payload = json.dumps({'database': connection.vendor, 'results': results}, indent=2)
+            if options['output'] == '-':
+                sys.stdout.write(payload + '\n')
+            else:
+                with open(options['output'], 'w') as output_file:
+                    output_file.write(payload + '\n')
+
+    async def benchmark(self, application, tokens, count, options):
+        hub = get_event_hub()
+        arrivals = {}
+        clients = [
+            Connection(application, options['path'], tokens[n % len(tokens)][1], arrivals)
+            for n in range(count)
+        ]
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(client.run()) for client in clients]
+        while hub.connections() < count:
+            failed = [client.status for client in clients if client.status not in (None, 200)]
+            if failed:
+                raise CommandError(f'Stream request failed with status {failed[0]}.')
+            await asyncio.sleep(0.01)
+        opened = time.perf_counter() - started
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        per_user = {}
+        for n in range(count):
+            user_id = tokens[n % len(tokens)][0]
+            per_user[user_id] = per_user.get(user_id, 0) + 1
+        published = {}
+
+        def publish():
+            for n in range(options['events']):
+                user_id = tokens[n % len(tokens)][0]
+                published_at = time.perf_counter()
+                event_id = hub.publish(user_id, {'type': 'task.deleted', 'data': {'id': n}})
+                published[event_id] = (published_at, per_user.get(user_id, 0))
+                time.sleep(options['interval'])
+
+        # Publishers are request threads, as with the WSGI/sync views.
+        publisher = threading.Thread(target=publish)
+        publish_started = time.perf_counter()
+        publisher.start()
+        await asyncio.to_thread(publisher.join)
+        expected = sum(receivers for _, receivers in published.values())
+        deadline = time.perf_counter() + 30
+        while sum(len(times) for times in arrivals.values()) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - publish_started
+
+        latencies = []
+        fan_out = []
+        for event_id, (published_at, _) in published.items():
+            times = arrivals.get(event_id, [])
+            latencies += [(arrived - published_at) * 1000 for arrived in times]
+            if times:
+                fan_out.append((max(times) - published_at) * 1000)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        result = {
+            'connections': count,
+            'kib_per_connection': round(memory / count / 1024, 1),
+            'open_seconds': round(opened, 2),
+            'deliveries': len(latencies),
+            'missed': expected - len(latencies),
+            'deliveries_per_second': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'fan_out_p99_ms': round(percentile(fan_out, 99), 2),
+        }
+        self.stderr.write(
+            f'{count:>7} {result["kib_per_connection"]:>9.1f} {opened:>7.2f} '
+            f'{result["deliveries_per_second"]:>13,.0f} {result["p50_ms"]:>7.2f} '
+            f'{result["p99_ms"]:>7.2f} {result["fan_out_p99_ms"]:>12.2f}'
+        )
+        return result
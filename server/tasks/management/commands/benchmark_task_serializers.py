@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.renderers import JSONRenderer
+
+from tasks.models import Task
+from tasks.seeding import seed_tasks, seed_users
+from tasks.serializers import TaskRowSerializer, TaskSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+def render_with_serializer(user):
+    tasks = Task.objects.filter(user=user).order_by('-created_at', '-id')
+    return JSONRenderer().render(TaskSerializer(tasks, many=True).data)
+
+
+def render_with_rows(user):
+    rows = TaskRowSerializer.values(Task.objects.filter(user=user).order_by('-created_at', '-id'))
+    return JSONRenderer().render(TaskRowSerializer(rows, user=user, many=True).data)
+
+
+class Command(BaseCommand):
+    help = 'Compare list rendering throughput of TaskSerializer and the TaskRowSerializer fast path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+            help='Task counts to benchmark.'
+        )
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per size; the best is reported.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"tasks":>8} {"serializer rows/s":>18} {"fast path rows/s":>17} {"speedup":>8}')
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    user = seed_users(1, prefix=f'bench-{size}')[0]
+                    seed_tasks([user], size)
+                    if connection.vendor == 'postgresql':
+                        with connection.cursor() as cursor:
+                            cursor.execute('ANALYZE tasks_task')
+                    self.benchmark(user, size, options['repeat'])
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def benchmark(self, user, size, repeat):
+        before, expected = self.best_of(render_with_serializer, user, repeat)
+        after, output = self.best_of(render_with_rows, user, repeat)
+        self.stdout.write(
+            f'{size:>8} {size / before:>18,.0f} {size / after:>17,.0f} {before / after:>7.1f}x'
+        )
+        if output != expected:
+            self.stdout.write(self.style.WARNING(f'  output differs from TaskSerializer for {size} tasks'))
+
+    def best_of(self, render, user, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = render(user)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
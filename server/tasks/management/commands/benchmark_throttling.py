@@ -0,0 +1,105 @@
+import json
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings
+from rest_framework.request import Request
+
+from accounts.tokens import AccessToken
+from tasks.seeding import seed_users
+from todolist.benchmarks import percentile
+from todolist.throttling import BucketStore, TokenBucketThrottle, buckets
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the cost of the token bucket throttle: a bucket operation in process and '
+        'in the shared cache, a throttle check, and the latency it adds to a request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=100000, help='Bucket operations per measurement.')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per throttled/unthrottled run.')
+        parser.add_argument('--keys', type=int, default=10000, help='Distinct buckets the operations spread over.')
+        parser.add_argument('--cache', default='default', help='CACHES alias for the shared buckets.')
+        parser.add_argument('--output', help='Write JSON results to this file ("-" for stdout).')
+
+    def handle(self, *args, **options):
+        operations = options['operations']
+        keys = [f'bench:user:{n}' for n in range(options['keys'])]
+        # Never runs out: every operation takes the token path.
+        capacity, refill_rate = 10 ** 9, 10 ** 6
+
+        def per_operation_us(store, count):
+            started = time.perf_counter()
+            for n in range(count):
+                store.consume(keys[n % len(keys)], capacity, refill_rate)
+            return round((time.perf_counter() - started) / count * 1e6, 3)
+
+        local = BucketStore()
+        results = {
+            'bucket_us': per_operation_us(local, operations),
+            'shared_bucket_us': per_operation_us(BucketStore(backend=options['cache']), operations // 10),
+            'check_us': self.check_us(operations),
+            **self.request_overhead(options['requests']),
+        }
+        self.stderr.write(f'{"bucket (in process)":<24} {results["bucket_us"]:>9.3f} us')
+        self.stderr.write(f'{"bucket (shared cache)":<24} {results["shared_bucket_us"]:>9.3f} us')
+        self.stderr.write(f'{"throttle check":<24} {results["check_us"]:>9.3f} us')
+        self.stderr.write(
+            f'{"request p50":<24} {results["unthrottled_p50_ms"] * 1000:>9.1f} us unthrottled, '
+            f'{results["throttled_p50_ms"] * 1000:.1f} us throttled'
+        )
+
+        if options['output']:
+            payload = json.dumps({'operations': operations, 'results': results}, indent=2)
+            if options['output'] == '-':
+                sys.stdout.write(payload + '\n')
+            else:
+                with open(options['output'], 'w') as output_file:
+                    output_file.write(payload + '\n')
+
+    def check_us(self, operations):
+        """TokenBucketThrottle.allow_request for an anonymous login request."""
+        request = RequestFactory().post('/api/auth/login/')
+        request.resolver_match = type('Match', (), {'url_name': 'login', 'view_name': 'login'})()
+        request = Request(request)
+        request.user = AnonymousUser()
+        throttles = {**settings.API_THROTTLES, 'RATES': {'login': '1000000000/s'}}
+        with override_settings(API_THROTTLES=throttles):
+            throttle = TokenBucketThrottle()
+            started = time.perf_counter()
+            for _ in range(operations):
+                throttle.allow_request(request, None)
+            elapsed = time.perf_counter() - started
+        buckets.clear()
+        return round(elapsed / operations * 1e6, 3)
+
+    def request_overhead(self, requests):
+        """p50 of a query-free authenticated route with throttling off and on."""
+        user = seed_users(1, prefix='throttling')[0]
+        try:
+            client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+            results = {}
+            for mode, enabled in (('unthrottled', False), ('throttled', True)):
+                throttles = {
+                    **settings.API_THROTTLES, 'ENABLED': enabled,
+                    'DEFAULT_RATES': {'user': '1000000000/s', 'anon': '1000000000/s'},
+                }
+                with override_settings(API_THROTTLES=throttles):
+                    latencies = []
+                    for n in range(requests + 50):
+                        started = time.perf_counter()
+                        response = client.get('/api/auth/profile/')
+                        if n >= 50:
+                            latencies.append((time.perf_counter() - started) * 1000)
+                        assert response.status_code == 200, response.status_code
+                results[f'{mode}_p50_ms'] = round(percentile(latencies, 50), 4)
+        finally:
+            buckets.clear()
+            user.delete()
+        return results
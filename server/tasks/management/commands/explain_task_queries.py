@@ -0,0 +1,102 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from tasks.models import Task, TaskTombstone, UserTaskStats
+from tasks.seeding import seed_tasks, seed_users
+from tasks.services import TaskService
+from tasks.stats import stat_aggregates
+from tasks.sync import after
+
+
+FULL_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on tasks_task(tombstone)?\b'),
+    'sqlite': re.compile(r'\bSCAN tasks_task(tombstone)?\b(?! USING)'),
+}
+
+
+def task_query_shapes(user, page_size=10):
+    """Return the queries TaskViewSet issues, keyed by a descriptive name."""
+    tasks = Task.objects.filter(user=user)
+    middle = tasks.order_by('-created_at', '-id').values('created_at', 'id')[tasks.count() // 2]
+    sample_id = middle['id']
+    changed = tasks.order_by('updated_at', 'id').values('updated_at', 'id')[tasks.count() // 2]
+    return {
+        'list (-created_at)': tasks.order_by('-created_at', '-id')[:page_size + 1],
+        'list deep page (-created_at)': tasks.filter(
+            Q(created_at__lt=middle['created_at'])
+            | Q(created_at=middle['created_at'], id__lt=middle['id']),
+            created_at__lte=middle['created_at'],
+        ).order_by('-created_at', '-id')[:page_size + 1],
+        'list (updated_at)': tasks.order_by('updated_at', 'id')[:page_size + 1],
+        'list (due_date)': tasks.order_by('due_date', 'id')[:page_size + 1],
+        'list (priority)': tasks.order_by('priority', 'id')[:page_size + 1],
+        'list ?status=todo': tasks.filter(status='todo').order_by('-created_at', '-id')[:page_size + 1],
+        'list ?priority=high': tasks.filter(priority='high').order_by('-created_at', '-id')[:page_size + 1],
+        'retrieve': tasks.filter(pk=sample_id),
+        'overdue': TaskService.get_overdue_tasks(tasks),
+        'stats (aggregate)': tasks.values('user').annotate(**stat_aggregates()),
+        'stats (counters)': UserTaskStats.objects.filter(user=user),
+        'changes': after(tasks, 'updated_at', (changed['updated_at'], changed['id']))[:page_size + 1],
+        'changes (tombstones)': after(
+            TaskTombstone.objects.filter(user=user), 'deleted_at', (middle['created_at'], 0)
+        )[:page_size + 1],
+    }
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN (ANALYZE on Postgres) for every TaskViewSet query shape against seeded data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Number of seed users.')
+        parser.add_argument('--tasks-per-user', type=int, default=5000, help='Tasks created per seed user.')
+        parser.add_argument('--keep', action='store_true', help='Commit the seeded rows instead of rolling back.')
+        parser.add_argument(
+            '--fail-on-seq-scan',
+            action='store_true',
+            help='Exit with an error when any query shape scans the whole task table.'
+        )
+
+    def handle(self, *args, **options):
+        full_scans = []
+        try:
+            with transaction.atomic():
+                users = seed_users(options['users'])
+                created = seed_tasks(users, options['tasks_per_user'])
+                self.stdout.write(f'Seeded {created} tasks for {len(users)} users.')
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE tasks_task')
+
+                full_scans = self.explain_all(users[len(users) // 2])
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            pass
+
+        if full_scans:
+            message = 'Full table scans in: ' + ', '.join(full_scans)
+            if options['fail_on_seq_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('Every query shape is index-backed.'))
+
+    def explain_all(self, user):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        explain_options = {'analyze': True} if connection.vendor == 'postgresql' else {}
+        full_scans = []
+        for name, queryset in task_query_shapes(user).items():
+            plan = queryset.explain(**explain_options)
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(plan)
+            self.stdout.write('')
+            if pattern and pattern.search(plan):
+                full_scans.append(name)
+        return full_scans
@@ -0,0 +1,61 @@
+import csv
+import io
+import sys
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.importing import FORMATS, import_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        'Import tasks for a user from a CSV or NDJSON file ("-" for stdin). Invalid rows are '
+        'skipped and reported; valid rows are loaded in chunks (COPY on Postgres).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Email of the user the tasks belong to.')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, help='Rows per transaction (TASK_IMPORT_CHUNK_SIZE).')
+        parser.add_argument('--errors', help='Write the invalid rows report (CSV) here instead of stderr.')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["user"]}.')
+
+        format = options['format'] or Path(options['path']).suffix.lstrip('.').lower()
+        if format not in FORMATS:
+            raise CommandError('Pass --format csv or --format ndjson.')
+
+        if options['path'] == '-':
+            source = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+        else:
+            source = open(options['path'], encoding='utf-8', newline='')
+        report_file = open(options['errors'], 'w', newline='') if options['errors'] else self.stderr
+        report = csv.writer(report_file)
+        report.writerow(['line', 'field', 'error'])
+
+        def on_error(line, errors):
+            for field, messages in errors.items():
+                for message in messages:
+                    report.writerow([line, field, message])
+
+        try:
+            with source:
+                result = import_tasks(
+                    user, source, format, on_error=on_error, chunk_size=options['chunk_size']
+                )
+        finally:
+            if options['errors']:
+                report_file.close()
+
+        rate = result.imported / result.elapsed * 60 if result.elapsed else 0
+        self.stdout.write(
+            f'Imported {result.imported} tasks, skipped {result.failed} invalid rows '
+            f'in {result.elapsed:.1f} s ({rate:,.0f} rows/minute).'
+        )
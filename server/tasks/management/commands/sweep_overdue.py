@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.overdue import sweep_overdue
+
+
+class Command(BaseCommand):
+    help = 'Flag tasks that became overdue and clear stale overdue flags.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows updated per transaction.')
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping until interrupted.')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between sweeps with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            result = sweep_overdue(batch_size=options['batch_size'])
+            self.stdout.write(
+                f'Flagged {result.flagged} and cleared {result.cleared} tasks '
+                f'for {result.users} users in {result.elapsed * 1000:.1f} ms.'
+            )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
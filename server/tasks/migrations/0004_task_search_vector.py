@@ -0,0 +1,56 @@
+from django.db import migrations
+
+
+FORWARD_SQL = [
+    "ALTER TABLE tasks_task ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION tasks_task_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tasks_task_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_search_vector_update()
+    """,
+    """
+    UPDATE tasks_task SET search_vector =
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    """,
+    "CREATE INDEX task_search_vector_idx ON tasks_task USING gin (search_vector)",
+]
+
+REVERSE_SQL = [
+    "DROP INDEX IF EXISTS task_search_vector_idx",
+    "DROP TRIGGER IF EXISTS tasks_task_search_vector_trigger ON tasks_task",
+    "DROP FUNCTION IF EXISTS tasks_task_search_vector_update()",
+    "ALTER TABLE tasks_task DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_on_postgres(statements):
+    """The tsvector column only exists on Postgres; other backends use the
+    in-process index from tasks.search instead."""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgres(FORWARD_SQL), run_on_postgres(REVERSE_SQL)),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_search_vector'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='usertaskstats',
+            name='updated_at',
+        ),
+        migrations.AddField(
+            model_name='usertaskstats',
+            name='changed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Tasks Changed At'),
+        ),
+        migrations.AddField(
+            model_name='usertaskstats',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:47
+
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.utils import timezone
+
+
+def flag_overdue_tasks(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    UserTaskStats = apps.get_model('tasks', 'UserTaskStats')
+    overdue = Task.objects.filter(
+        due_date__lt=timezone.now(),
+        status__in=['todo', 'in_progress']
+    )
+    overdue.update(overdue=True)
+    per_user = overdue.order_by().values('user_id').annotate(count=Count('id'))
+    for row in per_user:
+        UserTaskStats.objects.filter(user_id=row['user_id']).update(
+            overdue=row['count'],
+            version=F('version') + 1
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_usertaskstats_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='overdue',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Overdue'),
+        ),
+        migrations.AddField(
+            model_name='usertaskstats',
+            name='overdue',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('overdue', True)), fields=['user', '-created_at'], name='task_user_overdue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('due_date__isnull', False), ('overdue', False), ('status__in', ['todo', 'in_progress'])), fields=['due_date'], name='task_overdue_pending_idx'),
+        ),
+        migrations.RunPython(flag_overdue_tasks, migrations.RunPython.noop),
+    ]
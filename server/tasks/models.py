@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.conf import settings
 from django.utils import timezone
 from django.core.exceptions import ValidationError
@@ -11,6 +11,8 @@ class Task(models.Model):
         ('in_progress', 'In Progress'),
         ('done', 'Done'),
     ]
+
+    OPEN_STATUSES = ['todo', 'in_progress']
     
     PRIORITY_CHOICES = [
         ('low', 'Low'),
@@ -23,7 +25,10 @@ class Task(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name='tasks',
-        verbose_name='User'
+        verbose_name='User',
+        # Every index in Meta.indexes leads with user, so a separate
+        # single-column index would only slow down writes.
+        db_index=False
     )
     
     # Main fields
@@ -69,21 +74,104 @@ class Task(models.Model):
         verbose_name='Completed At'
     )
     
+    # Materialized overdue state: set on save and flagged in bulk by the
+    # sweeper in tasks.overdue as due dates pass.
+    overdue = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Overdue'
+    )
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Task'
         verbose_name_plural = 'Tasks'
+        indexes = [
+            # List ordering options, each with the id tiebreaker used by
+            # the cursor pagination.
+            models.Index(fields=['user', '-created_at', '-id'], name='task_user_created_idx'),
+            models.Index(fields=['user', '-updated_at', '-id'], name='task_user_updated_idx'),
+            models.Index(fields=['user', 'due_date', 'id'], name='task_user_due_idx'),
+            models.Index(fields=['user', 'priority', 'id'], name='task_user_priority_idx'),
+            # Status/priority filters and the stats aggregation.
+            models.Index(fields=['user', 'status', 'priority'], name='task_user_status_idx'),
+            # Overdue lookups only ever touch open tasks with a due date.
+            models.Index(
+                fields=['user', 'due_date'],
+                condition=models.Q(status__in=['todo', 'in_progress'], due_date__isnull=False),
+                name='task_user_open_due_idx'
+            ),
+            # The sweeper's stale and pending scans.
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(overdue=True),
+                name='task_user_overdue_idx'
+            ),
+            models.Index(
+                fields=['due_date'],
+                condition=models.Q(overdue=False, status__in=['todo', 'in_progress'], due_date__isnull=False),
+                name='task_overdue_pending_idx'
+            ),
+        ]
         
     def __str__(self):
         return f"{self.title} ({self.user.email})"
     
-    def save(self, *args, **kwargs):
-        """Override save to handle completed_at field automatically."""
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored state so signal handlers can compute deltas."""
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        instance._stored_state = (loaded.get('status'), loaded.get('priority'), loaded.get('overdue'))
+        return instance
+    
+    def tracked_state(self):
+        """Return the (status, priority, overdue) values used by the stats counters."""
+        return (self.status, self.priority, self.overdue)
+    
+    def sync_completed_at(self, now=None):
+        """Set or clear completed_at to match the status."""
         if self.status == 'done' and not self.completed_at:
-            self.completed_at = timezone.now()
+            self.completed_at = now or timezone.now()
         elif self.status != 'done':
             self.completed_at = None
-        super().save(*args, **kwargs)
+    
+    def sync_overdue(self, now=None):
+        """Set the materialized overdue flag from the due date and status."""
+        self.overdue = bool(
+            self.due_date
+            and self.status in self.OPEN_STATUSES
+            and self.due_date < (now or timezone.now())
+        )
+    
+    def save(self, *args, **kwargs):
+        """Override save to handle completed_at and overdue automatically."""
+        now = timezone.now()
+        self.sync_completed_at(now)
+        self.sync_overdue(now)
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            if not self._state.adding and self.pk is not None:
+                # The counter deltas start from the row as stored now, locked
+                # until they are applied: the state it was loaded with may
+                # have been changed since by another request or the sweeper.
+                self._stored_state = (
+                    Task.objects.using(using).select_for_update().filter(pk=self.pk)
+                    .values_list('status', 'priority', 'overdue').first()
+                )
+            super().save(*args, **kwargs)
+        self._stored_state = self.tracked_state()
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            # As in save(): the deltas come from the locked row, not from
+            # this instance; None if another request deleted it first.
+            self._stored_state = (
+                Task.objects.using(using).select_for_update().filter(pk=self.pk)
+                .values_list('status', 'priority', 'overdue').first()
+            )
+            return super().delete(*args, **kwargs)
     
     def clean(self):
         """Model validation."""
@@ -108,3 +196,64 @@ class Task(models.Model):
             delta = self.due_date.date() - timezone.now().date()
             return delta.days
         return None
+
+
+class UserTaskStats(models.Model):
+    """Per-user task counters and change version, updated on task writes."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_stats',
+        verbose_name='User'
+    )
+    total = models.IntegerField(default=0)
+    todo = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+    high_priority = models.IntegerField(default=0)
+    overdue = models.IntegerField(default=0)
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Tasks Changed At'
+    )
+
+    class Meta:
+        verbose_name = 'User Task Stats'
+        verbose_name_plural = 'User Task Stats'
+
+    def __str__(self):
+        return f"Task stats for user {self.user_id}"
+
+
+class TaskTombstone(models.Model):
+    """A deleted task, kept so clients syncing with a cursor learn of it."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='task_tombstones',
+        verbose_name='User',
+        db_index=False
+    )
+    task_id = models.BigIntegerField(verbose_name='Task ID')
+    deleted_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Deleted At'
+    )
+
+    class Meta:
+        verbose_name = 'Task Tombstone'
+        verbose_name_plural = 'Task Tombstones'
+        indexes = [
+            # The sync cursor's (deleted_at, id) keyset, per user.
+            models.Index(fields=['user', 'deleted_at', 'id'], name='tombstone_user_deleted_idx'),
+            # Retention pruning.
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted task {self.task_id} of user {self.user_id}"
@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import stats
+from .models import Task
+from .signals import user_tasks_changed
+
+
+logger = logging.getLogger(__name__)
+
+SweepResult = namedtuple('SweepResult', ['flagged', 'cleared', 'users', 'elapsed'])
+
+
+def _apply(queryset, overdue, batch_size, affected):
+    """Set the flag on matching rows in batches; return the row count."""
+    total = 0
+    while True:
+        with transaction.atomic():
+            # Rows locked by a concurrent save are left for the next sweep.
+            rows = list(
+                queryset.select_for_update(skip_locked=True).values_list('id', 'user_id')[:batch_size]
+            )
+            if not rows:
+                return total
+            Task.objects.filter(id__in=[task_id for task_id, _ in rows]).update(overdue=overdue)
+            per_user = Counter(user_id for _, user_id in rows)
+            for user_id, count in per_user.items():
+                deltas = {'overdue': count if overdue else -count} if stats.counters_enabled() else None
+                stats.record_change(user_id, deltas)
+                user_tasks_changed(user_id)
+            affected.update(per_user)
+        total += len(rows)
+
+
+def sweep_overdue(now=None, batch_size=5000):
+    """Flag tasks whose due date has passed and clear stale flags.
+
+    Each batch updates the task rows, the owners' overdue counters and their
+    change versions in one transaction.
+    """
+    now = now or timezone.now()
+    started = time.monotonic()
+    affected = set()
+
+    pending = Task.objects.filter(stats.overdue_filter(now), overdue=False).order_by()
+    stale = Task.objects.filter(overdue=True).exclude(stats.overdue_filter(now)).order_by()
+    flagged = _apply(pending, True, batch_size, affected)
+    cleared = _apply(stale, False, batch_size, affected)
+
+    return SweepResult(flagged, cleared, len(affected), time.monotonic() - started)
+
+
+class OverdueSweeper(threading.Thread):
+    """Daemon thread running sweep_overdue() every ``interval`` seconds."""
+
+    def __init__(self, interval, batch_size=5000):
+        super().__init__(name='overdue-sweeper', daemon=True)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                result = sweep_overdue(batch_size=self.batch_size)
+                logger.info(
+                    'Overdue sweep flagged %d and cleared %d tasks for %d users in %.1f ms',
+                    result.flagged, result.cleared, result.users, result.elapsed * 1000
+                )
+            except Exception:
+                logger.exception('Overdue sweep failed')
+            finally:
+                close_old_connections()
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+
+
+_sweeper = None
+
+
+def start_sweeper():
+    """Start the in-process sweeper if TASK_OVERDUE_SWEEP_INTERVAL is set."""
+    global _sweeper
+    interval = getattr(settings, 'TASK_OVERDUE_SWEEP_INTERVAL', 0)
+    if interval and _sweeper is None:
+        _sweeper = OverdueSweeper(interval)
+        _sweeper.start()
+    return _sweeper
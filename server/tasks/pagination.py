@@ -0,0 +1,215 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def positive_int(value, cutoff=None):
+    """Parse a positive integer query parameter, capped at ``cutoff``.
+
+    Raises ValueError for zero, negative or non-numeric values.
+    """
+    value = int(value)
+    if value <= 0:
+        raise ValueError(value)
+    if cutoff:
+        return min(value, cutoff)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination keyed on the active ordering plus the primary key.
+
+    Each page is fetched with a ``WHERE (ordering..., id) > position`` style
+    filter instead of an ``OFFSET``, so deep pages cost the same as the first.
+    Null values always sort last, in both directions, so nullable ordering
+    fields such as ``due_date`` page consistently across database backends.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = None
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async paginate_queryset() for views using the async ORM."""
+        return self.set_page([item async for item in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """Return the queryset for the requested page plus one look-ahead row."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_keys(queryset)
+        self.fields = [self.get_field(queryset.model, name) for name, _ in self.keys]
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor['r'])
+        if self.cursor is not None:
+            queryset = queryset.filter(self.keyset_filter(self.cursor['p'], self.reverse))
+        return queryset.order_by(*self.get_order_by(self.reverse))[:self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        self.page = results
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = has_more if self.reverse else self.cursor is not None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return positive_int(
+                    request.query_params[self.page_size_query_param], cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_keys(self, queryset):
+        """Return (name, descending) pairs for the ordering, ending with the pk."""
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        keys = []
+        for item in ordering:
+            if not isinstance(item, str):
+                continue
+            name = item.lstrip('-')
+            if name == 'pk':
+                name = 'id'
+            keys.append((name, item.startswith('-')))
+            if name == 'id':
+                # The pk is unique, so nothing after it affects the order.
+                return keys
+        return keys + [('id', keys[0][1] if keys else True)]
+
+    def get_field(self, model, name):
+        try:
+            return model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    def get_order_by(self, reverse):
+        order_by = []
+        for (name, descending), field in zip(self.keys, self.fields):
+            if field is not None and not field.null:
+                order_by.append(F(name).asc() if descending == reverse else F(name).desc())
+            elif reverse:
+                order_by.append(F(name).asc(nulls_first=True) if descending else F(name).desc(nulls_first=True))
+            else:
+                order_by.append(F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True))
+        return order_by
+
+    def keyset_filter(self, position, reverse):
+        """Build the filter selecting rows after (or before) the position."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending), field, value in zip(self.keys, self.fields, position):
+            nullable = field is None or field.null
+            condition |= equal & self.beyond(name, descending, value, reverse, nullable)
+            equal &= Q(**{f'{name}__isnull': True}) if value is None else Q(**{name: value})
+
+        # Redundant range bound on the leading key lets the index scan start
+        # at the cursor instead of filtering from the beginning.
+        name, descending = self.keys[0]
+        value = position[0]
+        field = self.fields[0]
+        if value is not None and field is not None and not field.null:
+            lookup = 'gte' if descending == reverse else 'lte'
+            condition &= Q(**{f'{name}__{lookup}': value})
+        return condition
+
+    def beyond(self, name, descending, value, reverse, nullable):
+        """Rows strictly past the value for a single key, nulls sorting last."""
+        if value is None:
+            return Q(**{f'{name}__isnull': False}) if reverse else Q(pk__in=[])
+        lookup = 'gt' if descending == reverse else 'lt'
+        condition = Q(**{f'{name}__{lookup}': value})
+        if nullable and not reverse:
+            condition |= Q(**{f'{name}__isnull': True})
+        return condition
+
+    def get_position(self, item):
+        if isinstance(item, dict):
+            return [item[name] for name, _ in self.keys]
+        return [getattr(item, name) for name, _ in self.keys]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.get_base_url(), self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        payload = {
+            'o': [('-' if descending else '') + name for name, descending in self.keys],
+            'p': [value.isoformat() if isinstance(value, (date, datetime)) else value for value in position],
+            'r': int(reverse),
+        }
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('ascii')
+        ).decode('ascii')
+        return replace_query_param(self.get_base_url(), self.cursor_query_param, encoded)
+
+    def get_base_url(self):
+        """The URL page links are built from: the request's own."""
+        return self.request.build_absolute_uri()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            ordering = [('-' if descending else '') + name for name, descending in self.keys]
+            if payload['o'] != ordering or len(payload['p']) != len(self.keys):
+                raise ValueError
+            payload['p'] = [
+                value if value is None or field is None else field.to_python(value)
+                for field, value in zip(self.fields, payload['p'])
+            ]
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return payload
+
+
+class TaskCursorPagination(KeysetPagination):
+    max_page_size = 100
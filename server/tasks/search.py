@@ -0,0 +1,202 @@
+"""Ranked ``?search=`` for tasks.
+
+On Postgres, tasks are matched and ranked with full-text search over a
+trigger-maintained column. Elsewhere (SQLite) an in-process inverted index
+scores the matches and SQL orders them by that score. The index lives in
+each process and only sees the writes made there, so the fallback is for
+single-process setups: under several workers it goes stale.
+"""
+import json
+import math
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connections
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .models import Task
+
+
+# Must match the text search configuration used by the trigger created in
+# migration 0004_task_search_vector.
+SEARCH_CONFIG = 'simple'
+
+TITLE_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class PostgresSearchBackend:
+    """Ranked search over the trigger-maintained ``search_vector`` column."""
+
+    def search(self, queryset, text, user_id):
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        vector = RawSQL(
+            f'{Task._meta.db_table}.search_vector', [], output_field=SearchVectorField()
+        )
+        return queryset.alias(search_vector=vector).filter(
+            search_vector=query
+        ).annotate(
+            # ts_rank() returns a real; as a double the rank round-trips
+            # through pagination cursors exactly.
+            search_rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
+
+
+class InvertedIndex:
+    """In-process inverted index used when the database is not Postgres.
+
+    Postings are partitioned per user and built lazily on a user's first
+    search; task signals keep built partitions current.
+    """
+
+    def __init__(self, max_users=1000):
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._partitions = OrderedDict()
+        self._writes = 0
+
+    def _build(self, user_id):
+        postings = defaultdict(dict)
+        documents = {}
+        tasks = Task.objects.filter(user_id=user_id).values_list('id', 'title', 'description')
+        for task_id, title, description in tasks.iterator():
+            self._add(postings, documents, task_id, title, description)
+        return postings, documents
+
+    def _add(self, postings, documents, task_id, title, description):
+        weights = Counter()
+        for token in tokenize(title):
+            weights[token] += TITLE_WEIGHT
+        for token in tokenize(description):
+            weights[token] += DESCRIPTION_WEIGHT
+        for token, weight in weights.items():
+            postings[token][task_id] = weight
+        documents[task_id] = set(weights)
+
+    def _remove(self, postings, documents, task_id):
+        for token in documents.pop(task_id, ()):
+            postings[token].pop(task_id, None)
+            if not postings[token]:
+                del postings[token]
+
+    def _partition(self, user_id):
+        with self._lock:
+            partition = self._partitions.get(user_id)
+            if partition is not None:
+                self._partitions.move_to_end(user_id)
+                return partition
+            writes = self._writes
+
+        partition = self._build(user_id)
+        with self._lock:
+            if self._writes != writes:
+                # A task changed while building; the snapshot may miss it,
+                # so serve it once without caching.
+                return partition
+            partition = self._partitions.setdefault(user_id, partition)
+            while len(self._partitions) > self.max_users:
+                self._partitions.popitem(last=False)
+        return partition
+
+    def search(self, user_id, text):
+        """Return {task_id: score} for tasks containing every query term."""
+        terms = set(tokenize(text))
+        if not terms:
+            return {}
+        postings, documents = self._partition(user_id)
+        with self._lock:
+            matches = [postings.get(term, {}) for term in terms]
+            if not all(matches):
+                return {}
+            task_ids = set.intersection(*(set(match) for match in matches))
+            total = len(documents)
+            scores = {}
+            for task_id in task_ids:
+                scores[task_id] = sum(
+                    match[task_id] * math.log(1 + total / len(match)) for match in matches
+                )
+        return scores
+
+    def update(self, task):
+        with self._lock:
+            self._writes += 1
+            partition = self._partitions.get(task.user_id)
+            if partition is not None:
+                self._remove(*partition, task.pk)
+                self._add(*partition, task.pk, task.title, task.description)
+
+    def remove(self, task):
+        with self._lock:
+            self._writes += 1
+            partition = self._partitions.get(task.user_id)
+            if partition is not None:
+                self._remove(*partition, task.pk)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._partitions.pop(user_id, None)
+
+
+class InvertedIndexSearchBackend:
+    """Ranks every match of the index in SQL.
+
+    The scores are sent as a single JSON parameter read with SQLite's JSON
+    functions, so the query size doesn't grow with the number of matches.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def search(self, queryset, text, user_id):
+        scores = self.index.search(user_id, text)
+        if not scores:
+            return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+        document = json.dumps({str(task_id): score for task_id, score in scores.items()})
+        table = Task._meta.db_table
+        return queryset.filter(
+            id__in=RawSQL('SELECT CAST(key AS INTEGER) FROM json_each(%s)', [document])
+        ).annotate(
+            search_rank=RawSQL(
+                f"""json_extract(%s, '$."' || {table}.id || '"')""", [document], output_field=FloatField()
+            )
+        )
+
+
+inverted_index = InvertedIndex(max_users=getattr(settings, 'TASK_SEARCH_INDEX_MAX_USERS', 1000))
+
+
+def get_search_backend(using='default'):
+    if connections[using].vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return InvertedIndexSearchBackend(inverted_index)
+
+
+class TaskSearchFilter(filters.SearchFilter):
+    """Full-text ``?search=`` filter returning ranked results.
+
+    Runs after OrderingFilter: results are ordered by rank unless the client
+    asked for an explicit ``?ordering=``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = ' '.join(self.get_search_terms(request))
+        if not text:
+            return queryset
+
+        queryset = get_search_backend(queryset.db).search(queryset, text, request.user.pk)
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank', '-id')
+        return queryset
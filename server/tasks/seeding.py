@@ -0,0 +1,85 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from .models import Task
+
+
+SEED_EMAIL_DOMAIN = 'seed.example.com'
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let bulk inserts set created_at/updated_at instead of the auto values."""
+    fields = [Task._meta.get_field('created_at'), Task._meta.get_field('updated_at')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def seed_users(count, password=None, prefix='seed'):
+    """Create (or reuse) ``count`` seed users and return them."""
+    User = get_user_model()
+    emails = [f'{prefix}-{n}@{SEED_EMAIL_DOMAIN}' for n in range(count)]
+    existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+    encoded = make_password(password)
+    User.objects.bulk_create([
+        User(email=email, first_name='Seed', last_name=str(n), password=encoded)
+        for n, email in enumerate(emails) if email not in existing
+    ])
+    return list(User.objects.filter(email__in=emails).order_by('id'))
+
+
+def build_tasks(user, count, rng, now=None):
+    """Yield unsaved tasks with a realistic spread of states and dates."""
+    now = now or timezone.now()
+    statuses = ['todo', 'in_progress', 'done']
+    priorities = ['low', 'medium', 'high']
+    for n in range(count):
+        created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+        status = rng.choices(statuses, weights=[5, 2, 3])[0]
+        due_date = None
+        if rng.random() < 0.6:
+            due_date = created_at + timedelta(days=rng.randint(1, 60))
+        task = Task(
+            user=user,
+            title=f'Seed task {n}',
+            description=rng.choice(['', 'Follow up with the team', 'Review the draft and send notes']),
+            status=status,
+            priority=rng.choices(priorities, weights=[3, 5, 2])[0],
+            created_at=created_at,
+            updated_at=created_at + timedelta(minutes=rng.randint(0, 600)),
+            due_date=due_date,
+            completed_at=created_at + timedelta(days=1) if status == 'done' else None,
+        )
+        task.sync_overdue(now)
+        yield task
+
+
+def seed_tasks(users, tasks_per_user, batch_size=5000, seed=0):
+    """Bulk insert ``tasks_per_user`` tasks for each user; return the row count."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    created = 0
+    with explicit_timestamps():
+        for user in users:
+            batch = []
+            for task in build_tasks(user, tasks_per_user, rng, now):
+                batch.append(task)
+                if len(batch) >= batch_size:
+                    Task.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            if batch:
+                Task.objects.bulk_create(batch)
+                created += len(batch)
+    return created
@@ -1,8 +1,15 @@
-from rest_framework import serializers
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from todolist.instrumentation import TimedSerializerMixin, timed_serialization
 from .models import Task
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class TaskSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Main serializer for Task model with read-only computed fields."""
     user = serializers.StringRelatedField(read_only=True)
     is_overdue = serializers.ReadOnlyField()
@@ -16,6 +23,74 @@ class TaskSerializer(serializers.ModelSerializer):
             'is_overdue', 'days_until_due'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at', 'completed_at']
+        list_serializer_class = TimedListSerializer
+
+
+def datetime_formatter():
+    """Return a function rendering datetimes exactly like serializers.DateTimeField."""
+    field = serializers.DateTimeField()
+    output_format = api_settings.DATETIME_FORMAT
+    tz = field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or tz is None:
+        return field.to_representation
+
+    def format_datetime(value):
+        if value is None:
+            return None
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return format_datetime
+
+
+class TaskRowSerializer:
+    """Read-only fast path producing the same output as TaskSerializer.
+
+    Works on ``values()`` rows of a single user's tasks: the owner is
+    rendered once and the time-derived fields share one ``now`` per
+    response, skipping the per-field serializer machinery.
+    """
+    columns = [
+        'id', 'title', 'description', 'status', 'priority',
+        'created_at', 'updated_at', 'due_date', 'completed_at'
+    ]
+
+    def __init__(self, instance, user, many=False, now=None):
+        self.instance = instance
+        self.many = many
+        self.user = str(user)
+        self.now = now or timezone.now()
+        self.today = self.now.date()
+        self.format_datetime = datetime_formatter()
+
+    @classmethod
+    def values(cls, queryset):
+        """Select the needed columns, keeping annotations used for ordering."""
+        return queryset.values(*cls.columns, *queryset.query.annotation_select)
+
+    def to_representation(self, row):
+        format_datetime = self.format_datetime
+        due_date = row['due_date']
+        return {
+            'id': row['id'],
+            'user': self.user,
+            'title': row['title'],
+            'description': row['description'],
+            'status': row['status'],
+            'priority': row['priority'],
+            'created_at': format_datetime(row['created_at']),
+            'updated_at': format_datetime(row['updated_at']),
+            'due_date': format_datetime(due_date),
+            'completed_at': format_datetime(row['completed_at']),
+            'is_overdue': bool(due_date and row['status'] != 'done' and self.now > due_date),
+            'days_until_due': (due_date.date() - self.today).days if due_date else None,
+        }
+
+    @property
+    def data(self):
+        with timed_serialization():
+            if self.many:
+                return [self.to_representation(row) for row in self.instance]
+            return self.to_representation(self.instance)
 
 
 class TaskCreateSerializer(serializers.ModelSerializer):
@@ -39,7 +114,7 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
             
-        fields = ['title', 'description', 'priority', 'due_date', 'completed'] 
+        fields = ['title', 'description', 'priority', 'due_date', 'status']
         
     def validate_title(self, value):
         if not value.strip():
@@ -47,6 +122,30 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
         return value
 
 
+class TaskBulkUpdateListSerializer(serializers.ListSerializer):
+
+    def validate(self, attrs):
+        ids = [item.get('id') for item in attrs]
+        if None in ids:
+            raise serializers.ValidationError("Every task must include its id.")
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError("Task ids must be unique.")
+        return attrs
+
+
+class TaskBulkUpdateSerializer(TaskUpdateSerializer):
+    """Partial update of one task inside a bulk request, identified by id."""
+    id = serializers.IntegerField()
+
+    class Meta(TaskUpdateSerializer.Meta):
+        fields = ['id', 'title', 'description', 'status', 'priority', 'due_date']
+        list_serializer_class = TaskBulkUpdateListSerializer
+
+
+class TaskBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+
 class TaskStatusUpdateSerializer(serializers.ModelSerializer):
 
     
@@ -1,20 +1,100 @@
+from django.db import transaction
 from django.utils import timezone
 
+from . import stats, sync
+from .models import Task
+from .signals import bulk_writes, tasks_bulk_changed
+
+
 class TaskService:
     @staticmethod
-    def get_overdue_tasks(queryset):
-        return queryset.filter(
-            due_date__lt=timezone.now(),
-            status__in=['todo', 'in_progress']
-        )
+    def get_overdue_tasks(queryset, now=None):
+        # Matches is_overdue on task rows; the materialized flag, which
+        # feeds the counters, waits for the next sweep.
+        return queryset.filter(stats.overdue_filter(now))
 
     @staticmethod
     def get_stats(queryset):
-        return {
-            'total': queryset.count(),
-            'todo': queryset.filter(status='todo').count(),
-            'in_progress': queryset.filter(status='in_progress').count(),
-            'done': queryset.filter(status='done').count(),
-            'high_priority': queryset.filter(priority='high').count(),
-            'overdue': TaskService.get_overdue_tasks(queryset).count()
-        } 
\ No newline at end of file
+        return stats.aggregate_stats(queryset)
+
+    @staticmethod
+    def get_user_stats(user, row=None):
+        return stats.get_user_stats(user, row=row)
+
+    @staticmethod
+    def bulk_create(user, items, batch_size=1000):
+        """Insert validated task data for a user in one transaction."""
+        now = timezone.now()
+        tasks = []
+        for item in items:
+            task = Task(user=user, **item)
+            task.sync_completed_at(now)
+            task.sync_overdue(now)
+            tasks.append(task)
+
+        with transaction.atomic():
+            tasks = Task.objects.bulk_create(tasks, batch_size=batch_size)
+            tasks_bulk_changed.send(
+                sender=Task, user_id=user.pk, action='created',
+                task_ids=[task.pk for task in tasks], deltas=stats.creation_deltas(tasks)
+            )
+        return tasks
+
+    @staticmethod
+    def bulk_update(user, items, batch_size=1000):
+        """Apply validated partial updates, each carrying the task ``id``.
+
+        Returns the updated tasks, or None if any id does not belong to the
+        user.
+        """
+        ids = [item['id'] for item in items]
+        now = timezone.now()
+        with transaction.atomic():
+            tasks = Task.objects.select_for_update().filter(user=user, id__in=ids).in_bulk()
+            if len(tasks) != len(set(ids)):
+                return None
+
+            fields = {'completed_at', 'overdue', 'updated_at'}
+            for item in items:
+                task = tasks[item['id']]
+                for field, value in item.items():
+                    if field != 'id':
+                        setattr(task, field, value)
+                        fields.add(field)
+                task.sync_completed_at(now)
+                task.sync_overdue(now)
+                task.updated_at = now
+                task.user = user
+
+            Task.objects.bulk_update(tasks.values(), sorted(fields), batch_size=batch_size)
+            tasks_bulk_changed.send(
+                sender=Task, user_id=user.pk, action='updated', task_ids=ids,
+                deltas=stats.update_deltas(tasks.values())
+            )
+        return [tasks[task_id] for task_id in dict.fromkeys(ids)]
+
+    @staticmethod
+    def delete(task):
+        """Delete a task, logging it for delta sync."""
+        with transaction.atomic():
+            sync.record_deletions(task.user_id, [task.pk])
+            task.delete()
+
+    @staticmethod
+    def bulk_delete(user, ids):
+        """Delete the user's tasks with the given ids; return the count."""
+        with transaction.atomic(), bulk_writes():
+            # Only the user's existing tasks: other ids are neither deleted
+            # nor reported as such.
+            rows = list(
+                Task.objects.select_for_update().filter(user=user, id__in=ids).order_by('id')
+                .values_list('id', 'status', 'priority', 'overdue')
+            )
+            task_ids = [task_id for task_id, *_ in rows]
+            sync.record_deletions(user.pk, task_ids)
+            deleted, _ = Task.objects.filter(id__in=task_ids).delete()
+            tasks_bulk_changed.send(
+                sender=Task, user_id=user.pk, action='deleted', task_ids=task_ids,
+                deltas=stats.deletion_deltas(tuple(state) for _, *state in rows)
+            )
+        return deleted
@@ -0,0 +1,78 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from todolist.routers import pin_user
+from . import events, stats
+from .cache import task_cache
+from .models import Task
+from .search import inverted_index
+
+
+# Sent once per bulk write with ``user_id``, ``action`` ('created',
+# 'updated' or 'deleted'), ``task_ids`` (None when unknown) and optionally
+# ``deltas``, the stats counter changes, which spare a counter rebuild.
+tasks_bulk_changed = Signal()
+
+_state = threading.local()
+
+
+@contextmanager
+def bulk_writes():
+    """Skip the per-task handlers; the caller sends tasks_bulk_changed."""
+    previous = getattr(_state, 'bulk', False)
+    _state.bulk = True
+    try:
+        yield
+    finally:
+        _state.bulk = previous
+
+
+def in_bulk_write():
+    return getattr(_state, 'bulk', False)
+
+
+def user_tasks_changed(user_id):
+    """Drop the user's cached task reads and keep their reads on the primary."""
+    task_cache.invalidate_on_write(user_id)
+    pin_user(user_id)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or in_bulk_write():
+        return
+    stats.record_save(instance, created)
+    inverted_index.update(instance)
+    previous_status = getattr(instance, '_stored_state', (None,))[0]
+    events.task_saved(instance, created, previous_status)
+    user_tasks_changed(instance.user_id)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    if in_bulk_write():
+        return
+    stats.record_delete(instance)
+    inverted_index.remove(instance)
+    events.task_deleted(instance)
+    user_tasks_changed(instance.user_id)
+
+
+@receiver(tasks_bulk_changed)
+def tasks_changed_in_bulk(sender, user_id, action, task_ids=None, deltas=None, **kwargs):
+    stats.record_bulk_change(user_id, deltas)
+    inverted_index.invalidate(user_id)
+    events.tasks_changed_in_bulk(user_id, action, task_ids)
+    user_tasks_changed(user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    # Entries left behind by an earlier user with the same id (a database
+    # reset, or tests rolling back) must not be served to this one.
+    if created and not raw:
+        task_cache.invalidate_on_write(instance.pk)
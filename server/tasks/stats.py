@@ -0,0 +1,186 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Task, UserTaskStats
+
+
+COUNTER_FIELDS = ['total', 'todo', 'in_progress', 'done', 'high_priority', 'overdue']
+
+BUCKETS = {
+    'todo': lambda status, priority, overdue: status == 'todo',
+    'in_progress': lambda status, priority, overdue: status == 'in_progress',
+    'done': lambda status, priority, overdue: status == 'done',
+    'high_priority': lambda status, priority, overdue: priority == 'high',
+    'overdue': lambda status, priority, overdue: overdue,
+}
+
+
+def counters_enabled():
+    return getattr(settings, 'TASK_STATS_COUNTERS', False)
+
+
+def overdue_filter(now=None):
+    """Q object matching open tasks whose due date has passed."""
+    return Q(
+        due_date__lt=now or timezone.now(),
+        status__in=Task.OPEN_STATUSES
+    )
+
+
+def stat_aggregates():
+    """Conditional aggregates for every stats bucket."""
+    return {
+        'total': Count('id'),
+        'todo': Count('id', filter=Q(status='todo')),
+        'in_progress': Count('id', filter=Q(status='in_progress')),
+        'done': Count('id', filter=Q(status='done')),
+        'high_priority': Count('id', filter=Q(priority='high')),
+        'overdue': Count('id', filter=Q(overdue=True)),
+    }
+
+
+def aggregate_stats(queryset):
+    """Compute every stats bucket in a single conditional-aggregation query."""
+    return queryset.aggregate(**stat_aggregates())
+
+
+def rebuild_counters(user_id):
+    """Recompute the stored counters for a user from their task rows."""
+    counters = aggregate_stats(Task.objects.filter(user_id=user_id))
+    now = timezone.now()
+    updated = UserTaskStats.objects.filter(user_id=user_id).update(
+        version=F('version') + 1, changed_at=now, **counters
+    )
+    if not updated:
+        UserTaskStats.objects.bulk_create(
+            # Version 1: "no row" reads as version 0.
+            [UserTaskStats(user_id=user_id, version=1, changed_at=now, **counters)],
+            ignore_conflicts=True,
+        )
+    return counters
+
+
+def get_user_row(user_id):
+    """Return the user's stored counters, version and changed_at, or None."""
+    return UserTaskStats.objects.filter(user_id=user_id).values(
+        *COUNTER_FIELDS, 'version', 'changed_at'
+    ).first()
+
+
+def get_user_stats(user, row=None):
+    """Return the stats for a user, reading the stored counters when enabled.
+
+    ``row`` may carry an already fetched result of get_user_row().
+    """
+    tasks = Task.objects.filter(user=user)
+    if not counters_enabled():
+        return aggregate_stats(tasks)
+
+    if row is None:
+        row = get_user_row(user.pk)
+    if row is None:
+        return rebuild_counters(user.pk)
+    return {field: row[field] for field in COUNTER_FIELDS}
+
+
+async def aget_user_stats(user):
+    """Async get_user_stats() using the async ORM."""
+    if not counters_enabled():
+        return await Task.objects.filter(user=user).aaggregate(**stat_aggregates())
+
+    row = await UserTaskStats.objects.filter(user_id=user.pk).values(*COUNTER_FIELDS).afirst()
+    if row is None:
+        return await sync_to_async(rebuild_counters)(user.pk)
+    return row
+
+
+def counter_deltas(old_state, new_state):
+    """Return the counter changes for a task moving from old_state to new_state.
+
+    Each state is a ``(status, priority, overdue)`` tuple, or None when the task does
+    not exist on that side of the change.
+    """
+    deltas = {}
+    if old_state is None:
+        deltas['total'] = 1
+    elif new_state is None:
+        deltas['total'] = -1
+
+    for field, matches in BUCKETS.items():
+        delta = int(new_state is not None and matches(*new_state))
+        delta -= int(old_state is not None and matches(*old_state))
+        if delta:
+            deltas[field] = delta
+    return deltas
+
+
+def record_change(user_id, deltas=None):
+    """Bump the user's change version, applying any counter deltas in the
+    same UPDATE. Returns False if the user has no stats row yet."""
+    updates = {'version': F('version') + 1, 'changed_at': timezone.now()}
+    for field, delta in (deltas or {}).items():
+        updates[field] = F(field) + delta
+    return UserTaskStats.objects.filter(user_id=user_id).update(**updates) > 0
+
+
+def record_save(task, created):
+    if not counters_enabled():
+        if not record_change(task.user_id):
+            rebuild_counters(task.user_id)
+        return
+
+    old_state = None if created else getattr(task, '_stored_state', None)
+    if not created and (old_state is None or None in old_state):
+        # The previous state is unknown, so a delta cannot be computed.
+        rebuild_counters(task.user_id)
+        return
+    if not record_change(task.user_id, counter_deltas(old_state, task.tracked_state())):
+        rebuild_counters(task.user_id)
+
+
+def record_delete(task):
+    # The stored state: Task.delete() reads it under lock, and deletes
+    # through querysets load it. None when the row was already gone.
+    state = getattr(task, '_stored_state', None)
+    deltas = counter_deltas(state, None) if counters_enabled() and state is not None else None
+    # No rebuild on a missing row: it may be going away with the user.
+    record_change(task.user_id, deltas)
+
+
+def record_bulk_change(user_id, deltas=None):
+    """Update the counters after a bulk write, from ``deltas`` when known."""
+    if counters_enabled() and deltas is not None:
+        if not record_change(user_id, deltas):
+            rebuild_counters(user_id)
+    elif counters_enabled() or not record_change(user_id):
+        rebuild_counters(user_id)
+
+
+def creation_deltas(tasks):
+    """Sum the counter changes for inserting the given tasks."""
+    totals = {}
+    for task in tasks:
+        for field, delta in counter_deltas(None, task.tracked_state()).items():
+            totals[field] = totals.get(field, 0) + delta
+    return totals
+
+
+def update_deltas(tasks):
+    """Sum the counter changes for saving tasks loaded (and locked) from the
+    database, from their stored state to their current one."""
+    totals = {}
+    for task in tasks:
+        for field, delta in counter_deltas(task._stored_state, task.tracked_state()).items():
+            totals[field] = totals.get(field, 0) + delta
+    return totals
+
+
+def deletion_deltas(states):
+    """Sum the counter changes for deleting tasks in the given tracked states."""
+    totals = {}
+    for state in states:
+        for field, delta in counter_deltas(state, None).items():
+            totals[field] = totals.get(field, 0) + delta
+    return totals
@@ -0,0 +1,139 @@
+"""Delta sync: tasks changed and deleted since a client's cursor.
+
+A cursor holds two keyset positions, ``(updated_at, id)`` in the user's
+tasks and ``(deleted_at, id)`` in their tombstones, so each sync reads only
+the rows written since the previous one, as range scans of the
+``(user, updated_at, id)`` and ``(user, deleted_at, id)`` indexes.
+"""
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+
+from .models import Task, TaskTombstone
+from .serializers import TaskRowSerializer
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'The sync cursor is older than the deletion log; fetch the full task list again.'
+    default_code = 'cursor_expired'
+
+
+def get_settings():
+    return getattr(settings, 'TASK_SYNC', {})
+
+
+def encode_cursor(changed, deleted):
+    payload = {'u': [changed[0].isoformat(), changed[1]], 'd': [deleted[0].isoformat(), deleted[1]]}
+    return base64.urlsafe_b64encode(
+        json.dumps(payload, separators=(',', ':')).encode('ascii')
+    ).decode('ascii')
+
+
+def decode_cursor(encoded):
+    """Return the (changed, deleted) positions stored in a cursor."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        positions = []
+        for key in ('u', 'd'):
+            moment, pk = payload[key]
+            moment = parse_datetime(moment)
+            if moment is None or timezone.is_naive(moment) or not isinstance(pk, int):
+                raise ValueError
+            positions.append((moment, pk))
+    except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error):
+        raise NotFound('Invalid cursor')
+    return tuple(positions)
+
+
+def after(queryset, field, position):
+    """Rows ordered by (field, id) strictly past the position, if any."""
+    if position is not None:
+        moment, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'id__gt': pk}),
+            **{f'{field}__gte': moment}
+        )
+    return queryset.order_by(field, 'id')
+
+
+def settled(position, last, horizon):
+    """The cursor position for an exhausted stream.
+
+    Rows written in the last few seconds may still be followed by commits
+    carrying an earlier timestamp, so the cursor never passes ``horizon``:
+    those rows are sent again on the next sync rather than missed.
+    """
+    if last is not None and last[0] < horizon:
+        return last
+    return max(position, (horizon, 0)) if position else (horizon, 0)
+
+
+def get_changes(user, cursor=None, page_size=None, now=None):
+    """Return the user's tasks and deleted task ids changed since the cursor.
+
+    The result has ``changed`` (values() rows for TaskRowSerializer),
+    ``deleted`` (task ids), ``cursor`` for the next call and ``has_more``.
+    Without a cursor every task is returned and older deletions skipped.
+    """
+    options = get_settings()
+    now = now or timezone.now()
+    max_page_size = options.get('PAGE_SIZE', 500)
+    page_size = min(page_size or max_page_size, max_page_size)
+    horizon = now - timedelta(seconds=options.get('OVERLAP_SECONDS', 5))
+
+    if cursor is None:
+        changed_position, deleted_position = None, (horizon, 0)
+    else:
+        changed_position, deleted_position = decode_cursor(cursor)
+        retention = timedelta(days=options.get('TOMBSTONE_RETENTION_DAYS', 30))
+        if deleted_position[0] < now - retention:
+            raise CursorExpired()
+
+    changed = list(TaskRowSerializer.values(
+        after(Task.objects.filter(user=user), 'updated_at', changed_position)
+    )[:page_size + 1])
+    deleted = list(
+        after(TaskTombstone.objects.filter(user=user), 'deleted_at', deleted_position)
+        .values_list('deleted_at', 'id', 'task_id')[:page_size + 1]
+    )
+    more_changed = len(changed) > page_size
+    more_deleted = len(deleted) > page_size
+    changed, deleted = changed[:page_size], deleted[:page_size]
+
+    last_changed = (changed[-1]['updated_at'], changed[-1]['id']) if changed else None
+    last_deleted = deleted[-1][:2] if deleted else None
+    next_cursor = encode_cursor(
+        last_changed if more_changed else settled(changed_position, last_changed, horizon),
+        last_deleted if more_deleted else settled(deleted_position, last_deleted, horizon),
+    )
+    return {
+        'changed': changed,
+        'deleted': [task_id for _, _, task_id in deleted],
+        'cursor': next_cursor,
+        'has_more': more_changed or more_deleted,
+    }
+
+
+def record_deletions(user_id, task_ids, now=None):
+    """Log deleted task ids for the owner's next sync."""
+    now = now or timezone.now()
+    TaskTombstone.objects.bulk_create(
+        [TaskTombstone(user_id=user_id, task_id=task_id, deleted_at=now) for task_id in task_ids]
+    )
+
+
+def prune_tombstones(now=None):
+    """Delete tombstones past the retention period; return the count."""
+    now = now or timezone.now()
+    retention = timedelta(days=get_settings().get('TOMBSTONE_RETENTION_DAYS', 30))
+    deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=now - retention).delete()
+    return deleted
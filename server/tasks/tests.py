@@ -1,3 +1,1201 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from functools import partial
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from accounts.authentication import CachedJWTAuthentication
+from accounts.hashing import password_pool
+from accounts.models import CustomUser
+from accounts.tokens import AccessToken
+from todolist.cache import LocMemCache
+from todolist.db.postgresql.base import pool_metrics
+from todolist.benchmarks import BenchmarkContext, check_budgets, run_benchmarks
+from todolist.instrumentation import registry
+from todolist.routers import ReplicaRouter, ReplicaRoutingMiddleware, pin_key
+from todolist.throttling import BucketStore, buckets, take
+from . import events, stats
+from .cache import TaskCache, task_cache
+from .events import EventHub, get_event_hub
+from .management.commands.explain_task_queries import FULL_SCAN_PATTERNS
+from .models import Task, TaskTombstone, UserTaskStats
+from .overdue import sweep_overdue
+from .search import inverted_index
+from .serializers import TaskRowSerializer, TaskSerializer
+from .stats import aggregate_stats
+from .sync import prune_tombstones
+from .views import TaskViewSet
+
+
+def create_user(email='user@example.com'):
+    return CustomUser.objects.create_user(email, 'Test', 'User', 'password123')
+
+
+class TaskStatsTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertCountersMatch(self):
+        counters = UserTaskStats.objects.filter(user=self.user).values(
+            'total', 'todo', 'in_progress', 'done', 'high_priority', 'overdue'
+        ).get()
+        self.assertEqual(counters, aggregate_stats(Task.objects.filter(user=self.user)))
+
+    def test_counters_follow_task_writes(self):
+        task = Task.objects.create(user=self.user, title='First', priority='high')
+        Task.objects.create(user=self.user, title='Second')
+        self.assertCountersMatch()
+
+        task = Task.objects.get(pk=task.pk)
+        task.status = 'done'
+        task.priority = 'low'
+        task.save()
+        self.assertCountersMatch()
+
+        task.delete()
+        self.assertCountersMatch()
+
+    def test_stale_instances_do_not_skew_counters(self):
+        task = Task.objects.create(user=self.user, title='Late', due_date=timezone.now() - timedelta(days=1))
+        Task.objects.filter(pk=task.pk).update(overdue=False)
+        stats.rebuild_counters(self.user.pk)
+        first, second = Task.objects.get(pk=task.pk), Task.objects.get(pk=task.pk)
+
+        # The sweeper flags the task after both requests loaded it.
+        sweep_overdue()
+        first.title = 'Renamed'
+        first.save()
+        self.assertCountersMatch()
+
+        second.status = 'done'
+        second.save()
+        self.assertCountersMatch()
+        first.status = 'in_progress'
+        first.save()
+        self.assertCountersMatch()
+
+        # Deletes subtract the stored state, and only once.
+        first.status = 'done'
+        first.save()
+        second.delete()
+        self.assertCountersMatch()
+        first.delete()
+        self.assertCountersMatch()
+
+    def test_stats_endpoint(self):
+        Task.objects.create(
+            user=self.user, title='Late', due_date=timezone.now() - timedelta(days=1)
+        )
+        Task.objects.create(user=self.user, title='Done', status='done')
+        other = create_user('other@example.com')
+        Task.objects.create(user=other, title='Not mine')
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/tasks/stats/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'total': 2, 'todo': 1, 'in_progress': 0, 'done': 1,
+            'high_priority': 0, 'overdue': 1,
+        })
+
+    def test_sweeper_flags_newly_overdue_tasks(self):
+        due = timezone.now() + timedelta(hours=1)
+        task = Task.objects.create(user=self.user, title='Soon', due_date=due)
+        Task.objects.create(user=self.user, title='Later', due_date=due + timedelta(days=2))
+        self.assertEqual(self.client.get('/api/tasks/overdue/').json(), [])
+
+        later = due + timedelta(minutes=1)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            # Listed as soon as it falls due; the counter waits for the sweep.
+            self.assertEqual([t['id'] for t in self.client.get('/api/tasks/overdue/').json()], [task.id])
+            self.assertEqual(self.client.get('/api/tasks/stats/').json()['overdue'], 0)
+
+            result = sweep_overdue(now=later)
+            self.assertEqual((result.flagged, result.cleared, result.users), (1, 0, 1))
+            self.assertEqual([t['id'] for t in self.client.get('/api/tasks/overdue/').json()], [task.id])
+            self.assertEqual(self.client.get('/api/tasks/stats/').json()['overdue'], 1)
+        self.assertCountersMatch()
+
+        self.client.patch(f'/api/tasks/{task.id}/update_status/', {'status': 'done'}, format='json')
+        self.assertEqual(self.client.get('/api/tasks/stats/').json()['overdue'], 0)
+        self.assertCountersMatch()
+
+
+class TaskPaginationTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        now = timezone.now()
+        priorities = ['low', 'medium', 'high']
+        for i in range(23):
+            Task.objects.create(
+                user=self.user,
+                title=f'Task {i}',
+                priority=priorities[i % 3],
+                due_date=now + timedelta(days=i % 4) if i % 5 else None,
+            )
+        # Force ties on created_at to exercise the id tiebreaker.
+        Task.objects.filter(id__lte=Task.objects.order_by('id')[5].id).update(created_at=now)
+
+    def walk(self, url):
+        ids = []
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            pages.append(data)
+            ids.extend(task['id'] for task in data['results'])
+            url = data['next']
+        return ids, pages
+
+    def test_every_ordering_pages_through_all_tasks_once(self):
+        for ordering in ['', '-created_at', 'updated_at', 'due_date', '-due_date', 'priority', '-priority']:
+            with self.subTest(ordering=ordering):
+                ids, pages = self.walk(f'/api/tasks/?page_size=5&ordering={ordering}')
+                self.assertEqual(len(ids), 23)
+                self.assertEqual(len(set(ids)), 23)
+                self.assertEqual(len(pages), 5)
+
+    def test_previous_link_returns_the_prior_page(self):
+        ids, pages = self.walk('/api/tasks/?page_size=5&ordering=due_date')
+        response = self.client.get(pages[2]['previous'])
+        self.assertEqual(response.json()['results'], pages[1]['results'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/tasks/?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+
+class TaskRowSerializerTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        now = timezone.now()
+        Task.objects.create(user=self.user, title='Plain')
+        Task.objects.create(user=self.user, title='Late', description='Überfällig', due_date=now - timedelta(days=2))
+        Task.objects.create(user=self.user, title='Soon', priority='high', due_date=now + timedelta(days=3))
+        Task.objects.create(user=self.user, title='Done', status='done', due_date=now - timedelta(hours=1))
+
+    def test_output_matches_task_serializer(self):
+        now = timezone.now()
+        tasks = Task.objects.filter(user=self.user)
+        rows = TaskRowSerializer(TaskRowSerializer.values(tasks), user=self.user, many=True, now=now)
+        with mock.patch('tasks.models.timezone.now', return_value=now):
+            expected = JSONRenderer().render(TaskSerializer(tasks, many=True).data)
+        self.assertEqual(JSONRenderer().render(rows.data), expected)
+
+    def test_read_endpoints_skip_per_task_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/tasks/?page_size=10')
+        self.assertEqual(len(response.json()['results']), 4)
+
+        task = Task.objects.get(title='Late')
+        response = self.client.get(f'/api/tasks/{task.id}/')
+        self.assertEqual(response.json()['user'], str(self.user))
+        self.assertTrue(response.json()['is_overdue'])
+        self.assertEqual(self.client.get('/api/tasks/0/').status_code, 404)
+
+
+class TaskSearchTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, text, **params):
+        response = self.client.get('/api/tasks/', {'search': text, **params})
+        self.assertEqual(response.status_code, 200)
+        return [task['title'] for task in response.json()['results']]
+
+    def test_ranked_results_follow_writes(self):
+        Task.objects.create(user=self.user, title='Buy milk', description='From the market')
+        Task.objects.create(user=self.user, title='Market research', description='Compare milk prices')
+        Task.objects.create(user=self.user, title='Call the bank')
+        Task.objects.create(user=create_user('other@example.com'), title='Milk run')
+
+        self.assertEqual(self.search('milk'), ['Buy milk', 'Market research'])
+        self.assertEqual(self.search('market milk', ordering='created_at'), ['Buy milk', 'Market research'])
+        self.assertEqual(self.search('nothing'), [])
+
+        task = Task.objects.get(title='Call the bank')
+        task.title = 'Call the milk supplier'
+        task.save()
+        Task.objects.get(title='Buy milk').delete()
+        self.assertEqual(self.search('milk'), ['Call the milk supplier', 'Market research'])
+
+    def test_broad_terms_rank_every_match(self):
+        Task.objects.bulk_create([Task(user=self.user, title=f'Report {n}') for n in range(1200)])
+        Task.objects.create(user=self.user, title='Report report', description='report')
+        inverted_index.invalidate(self.user.pk)
+
+        titles, url = [], '/api/tasks/?search=report&page_size=100'
+        while url:
+            page = self.client.get(url).json()
+            titles += [task['title'] for task in page['results']]
+            url = page['next']
+        self.assertEqual(len(titles), 1201)
+        self.assertEqual(titles[:2], ['Report report', 'Report 1199'])
+
+
+class TaskBulkTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_update_delete(self):
+        self.client.get('/api/tasks/stats/')
+        with self.assertNumQueries(4):
+            response = self.client.post('/api/tasks/bulk/', [
+                {'title': f'Imported {n}', 'priority': 'high'} for n in range(50)
+            ], format='json')
+        self.assertEqual(response.status_code, 201)
+        ids = [task['id'] for task in response.json()]
+        self.assertEqual(len(ids), 50)
+
+        # The counters are moved by deltas from the locked rows, not rebuilt.
+        with mock.patch.object(stats, 'rebuild_counters') as rebuild:
+            response = self.client.patch('/api/tasks/bulk/', [
+                {'id': task_id, 'status': 'done'} for task_id in ids[:10]
+            ], format='json')
+        self.assertEqual(response.status_code, 200)
+        rebuild.assert_not_called()
+        self.assertEqual(Task.objects.filter(status='done', completed_at__isnull=False).count(), 10)
+        counters = self.client.get('/api/tasks/stats/').json()
+        self.assertEqual((counters['total'], counters['todo'], counters['done']), (50, 40, 10))
+
+        response = self.client.delete('/api/tasks/bulk/', {'ids': ids[:20]}, format='json')
+        self.assertEqual(response.json(), {'deleted': 20})
+
+        counters = self.client.get('/api/tasks/stats/').json()
+        self.assertEqual((counters['total'], counters['done'], counters['high_priority']), (30, 0, 30))
+
+    def test_bulk_delete_reports_only_deleted_tasks(self):
+        mine = [Task.objects.create(user=self.user, title=f'Mine {n}', priority='high') for n in range(3)]
+        other = Task.objects.create(user=create_user('other@example.com'), title='Not mine')
+        ids = [mine[0].id, mine[1].id, other.id, 999999]
+
+        with mock.patch.object(events, 'tasks_changed_in_bulk') as published:
+            response = self.client.delete('/api/tasks/bulk/', {'ids': ids}, format='json')
+        self.assertEqual(response.json(), {'deleted': 2})
+        self.assertEqual(published.call_args.args, (self.user.pk, 'deleted', [mine[0].id, mine[1].id]))
+        self.assertEqual(
+            set(TaskTombstone.objects.values_list('task_id', flat=True)), {mine[0].id, mine[1].id}
+        )
+        self.assertTrue(Task.objects.filter(pk=other.pk).exists())
+        counters = UserTaskStats.objects.filter(user=self.user).values('total', 'high_priority').get()
+        self.assertEqual(counters, {'total': 1, 'high_priority': 1})
+
+    def test_bulk_validation_and_ownership(self):
+        response = self.client.post('/api/tasks/bulk/', [{'title': 'ok'}, {'title': '  '}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.exists())
+
+        other = Task.objects.create(user=create_user('other@example.com'), title='Not mine')
+        response = self.client.patch('/api/tasks/bulk/', [{'id': other.id, 'title': 'Mine'}], format='json')
+        self.assertEqual(response.status_code, 404)
+        other.refresh_from_db()
+        self.assertEqual(other.title, 'Not mine')
+
+
+class TaskConditionalGetTests(TestCase):
+
+    def setUp(self):
+        # Validators are read through the task cache only when it is shared.
+        self.enterContext(mock.patch('tasks.cache.is_shared', return_value=True))
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(user=self.user, title='Cached')
+
+    def assertRevalidates(self, url):
+        response = self.client.get(url)
+        etag = response['ETag']
+        # The validators come from the task cache filled by the first request.
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        return etag
+
+    def test_unchanged_resources_return_304(self):
+        for url in ['/api/tasks/', f'/api/tasks/{self.task.id}/', '/api/tasks/stats/', '/api/tasks/overdue/']:
+            with self.subTest(url=url):
+                self.assertRevalidates(url)
+
+    def test_writes_change_the_validators(self):
+        list_etag = self.assertRevalidates('/api/tasks/')
+        detail_etag = self.assertRevalidates(f'/api/tasks/{self.task.id}/')
+
+        self.client.patch(f'/api/tasks/{self.task.id}/update_status/', {'status': 'done'}, format='json')
+
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(f'/api/tasks/{self.task.id}/', HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'done')
+
+    def test_filters_are_part_of_the_task_validator(self):
+        url = f'/api/tasks/{self.task.id}/'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(f'{url}?status=done', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_local_cache_does_not_answer_revalidations(self):
+        url = f'/api/tasks/{self.task.id}/'
+        with mock.patch('tasks.cache.is_shared', return_value=False), task_cache.single_process_mode():
+            etag = self.client.get(url)['ETag']
+            # Another worker's write would not reach this process's cache.
+            Task.objects.filter(pk=self.task.pk).update(title='Changed', updated_at=timezone.now())
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'Changed')
+
+
+class TaskCacheTests(TestCase):
+
+    def setUp(self):
+        self.enterContext(task_cache.single_process_mode())
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(user=self.user, title='Cached')
+
+    def test_reads_are_cached_until_a_write(self):
+        # Validators too, which are cached only in a shared cache.
+        self.enterContext(mock.patch('tasks.cache.is_shared', return_value=True))
+        urls = ['/api/tasks/stats/', f'/api/tasks/{self.task.id}/', '/api/tasks/overdue/']
+        for url in urls:
+            self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/tasks/stats/').json()['total'], 1)
+            self.assertEqual(self.client.get(f'/api/tasks/{self.task.id}/').json()['title'], 'Cached')
+            self.assertEqual(self.client.get('/api/tasks/overdue/').json(), [])
+
+        self.client.patch('/api/tasks/bulk/', [{'id': self.task.id, 'title': 'Renamed'}], format='json')
+        self.assertEqual(self.client.get(f'/api/tasks/{self.task.id}/').json()['title'], 'Renamed')
+
+        Task.objects.filter(pk=self.task.pk).update(due_date=timezone.now() - timedelta(hours=1))
+        sweep_overdue()
+        self.assertEqual([task['id'] for task in self.client.get('/api/tasks/overdue/').json()], [self.task.id])
+        self.assertEqual(self.client.get('/api/tasks/stats/').json()['overdue'], 1)
+
+        Task.objects.create(user=self.user, title='Second')
+        self.assertEqual(self.client.get('/api/tasks/stats/').json()['total'], 2)
+
+    def test_local_cache_needs_single_process_mode(self):
+        cache = TaskCache(alias='default')
+        self.assertFalse(cache.active)
+        calls = []
+        for _ in range(2):
+            cache.get_or_compute(self.user.pk, 'stats', lambda: calls.append(1) or {'total': 0})
+        self.assertEqual(len(calls), 2)
+        with mock.patch('tasks.cache.is_shared', return_value=True):
+            self.assertTrue(cache.active)
+
+    def test_concurrent_misses_are_coalesced(self):
+        cache = TaskCache(alias='default', single_process=True)
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute(self.user.pk, 'slow', compute)))
+            for _ in range(4)
+        ]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        key = (cache.entry_key(self.user.pk, 'slow'), cache.cache.get(cache.generation_key(self.user.pk)))
+        while cache.flights.waiters(key) < 3:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual((len(calls), results), (1, ['value'] * 4))
+        self.assertEqual(cache.metrics()['kinds']['slow'], {'coalesced': 3, 'misses': 4})
+        self.assertEqual(cache.get_or_compute(self.user.pk, 'slow', compute), 'value')
+        self.assertEqual(cache.metrics()['kinds']['slow']['hits'], 1)
+
+    @override_settings(CACHES={'small': {
+        'BACKEND': 'todolist.cache.LocMemCache', 'LOCATION': 'small', 'OPTIONS': {'MAX_ENTRIES': 10},
+    }})
+    def test_evictions_and_unavailable_cache(self):
+        cache = TaskCache(alias='small', single_process=True)
+        for user_id in range(20):
+            cache.get_or_compute(user_id, 'stats', lambda: {'total': 0})
+        self.assertGreater(cache.metrics()['evictions'], 0)
+
+        with mock.patch.object(LocMemCache, 'get_many', side_effect=ConnectionError), \
+                self.assertLogs('tasks.cache', 'WARNING'):
+            self.assertEqual(cache.get_or_compute(1, 'stats', lambda: {'total': 1}), {'total': 1})
+        self.assertEqual(cache.metrics()['kinds']['stats']['errors'], 1)
+
+
+@override_settings(TASK_SYNC={'PAGE_SIZE': 500, 'OVERLAP_SECONDS': 0, 'TOMBSTONE_RETENTION_DAYS': 30})
+class TaskSyncTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tasks = [Task.objects.create(user=self.user, title=f'Task {n}') for n in range(3)]
+        Task.objects.create(user=create_user('other@example.com'), title='Not mine')
+
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params['since'] = cursor
+        response = self.client.get('/api/tasks/changes/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_changes_and_deletions_since_cursor(self):
+        initial = self.sync()
+        self.assertEqual([task['id'] for task in initial['changed']], [task.id for task in self.tasks])
+        self.assertEqual(initial['deleted'], [])
+        self.assertEqual(initial['changed'][0], TaskSerializer(self.tasks[0]).data)
+
+        self.assertEqual(self.sync(initial['cursor'])['changed'], [])
+        self.client.patch(f'/api/tasks/{self.tasks[0].id}/', {'priority': 'high'}, format='json')
+        self.client.delete(f'/api/tasks/{self.tasks[1].id}/')
+        self.client.delete('/api/tasks/bulk/', {'ids': [self.tasks[2].id, 999]}, format='json')
+        created = self.client.post('/api/tasks/', {'title': 'New'}, format='json').json()
+
+        with self.assertNumQueries(3):
+            changes = self.sync(initial['cursor'])
+        self.assertEqual([task['id'] for task in changes['changed']], [self.tasks[0].id, created['id']])
+        self.assertEqual(changes['changed'][0]['priority'], 'high')
+        self.assertEqual(changes['deleted'], [self.tasks[1].id, self.tasks[2].id])
+        self.assertFalse(changes['has_more'])
+        caught_up = self.sync(changes['cursor'])
+        self.assertEqual((caught_up['changed'], caught_up['deleted']), ([], []))
+
+    def test_pages_until_caught_up(self):
+        seen = []
+        cursor = None
+        while True:
+            changes = self.sync(cursor, page_size=2)
+            seen += [task['id'] for task in changes['changed']]
+            cursor = changes['cursor']
+            if not changes['has_more']:
+                break
+        self.assertEqual(seen, [task.id for task in self.tasks])
+
+    def test_recent_writes_are_repeated(self):
+        with self.settings(TASK_SYNC={'OVERLAP_SECONDS': 60}):
+            changes = self.sync()
+            self.assertEqual(len(self.sync(changes['cursor'])['changed']), 3)
+
+    def test_invalid_and_expired_cursors(self):
+        response = self.client.get('/api/tasks/changes/', {'since': 'bogus'})
+        self.assertEqual(response.status_code, 404)
+
+        cursor = self.sync()['cursor']
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(days=31)):
+            response = self.client.get('/api/tasks/changes/', {'since': cursor})
+        self.assertEqual(response.status_code, 410)
+
+    def test_prune_tombstones(self):
+        self.client.delete(f'/api/tasks/{self.tasks[0].id}/')
+        self.assertEqual(prune_tombstones(timezone.now() + timedelta(days=29)), 0)
+        self.assertEqual(prune_tombstones(timezone.now() + timedelta(days=31)), 1)
+        self.assertFalse(TaskTombstone.objects.exists())
+
+
+class TaskExportTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tasks = [
+            Task.objects.create(user=self.user, title=f'Task {n}', status='done' if n % 2 else 'todo')
+            for n in range(5)
+        ]
+        Task.objects.create(user=self.user, title='=HYPERLINK("http://example.com")')
+        Task.objects.create(user=create_user('other@example.com'), title='Not mine')
+
+    def export(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_export_streams_filtered_tasks_in_chunks(self):
+        with self.settings(TASK_EXPORT_CHUNK_SIZE=2):
+            response = self.client.get('/api/tasks/export/?format=csv&status=todo')
+            chunks = list(response.streaming_content)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="tasks.csv"')
+        # Header, then the four matching tasks two per chunk.
+        self.assertEqual(len(chunks), 3)
+        rows = list(csv.DictReader(io.StringIO(b''.join(chunks).decode())))
+        self.assertEqual(
+            [row['title'] for row in rows],
+            ['\'=HYPERLINK("http://example.com")', 'Task 4', 'Task 2', 'Task 0']
+        )
+        self.assertEqual(rows[1]['id'], str(self.tasks[4].id))
+
+    def test_ndjson_export_matches_task_serializer(self):
+        response, content = self.export('/api/tasks/export/?format=ndjson&ordering=created_at')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lines = [json.loads(line) for line in content.splitlines()]
+        expected = TaskSerializer(Task.objects.filter(user=self.user).order_by('created_at'), many=True).data
+        self.assertEqual(lines, json.loads(JSONRenderer().render(expected)))
+
+    async def test_async_export(self):
+        token = await sync_to_async(AccessToken.for_user)(self.user)
+        response = await self.async_client.get(
+            '/api/tasks/export/?format=ndjson', headers={'Authorization': f'Bearer {token}'}
+        )
+        lines = [line async for chunk in response.streaming_content for line in chunk.splitlines()]
+        self.assertEqual(len(lines), 6)
+
+
+class TaskImportTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, body, content_type):
+        return self.client.generic('POST', '/api/tasks/import/', body.encode(), content_type=content_type)
+
+    def test_csv_import_loads_valid_rows_in_chunks(self):
+        due = (timezone.now() + timedelta(days=3)).isoformat()
+        body = (
+            'title,description,priority,due_date\n'
+            f'First,,high,{due}\n'
+            '"Second, with comma","Line one\nline two",,\n'
+            '   ,,urgent,\n'
+            'Third,,low,\n'
+        )
+        with self.settings(TASK_IMPORT_CHUNK_SIZE=2):
+            response = self.post(body, 'text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'imported': 3,
+            'failed': 1,
+            'errors': [{'line': 5, 'errors': {
+                'title': ['This field may not be blank.'],
+                'priority': ['"urgent" is not a valid choice.'],
+            }}],
+        })
+        tasks = Task.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(
+            [(task.title, task.description, task.priority) for task in tasks],
+            [('First', None, 'high'), ('Second, with comma', 'Line one\nline two', 'medium'), ('Third', None, 'low')]
+        )
+        self.assertEqual(
+            self.client.get('/api/tasks/stats/').json(),
+            aggregate_stats(Task.objects.filter(user=self.user))
+        )
+
+    def test_ndjson_import_applies_model_validation(self):
+        past = (timezone.now() - timedelta(days=1)).isoformat()
+        body = '\n'.join([
+            json.dumps({'title': 'Valid'}),
+            json.dumps({'title': 'Late', 'due_date': past}),
+            '[1, 2]',
+            '{broken',
+        ])
+        response = self.post(body, 'application/x-ndjson')
+        self.assertEqual(response.json()['imported'], 1)
+        self.assertEqual([error['line'] for error in response.json()['errors']], [2, 3, 4])
+        self.assertEqual(
+            response.json()['errors'][0]['errors'], {'non_field_errors': ['Due date must be in the future.']}
+        )
+
+    def test_command_and_unsupported_content_type(self):
+        self.assertEqual(self.post('{}', 'application/json').status_code, 415)
+
+        with tempfile.TemporaryDirectory() as directory:
+            source = Path(directory) / 'tasks.ndjson'
+            source.write_text(json.dumps({'title': 'From file'}) + '\n{}\n')
+            report = Path(directory) / 'errors.csv'
+            call_command('import_tasks', str(source), user=self.user.email, errors=str(report), stdout=io.StringIO())
+            self.assertEqual(report.read_text().splitlines()[1], '2,title,This field is required.')
+        self.assertEqual(list(Task.objects.values_list('title', flat=True)), ['From file'])
+
+
+class DashboardTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # Revalidations hit the task cache only when it is shared.
+        self.enterContext(mock.patch('tasks.cache.is_shared', return_value=True))
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        past = timezone.now() - timedelta(days=1)
+        Task.objects.bulk_create([Task(user=self.user, title=f'Task {n}') for n in range(12)])
+        self.late = [Task.objects.create(user=self.user, title=f'Late {n}', due_date=past) for n in range(2)]
+        # Resolve the user once, so only the dashboard's own queries are counted.
+        self.client.get('/api/auth/profile/')
+
+    def test_dashboard_in_three_queries(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/dashboard/?page_size=5')
+        data = response.json()
+        self.assertEqual(data['profile']['email'], self.user.email)
+        self.assertEqual(data['stats']['total'], 14)
+        self.assertEqual(data['stats']['overdue'], 2)
+        self.assertEqual(
+            [task['id'] for task in data['tasks']['results']],
+            [task['id'] for task in self.client.get('/api/tasks/?page_size=5').json()['results']]
+        )
+        self.assertEqual({task['id'] for task in data['overdue']}, {task.id for task in self.late})
+        self.assertTrue(all(task['is_overdue'] for task in data['overdue']))
+
+        next_page = self.client.get(data['tasks']['next'])
+        self.assertEqual(next_page.status_code, 200)
+        self.assertEqual(len(next_page.json()['results']), 5)
+
+        with self.assertNumQueries(1):
+            self.client.get('/api/dashboard/?page_size=5')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/dashboard/?page_size=5', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_profile_change_busts_the_etag(self):
+        etag = self.client.get('/api/dashboard/')['ETag']
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        response = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['profile']['first_name'], 'Renamed')
+
+
+class BatchTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.task = Task.objects.create(user=self.user, title='Batched')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def batch(self, *requests):
+        return self.client.post('/api/batch/', {'requests': list(requests)}, format='json')
+
+    def test_writes_run_in_order_and_reads_see_them(self):
+        path = f'/api/tasks/{self.task.id}/update_status/'
+        authenticate = CachedJWTAuthentication().authenticate
+        with mock.patch.object(CachedJWTAuthentication, 'authenticate', wraps=authenticate) as authenticate:
+            response = self.batch(
+                {'method': 'PATCH', 'path': path, 'body': {'status': 'in_progress'}},
+                {'method': 'PATCH', 'path': path, 'body': {'status': 'done'}},
+                {'method': 'GET', 'path': '/api/tasks/stats/'},
+                {'method': 'GET', 'path': '/api/tasks/0/'},
+            )
+        self.assertEqual(authenticate.call_count, 1)
+        self.assertEqual(response.status_code, 200)
+        responses = response.json()['responses']
+        self.assertEqual([entry['status'] for entry in responses], [200, 200, 200, 404])
+        self.assertEqual(responses[1]['body']['status'], 'done')
+        self.assertEqual(responses[2]['body']['done'], 1)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'done')
+
+    def test_limits(self):
+        read = {'method': 'GET', 'path': '/api/tasks/stats/'}
+        with override_settings(API_BATCH={**settings.API_BATCH, 'MAX_REQUESTS': 2}):
+            self.assertEqual(self.batch(read, read, read).status_code, 400)
+        self.assertEqual(self.batch().status_code, 400)
+        self.assertEqual(self.batch({'method': 'GET', 'path': 'api/tasks/'}).status_code, 400)
+
+        response = self.batch(
+            {'method': 'GET', 'path': '/api/batch/'},
+            {'method': 'GET', 'path': '/api/tasks/export/'},
+        )
+        self.assertEqual([entry['status'] for entry in response.json()['responses']], [400, 400])
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        self.assertEqual(self.batch({'method': 'GET', 'path': '/api/tasks/'}).status_code, 401)
+
+
+class BatchReadTests(TransactionTestCase):
+    """Concurrent reads run on pool threads, with their own connections."""
+
+    def test_reads_run_concurrently(self):
+        user = create_user()
+        Task.objects.bulk_create([Task(user=user, title=f'Task {n}') for n in range(3)])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        threads = set()
+        stats = TaskViewSet.stats
+
+        def record(self, request):
+            threads.add(threading.current_thread().name)
+            return stats(self, request)
+
+        with mock.patch.object(TaskViewSet, 'stats', record):
+            response = client.post('/api/batch/', {'requests': [
+                {'method': 'GET', 'path': '/api/tasks/stats/'},
+                {'method': 'GET', 'path': '/api/tasks/?page_size=2'},
+                {'method': 'GET', 'path': '/api/auth/profile/'},
+            ]}, format='json')
+        responses = response.json()['responses']
+        self.assertEqual([entry['status'] for entry in responses], [200, 200, 200])
+        self.assertEqual(responses[0]['body']['total'], 3)
+        self.assertEqual(len(responses[1]['body']['results']), 2)
+        self.assertEqual(responses[2]['body']['email'], user.email)
+        self.assertTrue(all(name.startswith('api-batch') for name in threads))
+
+
+class ThrottleTests(TestCase):
+
+    def setUp(self):
+        buckets.clear()
+        self.addCleanup(buckets.clear)
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def rates(self, **rates):
+        return override_settings(API_THROTTLES={**settings.API_THROTTLES, 'RATES': rates})
+
+    def test_buckets_refill_over_time(self):
+        state, wait = take(None, 2, 0.5, now=100.0)
+        state, wait = take(state, 2, 0.5, now=100.0)
+        self.assertEqual(wait, 0.0)
+        state, wait = take(state, 2, 0.5, now=101.0)
+        self.assertEqual(wait, 1.0)
+        state, wait = take(state, 2, 0.5, now=102.0)
+        self.assertEqual(wait, 0.0)
+
+    def test_routes_are_limited_per_user(self):
+        with self.rates(**{'task-stats': '2/min'}):
+            statuses = [self.client.get('/api/tasks/stats/').status_code for _ in range(3)]
+            response = self.client.get('/api/tasks/stats/')
+            self.assertEqual(self.client.get('/api/tasks/overdue/').status_code, 200)
+            other = APIClient()
+            other.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(create_user("other@example.com"))}')
+            self.assertEqual(other.get('/api/tasks/stats/').status_code, 200)
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_anonymous_routes_are_limited_per_address(self):
+        credentials = {'email': self.user.email, 'password': 'wrong'}
+        with self.rates(login='1/min'):
+            client = APIClient(REMOTE_ADDR='10.0.0.1')
+            self.assertEqual(client.post('/api/auth/login/', credentials, format='json').status_code, 401)
+            self.assertEqual(client.post('/api/auth/login/', credentials, format='json').status_code, 429)
+            client = APIClient(REMOTE_ADDR='10.0.0.2')
+            self.assertEqual(client.post('/api/auth/login/', credentials, format='json').status_code, 401)
+
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        credentials = {'email': self.user.email, 'password': 'wrong'}
+        client = APIClient(REMOTE_ADDR='10.0.0.1')
+
+        def login(forwarded_for):
+            return client.post(
+                '/api/auth/login/', credentials, format='json', HTTP_X_FORWARDED_FOR=forwarded_for
+            ).status_code
+
+        with self.rates(login='1/min'):
+            self.assertEqual([login(f'203.0.113.{n}') for n in range(3)], [401, 429, 429])
+
+        buckets.clear()
+        # Behind one trusted proxy, the address it appended is the client's.
+        proxied = override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+        with self.rates(login='1/min'), proxied:
+            statuses = [login(address) for address in ['203.0.113.1', '203.0.113.1', '198.51.100.1, 203.0.113.2']]
+        self.assertEqual(statuses, [401, 429, 401])
+
+    def test_batch_sub_requests_are_throttled_as_their_routes(self):
+        with self.rates(**{'task-stats': '1/min'}):
+            response = self.client.post('/api/batch/', {'requests': [
+                {'method': 'GET', 'path': '/api/tasks/stats/'},
+                {'method': 'GET', 'path': '/api/tasks/stats/'},
+            ]}, format='json')
+        self.assertEqual([entry['status'] for entry in response.json()['responses']], [200, 429])
+
+    def test_shared_buckets(self):
+        store = BucketStore(backend='default')
+        self.addCleanup(cache.clear)
+        self.assertEqual(store.consume('shared', 1, 1 / 60), 0.0)
+        self.assertGreater(BucketStore(backend='default').consume('shared', 1, 1 / 60), 59)
+        self.assertEqual(len(store), 0)
+
+    async def test_async_views_consume_shared_buckets_off_the_event_loop(self):
+        threads = []
+
+        def consume_shared(key, capacity, refill_rate):
+            threads.append(threading.get_ident())
+            return 0.0
+
+        self.enterContext(mock.patch.object(buckets, 'backend', 'default'))
+        self.enterContext(mock.patch.object(buckets, 'consume_shared', consume_shared))
+        token = await sync_to_async(AccessToken.for_user)(self.user)
+        response = await self.async_client.get(
+            '/api/async/tasks/stats/', headers={'Authorization': f'Bearer {token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+
+class QueryPlanTests(TestCase):
+
+    def test_every_query_shape_is_index_backed(self):
+        output = io.StringIO()
+        if connection.vendor == 'postgresql':
+            # With this few rows a sequential scan is cheapest; ask the
+            # planner whether an index could be used at all.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        call_command('explain_task_queries', users=2, tasks_per_user=50, fail_on_seq_scan=True, stdout=output)
+        self.assertIn('Every query shape is index-backed.', output.getvalue())
+        self.assertFalse(Task.objects.exists())
+
+    def test_full_scan_patterns(self):
+        sqlite = FULL_SCAN_PATTERNS['sqlite']
+        self.assertTrue(sqlite.search('SCAN tasks_task'))
+        self.assertTrue(sqlite.search('SCAN tasks_tasktombstone'))
+        self.assertFalse(sqlite.search('SEARCH tasks_task USING INDEX task_user_created_idx (user_id=?)'))
+        self.assertFalse(sqlite.search('SCAN tasks_task USING INDEX task_user_due_idx'))
+        postgresql = FULL_SCAN_PATTERNS['postgresql']
+        self.assertTrue(postgresql.search('Seq Scan on tasks_task  (cost=0.00..1.50 rows=50 width=8)'))
+        self.assertFalse(postgresql.search('Index Scan using task_user_created_idx on tasks_task'))
+
+
+class ApiBenchmarkTests(TestCase):
+
+    def test_every_route_succeeds_within_its_query_budget(self):
+        user = create_user()
+        Task.objects.bulk_create([Task(user=user, title=f'Task {n}') for n in range(60)])
+        with open(Path(settings.BASE_DIR) / 'benchmark_budgets.json') as budget_file:
+            budgets = json.load(budget_file)
+
+        results = run_benchmarks(BenchmarkContext(user, 'password123'), iterations=2, warmup=1)
+        self.assertEqual({result.name for result in results}, set(budgets))
+        budgets = {name: {'queries': budget['queries']} for name, budget in budgets.items()}
+        self.assertEqual(check_budgets(results, budgets), [])
+
+
+@skipUnless(
+    connection.vendor == 'postgresql' and connection.settings_dict['OPTIONS'].get('pool'),
+    'Needs a pooled PostgreSQL connection.'
+)
+class ConnectionPoolTests(TestCase):
+
+    def test_connections_are_borrowed_and_returned(self):
+        def in_use():
+            return pool_metrics()[connection.alias]['in_use']
+
+        def acquisitions():
+            return sum(pool_metrics()[connection.alias]['acquire_ms']['buckets'].values())
+
+        # This test's own connection is checked out for its transaction.
+        before, acquired = in_use(), acquisitions()
+        seen = []
+
+        def query():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            seen.append((in_use(), connection.connection._pool is connection.pool))
+            connection.close()
+
+        thread = threading.Thread(target=query)
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, [(before + 1, True)])
+        self.assertEqual((in_use(), acquisitions()), (before, acquired + 1))
+
+
+@override_settings(DATABASE_REPLICAS={'ALIASES': ['replica1'], 'STICKY_SECONDS': 5, 'CACHE': 'default'})
+class ReplicaRoutingTests(TransactionTestCase):
+    # Not TestCase: reads inside a transaction always use the primary.
+
+    def setUp(self):
+        # Stands in for Redis: pins must be visible to every worker.
+        self.enterContext(mock.patch('todolist.routers.is_shared', return_value=True))
+        self.user = create_user()
+        self.other = create_user('other@example.com')
+        self.token = str(AccessToken.for_user(self.user))
+        # Authenticated once outside a request, so lookups below hit the user cache.
+        CachedJWTAuthentication().get_user(AccessToken(self.token))
+
+    def read_database(self, method='GET', token=None, write=False):
+        """The database a read would use while handling a request."""
+        router = ReplicaRouter()
+        seen = []
+
+        def view(request):
+            if token:
+                CachedJWTAuthentication().authenticate(Request(request))
+            if write:
+                router.db_for_write(Task)
+            seen.append(router.db_for_read(Task))
+            return HttpResponse()
+
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        ReplicaRoutingMiddleware(view)(RequestFactory().generic(method, '/api/tasks/', **headers))
+        return seen[0]
+
+    def test_safe_requests_read_from_a_replica(self):
+        self.assertEqual(self.read_database(), 'replica1')
+        self.assertEqual(self.read_database(token=self.token), 'replica1')
+        self.assertIsNone(self.read_database('PATCH', token=self.token))
+        self.assertIsNone(ReplicaRouter().db_for_read(Task))
+        self.assertFalse(ReplicaRouter().allow_migrate('replica1', 'tasks'))
+
+    def test_writers_read_from_the_primary_for_a_while(self):
+        self.read_database('PATCH', token=self.token, write=True)
+        self.assertIsNone(self.read_database(token=self.token))
+
+        cache.delete(pin_key(self.user.pk))
+        self.assertEqual(self.read_database(token=self.token), 'replica1')
+
+        # Writes outside requests pin the tasks' owner too.
+        Task.objects.create(user=self.user, title='Swept')
+        self.assertIsNone(self.read_database(token=self.token))
+        other_token = str(AccessToken.for_user(self.other))
+        CachedJWTAuthentication().get_user(AccessToken(other_token))
+        self.assertEqual(self.read_database(token=other_token), 'replica1')
+
+    def test_replicas_need_a_shared_pin_cache(self):
+        with mock.patch('todolist.routers.is_shared', return_value=False):
+            with self.assertRaises(ImproperlyConfigured):
+                ReplicaRoutingMiddleware(lambda request: HttpResponse())
+        with override_settings(DATABASE_REPLICAS={'ALIASES': [], 'CACHE': 'default'}), \
+                mock.patch('todolist.routers.is_shared', return_value=False):
+            ReplicaRoutingMiddleware(lambda request: HttpResponse())
+
+
+class InstrumentationTests(TestCase):
+
+    def setUp(self):
+        registry.reset()
+        self.user = create_user()
+        self.user.is_staff = True
+        self.user.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_and_route_metrics(self):
+        Task.objects.create(user=self.user, title='Timed')
+        response = self.client.get('/api/tasks/')
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="2 queries", serialize;dur=[\d.]+, view;dur=[\d.]+, total;dur=[\d.]+$'
+        )
+
+        routes = self.client.get('/api/metrics/').json()['routes']
+        self.assertEqual(routes['GET task-list']['count'], 1)
+        self.assertEqual(routes['GET task-list']['queries']['sum'], 2)
+
+    async def test_async_orm_queries_are_counted(self):
+        await Task.objects.acreate(user=self.user, title='Timed')
+        token = await sync_to_async(AccessToken.for_user)(self.user)
+        response = await self.async_client.get(
+            '/api/async/tasks/', headers={'Authorization': f'Bearer {token}'}
+        )
+        self.assertIn('desc="3 queries"', response['Server-Timing'])
+        routes = registry.snapshot()
+        self.assertEqual(routes['GET async-task-list']['queries']['sum'], 3)
+
+    def test_slow_requests_are_logged_with_their_queries(self):
+        with self.settings(REQUEST_INSTRUMENTATION={'SLOW_REQUEST_MS': 0, 'SLOW_REQUEST_SAMPLE_RATE': 1}):
+            with self.assertLogs('todolist.instrumentation', 'WARNING') as logs:
+                self.client.get('/api/tasks/stats/')
+        self.assertIn('tasks_usertaskstats', logs.output[0])
+
+
+class AsyncTaskApiTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        token = AccessToken.for_user(self.user)
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        now = timezone.now()
+        for n in range(12):
+            Task.objects.create(
+                user=self.user, title=f'Task {n}', priority='high' if n % 3 else 'low',
+                due_date=now - timedelta(days=1) if n % 4 == 0 else None,
+            )
+        Task.objects.create(user=create_user('other@example.com'), title='Not mine')
+
+    async def test_async_endpoints_match_the_sync_api(self):
+        task = await Task.objects.filter(user=self.user).afirst()
+        paths = [
+            '/api/tasks/?page_size=5&ordering=priority',
+            '/api/tasks/?priority=low',
+            '/api/tasks/?search=task',
+            f'/api/tasks/{task.id}/',
+            '/api/tasks/overdue/',
+            '/api/tasks/stats/',
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                expected = await sync_to_async(self.client.get)(path)
+                response = await self.async_client.get(path.replace('/api/', '/api/async/'), headers=self.headers)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(
+                    response.content.replace(b'/api/async/', b'/api/'), expected.content
+                )
+
+        page = (await self.async_client.get('/api/async/tasks/?page_size=5', headers=self.headers)).json()
+        response = await self.async_client.get(page['next'], headers=self.headers)
+        self.assertEqual(len(response.json()['results']), 5)
+
+    async def test_async_auth(self):
+        self.assertEqual((await self.async_client.get('/api/async/tasks/')).status_code, 401)
+        self.assertEqual((await self.async_client.get('/api/async/tasks/0/', headers=self.headers)).status_code, 404)
+        response = await self.async_client.post(
+            '/api/async/auth/login/',
+            {'email': 'user@example.com', 'password': 'password123'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        headers = {'Authorization': f'Bearer {response.json()["access_token"]}'}
+        response = await self.async_client.get('/api/async/auth/profile/', headers=headers)
+        self.assertEqual(response.json()['email'], 'user@example.com')
+
+    async def test_async_endpoints_revalidate(self):
+        task = await Task.objects.filter(user=self.user).afirst()
+        for path in ['/api/async/tasks/', f'/api/async/tasks/{task.id}/', '/api/async/tasks/overdue/',
+                     '/api/async/tasks/stats/']:
+            with self.subTest(path=path):
+                response = await self.async_client.get(path, headers=self.headers)
+                self.assertTrue(response.has_header('Last-Modified'))
+                revalidated = await self.async_client.get(
+                    path, headers={**self.headers, 'If-None-Match': response['ETag']}
+                )
+                self.assertEqual(revalidated.status_code, 304)
+
+        etag = (await self.async_client.get(f'/api/async/tasks/{task.id}/', headers=self.headers))['ETag']
+        await Task.objects.filter(pk=task.pk).aupdate(title='Changed', updated_at=timezone.now())
+        response = await self.async_client.get(
+            f'/api/async/tasks/{task.id}/', headers={**self.headers, 'If-None-Match': etag}
+        )
+        self.assertEqual(response.json()['title'], 'Changed')
+
+    async def test_async_logins_hash_in_parallel(self):
+        # Each verification waits for the other: serialized logins time out.
+        barrier = threading.Barrier(2, timeout=5)
+
+        def verify(password, encoded):
+            barrier.wait()
+            return True, None
+
+        login = partial(
+            self.async_client.post, '/api/async/auth/login/',
+            {'email': 'user@example.com', 'password': 'password123'}, content_type='application/json'
+        )
+        with mock.patch.object(password_pool, 'verify', side_effect=verify):
+            responses = await asyncio.gather(login(), login())
+        self.assertEqual([response.status_code for response in responses], [200, 200])
+
+
+class TaskEventStreamTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        token = AccessToken.for_user(self.user)
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.task = Task.objects.create(user=self.user, title='Watched')
+        self.other = create_user('other@example.com')
+        self.pending = []
+
+    def write(self, method, path, data=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(path, data, format='json')
+
+    async def next_event(self, stream):
+        # Events queued together arrive in one chunk.
+        if not self.pending:
+            chunk = await asyncio.wait_for(anext(stream), 5)
+            self.pending = chunk.decode().split('\n\n')[:-1]
+        fields = dict(line.split(': ', 1) for line in self.pending.pop(0).split('\n'))
+        return fields['event'], json.loads(fields['data'])
+
+    async def test_stream_pushes_the_users_task_changes(self):
+        response = await self.async_client.get('/api/tasks/stream/', headers=self.headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+
+        def other_users_write():
+            with self.captureOnCommitCallbacks(execute=True):
+                Task.objects.create(user=self.other, title='Not mine')
+        await sync_to_async(other_users_write)()
+        path = f'/api/tasks/{self.task.id}/'
+        await sync_to_async(self.write)('patch', f'{path}update_status/', {'status': 'done'})
+        await sync_to_async(self.write)('patch', path, {'priority': 'high'})
+        await sync_to_async(self.write)('delete', path)
+        created = await sync_to_async(self.write)('post', '/api/tasks/bulk/', [{'title': 'Bulk'}])
+
+        event, data = await self.next_event(stream)
+        self.assertEqual((event, data['task']['id'], data['task']['status']), ('task.status_updated', self.task.id, 'done'))
+        event, data = await self.next_event(stream)
+        self.assertEqual((event, data['task']['priority']), ('task.updated', 'high'))
+        self.assertEqual(data['task']['user'], str(self.user))
+        self.assertEqual(await self.next_event(stream), ('task.deleted', {'id': self.task.id}))
+        self.assertEqual(
+            await self.next_event(stream), ('tasks.bulk_created', {'ids': [created.json()[0]['id']]})
+        )
+
+        await stream.aclose()
+        response.close()
+        self.assertEqual(get_event_hub().connections(), 0)
+
+    async def test_stream_requires_auth_and_asgi(self):
+        self.assertEqual((await self.async_client.get('/api/tasks/stream/')).status_code, 401)
+        response = await sync_to_async(self.client.get)('/api/tasks/stream/')
+        self.assertEqual(response.status_code, 501)
+
+    async def test_slow_consumers_are_told_to_resync(self):
+        hub = EventHub(max_queue=2)
+        subscription = hub.subscribe(self.user.pk)
+        for n in range(3):
+            hub.publish(self.user.pk, {'type': 'task.deleted', 'data': {'id': n}})
+        await asyncio.sleep(0)
+        self.assertEqual((await subscription.get())['type'], 'resync')
+        subscription.close()
+        self.assertEqual(hub.connections(), 0)
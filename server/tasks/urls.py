@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .async_views import task_stream
 from .views import TaskViewSet
 
 
@@ -7,5 +8,7 @@ router = DefaultRouter()
 router.register(r'', TaskViewSet, basename='task')
 
 urlpatterns = [
+    # Ahead of the router, whose detail route would take 'stream' as a pk.
+    path('stream/', task_stream, name='task-stream'),
     path('', include(router.urls)),
 ]
@@ -1,45 +1,76 @@
+from datetime import timedelta
+
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import ParseError, UnsupportedMediaType
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.generics import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.db.models import Q
+from django.http import Http404
+from django.urls import reverse
 from django.utils import timezone
+from rest_framework.utils.urls import replace_query_param
+from accounts.views import profile_data
 from .models import Task
 from .serializers import (
     TaskSerializer, 
+    TaskRowSerializer,
     TaskCreateSerializer, 
     TaskUpdateSerializer,
-    TaskStatusUpdateSerializer
+    TaskStatusUpdateSerializer,
+    TaskBulkUpdateSerializer,
+    TaskBulkDeleteSerializer
 )
 from .services import TaskService
+from .sync import get_changes
+from .export import TaskCSVRenderer, TaskNDJSONRenderer, export_response
+from .importing import import_tasks
+from .pagination import TaskCursorPagination, positive_int
+from .search import TaskSearchFilter
+from .cache import task_cache
+from .conditional import (
+    collection_conditional, dashboard_conditional, task_conditional, task_row, time_window, user_stats_row
+)
 
 
-class TaskViewSet(viewsets.ModelViewSet):
-    @staticmethod
-    def get_overdue_tasks(queryset):
-        return queryset.filter(
-            due_date__lt=timezone.now(),
-            status__in=['todo', 'in_progress']
-        )
+def overdue_rows(request):
+    """The user's overdue tasks as TaskRowSerializer rows; cached.
+
+    The cache holds the tasks due before the end of the current time window
+    and is filtered on every read, so tasks are listed as soon as they fall
+    due, as is_overdue flags them on list rows.
+    """
+    window = time_window()
+    window_end = window + timedelta(seconds=settings.TASK_ETAG_TIME_WINDOW)
+    queryset = Task.objects.filter(user=request.user)
+    rows = task_cache.get_or_compute(
+        request.user.pk, 'overdue',
+        lambda: list(TaskRowSerializer.values(TaskService.get_overdue_tasks(queryset, now=window_end))),
+        arg=int(window.timestamp()),
+    )
+    now = timezone.now()
+    return [row for row in rows if row['due_date'] < now]
 
-    @staticmethod
-    def get_stats(queryset):
-        return {
-            'total': queryset.count(),
-            'todo': queryset.filter(status='todo').count(),
-            'in_progress': queryset.filter(status='in_progress').count(),
-            'done': queryset.filter(status='done').count(),
-            'high_priority': queryset.filter(priority='high').count(),
-            'overdue': TaskService.get_overdue_tasks(queryset).count()
-        }
 
+def user_stats(request):
+    """The user's task stats; cached."""
+    return task_cache.get_or_compute(
+        request.user.pk, 'stats',
+        lambda: TaskService.get_user_stats(request.user, row=user_stats_row(request))
+    )
 
+
+class TaskViewSet(viewsets.ModelViewSet):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TaskCursorPagination
     
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, TaskSearchFilter]
     filterset_fields = ['status', 'priority', 'created_at', 'due_date']
     search_fields = ['title', 'description']
     ordering_fields = ['created_at', 'updated_at', 'due_date', 'priority']
@@ -48,6 +79,29 @@ class TaskViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Task.objects.filter(user=self.request.user)
     
+    @collection_conditional
+    def list(self, request, *args, **kwargs):
+        queryset = TaskRowSerializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = TaskRowSerializer(page, user=request.user, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = TaskRowSerializer(queryset, user=request.user, many=True)
+        return Response(serializer.data)
+    
+    @task_conditional
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        if request.query_params:
+            # Filters apply to detail requests too; only unfiltered rows are cached.
+            queryset = TaskRowSerializer.values(self.filter_queryset(self.get_queryset()))
+            row = get_object_or_404(queryset, pk=pk)
+        else:
+            row = task_row(request, pk)
+            if row is None:
+                raise Http404
+        return Response(TaskRowSerializer(row, user=request.user).data)
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return TaskCreateSerializer
@@ -58,6 +112,9 @@ class TaskViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
+    def perform_destroy(self, instance):
+        TaskService.delete(instance)
+    
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         task = self.get_object()
@@ -79,15 +136,140 @@ class TaskViewSet(viewsets.ModelViewSet):
     
    
     @action(detail=False, methods=['get'])
+    @collection_conditional
     def overdue(self, request):
         """Return overdue tasks."""
-        queryset = self.get_queryset()
-        overdue_tasks = TaskService.get_overdue_tasks(queryset)
-        serializer = TaskSerializer(overdue_tasks, many=True)
+        serializer = TaskRowSerializer(overdue_rows(request), user=request.user, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @collection_conditional
     def stats(self, request):
-        queryset = self.get_queryset()
-        stats = TaskService.get_stats(queryset)
-        return Response(stats)
+        return Response(user_stats(request))
+
+    @action(detail=False, methods=['get'])
+    @collection_conditional
+    def changes(self, request):
+        """Return tasks changed and ids of tasks deleted since the ``since`` cursor."""
+        page_size = request.query_params.get('page_size')
+        try:
+            page_size = positive_int(page_size)
+        except (TypeError, ValueError):
+            page_size = None
+        now = timezone.now()
+        changes = get_changes(request.user, request.query_params.get('since'), page_size, now)
+        changes['changed'] = TaskRowSerializer(
+            changes['changed'], user=request.user, many=True, now=now
+        ).data
+        return Response(changes)
+
+    @action(detail=False, methods=['get'], renderer_classes=[TaskCSVRenderer, TaskNDJSONRenderer])
+    def export(self, request):
+        """Stream the filtered tasks as CSV or NDJSON (``?format=csv|ndjson``)."""
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(request, queryset, request.accepted_renderer)
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_tasks(self, request):
+        """Import tasks from a CSV or NDJSON request body, streamed row by row."""
+        formats = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson'}
+        content_type = request.content_type.split(';')[0].strip()
+        if content_type not in formats:
+            raise UnsupportedMediaType(content_type)
+
+        errors = []
+        def report(line, row_errors):
+            if len(errors) < settings.TASK_IMPORT_MAX_REPORTED_ERRORS:
+                errors.append({'line': line, 'errors': row_errors})
+
+        # Read from the Django request: DRF's parsers would load the body.
+        lines = (line.decode('utf-8') for line in request._request)
+        try:
+            result = import_tasks(request.user, lines, formats[content_type], on_error=report)
+        except UnicodeDecodeError:
+            raise ParseError('The request body must be UTF-8 encoded.')
+        return Response({'imported': result.imported, 'failed': result.failed, 'errors': errors})
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        """Create, update or delete a batch of tasks in one request."""
+        if request.method == 'DELETE':
+            serializer = TaskBulkDeleteSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            ids = serializer.validated_data['ids']
+            if len(ids) > settings.TASK_BULK_MAX_ITEMS:
+                return self.bulk_too_large()
+            deleted = TaskService.bulk_delete(request.user, ids)
+            return Response({'deleted': deleted})
+
+        if not isinstance(request.data, list):
+            return Response(
+                {'error': 'Expected a list of tasks.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(request.data) > settings.TASK_BULK_MAX_ITEMS:
+            return self.bulk_too_large()
+
+        if request.method == 'POST':
+            serializer = TaskCreateSerializer(data=request.data, many=True)
+            serializer.is_valid(raise_exception=True)
+            tasks = TaskService.bulk_create(request.user, serializer.validated_data)
+            return Response(TaskSerializer(tasks, many=True).data, status=status.HTTP_201_CREATED)
+
+        serializer = TaskBulkUpdateSerializer(data=request.data, many=True, partial=True)
+        serializer.is_valid(raise_exception=True)
+        tasks = TaskService.bulk_update(request.user, serializer.validated_data)
+        if tasks is None:
+            return Response(
+                {'error': 'One or more tasks were not found.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(TaskSerializer(tasks, many=True).data)
+
+    def bulk_too_large(self):
+        return Response(
+            {'error': f'A bulk request may contain at most {settings.TASK_BULK_MAX_ITEMS} tasks.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+class DashboardPagination(TaskCursorPagination):
+    """First page of the task list, linking to /api/tasks/ for the next one."""
+
+    def get_base_url(self):
+        url = self.request.build_absolute_uri(reverse('task-list'))
+        if self.page_size_query_param in self.request.query_params:
+            url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return url
+
+
+class DashboardView(APIView):
+    """Profile, first page of tasks, stats and overdue tasks in one response.
+
+    Replaces the four requests the client makes on load. Stats and overdue
+    rows come from the task cache, and tasks both on the page and overdue
+    are serialized once: with nothing cached, the stats row, the page and
+    the overdue list take three queries.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @dashboard_conditional
+    def get(self, request):
+        user = request.user
+        paginator = DashboardPagination()
+        queryset = TaskRowSerializer.values(Task.objects.filter(user=user).order_by(*TaskViewSet.ordering))
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        overdue = overdue_rows(request)
+
+        now = timezone.now()
+        tasks = TaskRowSerializer(page, user=user, many=True, now=now).data
+        serialized = {task['id']: task for task in tasks}
+        rest = [row for row in overdue if row['id'] not in serialized]
+        serialized.update((task['id'], task) for task in TaskRowSerializer(rest, user=user, many=True, now=now).data)
+
+        return Response({
+            'profile': profile_data(user),
+            'tasks': paginator.get_paginated_response(tasks).data,
+            'stats': user_stats(request),
+            'overdue': [serialized[row['id']] for row in overdue],
+        })
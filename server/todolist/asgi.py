@@ -14,3 +14,13 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todolist.settings')
 
 application = get_asgi_application()
+
+# /api/async/ skips the session/CSRF middleware its JWT views don't use.
+from todolist.async_api import dispatch_async_api  # noqa: E402
+
+application = dispatch_async_api(application)
+
+# Only with TASK_OVERDUE_SWEEP_INTERVAL set; see sweep_overdue --loop.
+from tasks.overdue import start_sweeper  # noqa: E402
+
+start_sweeper()
@@ -0,0 +1,108 @@
+"""Helpers for the native async API views served under /api/async/.
+
+DRF's APIView is synchronous, so these views are plain Django async
+functions: authentication, method checks, error bodies and JSON rendering
+follow what the DRF views return.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from accounts.authentication import CachedJWTAuthentication
+
+
+ASYNC_API_PREFIX = '/api/async/'
+# Async-only endpoints outside the prefix, also served by AsyncAPIHandler.
+ASYNC_API_PATHS = {'/api/tasks/stream/'}
+
+authentication = CachedJWTAuthentication()
+renderer = JSONRenderer()
+
+
+def render(data, status=200, headers=None):
+    return HttpResponse(
+        renderer.render(data), status=status, headers=headers, content_type='application/json'
+    )
+
+
+def render_exception(request, exc):
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {'detail': exc.detail}
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers['WWW-Authenticate'] = authentication.authenticate_header(request)
+    if getattr(exc, 'wait', None):
+        headers['Retry-After'] = str(exc.wait)
+    return render(data, status=exc.status_code, headers=headers)
+
+
+def async_api_view(methods=('GET',), authenticated=True):
+    """Wrap an async view with JWT authentication, throttling and DRF-style error responses.
+
+    The view receives the Django request with ``user``/``auth`` set and a
+    DRF ``Request`` wrapper as ``request.drf`` for filters and pagination.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise exceptions.MethodNotAllowed(request.method)
+                drf_request = Request(
+                    request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES]
+                )
+                if authenticated:
+                    result = await authentication.aauthenticate(request)
+                    if result is None:
+                        raise exceptions.NotAuthenticated()
+                    drf_request.user, drf_request.auth = result
+                for throttle in [throttle() for throttle in api_settings.DEFAULT_THROTTLE_CLASSES]:
+                    if not await throttle.aallow_request(drf_request, view):
+                        raise exceptions.Throttled(throttle.wait())
+                request.drf = drf_request
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return render_exception(request, exc)
+
+        # JWT only: no session cookie is read, so there is nothing to forge.
+        inner.csrf_exempt = True
+        return inner
+    return decorator
+
+
+class AsyncAPIHandler(ASGIHandler):
+    """ASGI handler for the async API running only ASYNC_API_MIDDLEWARE.
+
+    MiddlewareMixin-based middleware runs its hooks in a thread under ASGI,
+    two thread hops per middleware per request; the JWT-only async views
+    need none of sessions, CSRF, messages or clickjacking protection.
+    """
+
+    def load_middleware(self, is_async=False):
+        # Runs once while the application module is imported.
+        middleware = settings.MIDDLEWARE
+        settings.MIDDLEWARE = settings.ASYNC_API_MIDDLEWARE
+        try:
+            super().load_middleware(is_async)
+        finally:
+            settings.MIDDLEWARE = middleware
+
+
+def dispatch_async_api(application):
+    """Wrap the Django ASGI application to serve the async API with AsyncAPIHandler."""
+    async_api = AsyncAPIHandler()
+
+    async def dispatch(scope, receive, send):
+        path = scope.get('path', '')
+        if scope['type'] == 'http' and (path.startswith(ASYNC_API_PREFIX) or path in ASYNC_API_PATHS):
+            return await async_api(scope, receive, send)
+        return await application(scope, receive, send)
+    return dispatch
@@ -0,0 +1,184 @@
+"""In-process execution of the sub-requests of POST /api/batch/.
+
+Each sub-request is resolved against the project's URLconf and its view is
+called directly, without the middleware stack. DRF views see the batch's
+authenticated user, so the JWT is verified and the user looked up once per
+batch. Each sub-request is throttled as its route.
+
+Runs of consecutive GET/HEAD sub-requests are independent and run
+concurrently on a thread pool shared by the process. Other methods run one
+at a time, in order, on the request's thread; reads after a write see it.
+Inside a transaction, reads run on the request's thread too.
+Sub-requests use the primary database: they run outside the batch's read
+replica routing, which is for the unsafe POST anyway.
+
+``API_BATCH`` limits the sub-requests per batch, the pool's threads and the
+time a batch may take; sub-requests not started by then get a 504.
+"""
+import io
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.http import Http404
+from django.urls import Resolver404, resolve
+from rest_framework import serializers
+from rest_framework.response import Response
+
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+# Request metadata copied from the batch request to its sub-requests.
+INHERITED_META = ('SERVER_NAME', 'SERVER_PORT', 'REMOTE_ADDR', 'HTTP_HOST', 'HTTP_USER_AGENT')
+
+
+def get_settings():
+    return getattr(settings, 'API_BATCH', {})
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(get_settings().get('WORKERS', 4), thread_name_prefix='api-batch')
+        return _executor
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=['GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'])
+    path = serializers.RegexField(r'^/', max_length=2048)
+    body = serializers.JSONField(required=False, allow_null=True)
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        limit = get_settings().get('MAX_REQUESTS', 20)
+        if len(value) > limit:
+            raise serializers.ValidationError(f'A batch can have at most {limit} requests.')
+        return value
+
+
+def error(status, detail):
+    return {'status': status, 'headers': {}, 'body': {'detail': detail}}
+
+
+def build_request(parent, item, match):
+    """A WSGIRequest for the sub-request ``item``, authenticated as ``parent``'s user."""
+    path, _, query = item['path'].partition('?')
+    body = b'' if item.get('body') is None else json.dumps(item['body']).encode()
+    environ = {key: parent.META[key] for key in INHERITED_META if key in parent.META}
+    environ.update({
+        'REQUEST_METHOD': item['method'],
+        'PATH_INFO': path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.url_scheme': parent.scheme,
+    })
+    for name, value in item.get('headers', {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+
+    request = WSGIRequest(environ)
+    request.resolver_match = match
+    # Picked up by DRF's Request in place of the configured authenticators.
+    request._force_auth_user = parent.user
+    request._force_auth_token = parent.auth
+    request.user = parent.user
+    return request
+
+
+def response_body(response):
+    if isinstance(response, Response):
+        return response.data
+    if not response.content:
+        return None
+    if 'json' in response.get('Content-Type', ''):
+        return json.loads(response.content)
+    return response.content.decode(response.charset)
+
+
+def run(parent, item):
+    """Run one sub-request; return its status, headers and body."""
+    try:
+        match = resolve(item['path'].partition('?')[0])
+    except Resolver404:
+        return error(404, 'Not found.')
+    if match.url_name in get_settings().get('EXCLUDED_ROUTES', ()) or iscoroutinefunction(match.func):
+        return error(400, 'This route cannot be part of a batch.')
+
+    try:
+        response = match.func(build_request(parent, item, match), *match.args, **match.kwargs)
+    except Http404:
+        return error(404, 'Not found.')
+    except Exception:
+        logger.exception('Batch sub-request %s %s failed', item['method'], item['path'])
+        return error(500, 'Server error.')
+    if response.streaming:
+        response.close()
+        return error(400, 'Streaming responses cannot be part of a batch.')
+    return {
+        'status': response.status_code,
+        'headers': {name: value for name, value in response.items() if name != 'Content-Type'},
+        'body': response_body(response),
+    }
+
+
+def run_in_worker(parent, item):
+    try:
+        return run(parent, item)
+    finally:
+        close_old_connections()
+
+
+def execute(parent, items):
+    """Run the sub-requests ``items`` of the batch request ``parent``, in order."""
+    deadline = time.monotonic() + get_settings().get('TIMEOUT', 10)
+    results = [None] * len(items)
+    position = 0
+    while position < len(items):
+        if time.monotonic() >= deadline:
+            break
+        if items[position]['method'] not in SAFE_METHODS:
+            results[position] = run(parent, items[position])
+            position += 1
+            continue
+
+        end = position
+        while end < len(items) and items[end]['method'] in SAFE_METHODS:
+            end += 1
+        if end - position == 1 or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Pool threads have their own connections, which wouldn't see
+            # this transaction's writes.
+            for index in range(position, end):
+                results[index] = run(parent, items[index])
+        else:
+            futures = {
+                get_executor().submit(run_in_worker, parent, items[index]): index
+                for index in range(position, end)
+            }
+            done, pending = wait(futures, timeout=max(0, deadline - time.monotonic()))
+            for future in done:
+                results[futures[future]] = future.result()
+            for future in pending:
+                future.cancel()
+        position = end
+
+    return [result or error(504, 'Batch time limit exceeded.') for result in results]
@@ -0,0 +1,261 @@
+"""Per-route API benchmarks driven through Django's test client.
+
+Each route is requested with a real JWT ``Authorization`` header, the full
+middleware stack and the configured database, recording latency, query
+count and peak Python memory.
+"""
+import itertools
+import json
+import math
+import time
+import tracemalloc
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from accounts.tokens import RefreshToken
+from tasks.cache import task_cache
+from tasks.models import Task
+
+from .throttling import buckets
+
+
+RouteResult = namedtuple('RouteResult', [
+    'name', 'method', 'path', 'status', 'iterations',
+    'p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'queries', 'peak_kib', 'errors',
+])
+
+
+class Route:
+    """A request to benchmark.
+
+    ``path`` and ``data`` may be callables taking the BenchmarkContext, for
+    requests that need fresh state (a new task to delete, a unique email).
+    """
+
+    def __init__(self, name, method, path, data=None, auth=True, expected_status=200):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.auth = auth
+        self.expected_status = expected_status
+
+    def build(self, context):
+        path = self.path(context) if callable(self.path) else self.path
+        data = self.data(context) if callable(self.data) else self.data
+        return path, data
+
+
+class BenchmarkContext:
+    """The user the routes act as, plus helpers producing per-request state."""
+
+    def __init__(self, user, password):
+        self.user = user
+        self.password = password
+        self.access_token = str(RefreshToken.for_user(user).access_token)
+        self.sequence = itertools.count()
+        ids = Task.objects.filter(user=user).order_by('-created_at', '-id').values_list('id', flat=True)
+        self.task_ids = list(ids[:100])
+        self.deep_page = None
+
+    def task_id(self):
+        return self.task_ids[next(self.sequence) % len(self.task_ids)]
+
+    def new_task_id(self):
+        return Task.objects.create(user=self.user, title=f'Benchmark task {next(self.sequence)}').id
+
+    def unique_email(self):
+        return f'bench-{time.time_ns()}-{next(self.sequence)}@benchmark.example.com'
+
+    def refresh_token(self):
+        return str(RefreshToken.for_user(self.user))
+
+    def deep_page_path(self, client):
+        """Follow ``next`` links to roughly the middle of the user's task list."""
+        if self.deep_page is None:
+            total = Task.objects.filter(user=self.user).count()
+            path = '/api/tasks/?page_size=100'
+            for _ in range(total // 200):
+                response = client.get(path, HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+                path = response.json()['next'] or path
+            self.deep_page = path
+        return self.deep_page
+
+
+def api_routes(client):
+    """Every route in tasks/urls.py and accounts/urls.py, plus the dashboard, batch and token views."""
+    def task_detail(context):
+        return f'/api/tasks/{context.task_id()}/'
+
+    def new_task_detail(context):
+        return f'/api/tasks/{context.new_task_id()}/'
+
+    def bulk_tasks(context):
+        return [{'title': f'Bulk {n}', 'priority': 'low'} for n in range(50)]
+
+    def bulk_updates(context):
+        return [{'id': task_id, 'priority': 'high'} for task_id in context.task_ids[:50]]
+
+    def bulk_deletes(context):
+        return {'ids': [context.new_task_id() for _ in range(5)]}
+
+    def registration(context):
+        return {
+            'email': context.unique_email(), 'first_name': 'Bench', 'last_name': 'Mark',
+            'password': 'benchmark-pass', 'password_confirm': 'benchmark-pass',
+        }
+
+    def credentials(context):
+        return {'email': context.user.email, 'password': context.password}
+
+    def refresh(context):
+        return {'refresh': context.refresh_token()}
+
+    def logout(context):
+        return {'refresh_token': context.refresh_token()}
+
+    def batch(context):
+        # A write and a read: both run on the request's thread and connection.
+        return {'requests': [
+            {'method': 'PATCH', 'path': f'{task_detail(context)}update_status/', 'body': {'status': 'done'}},
+            {'method': 'GET', 'path': '/api/tasks/stats/'},
+        ]}
+
+    return [
+        Route('tasks.list', 'GET', '/api/tasks/'),
+        Route('tasks.list.ordered', 'GET', '/api/tasks/?ordering=due_date'),
+        Route('tasks.list.filtered', 'GET', '/api/tasks/?status=todo&priority=high'),
+        Route('tasks.list.deep_page', 'GET', lambda context: context.deep_page_path(client)),
+        Route('tasks.list.search', 'GET', '/api/tasks/?search=review'),
+        Route('tasks.retrieve', 'GET', task_detail),
+        Route('tasks.create', 'POST', '/api/tasks/', {'title': 'Benchmark', 'priority': 'high'},
+              expected_status=201),
+        Route('tasks.update', 'PUT', task_detail, {'title': 'Updated', 'priority': 'low', 'status': 'todo'}),
+        Route('tasks.partial_update', 'PATCH', task_detail, {'priority': 'medium'}),
+        Route('tasks.update_status', 'PATCH', lambda context: f'{task_detail(context)}update_status/',
+              {'status': 'in_progress'}),
+        Route('tasks.destroy', 'DELETE', new_task_detail, expected_status=204),
+        Route('tasks.overdue', 'GET', '/api/tasks/overdue/'),
+        Route('tasks.stats', 'GET', '/api/tasks/stats/'),
+        Route('tasks.changes', 'GET', '/api/tasks/changes/?page_size=50'),
+        Route('tasks.export', 'GET', '/api/tasks/export/?format=csv'),
+        Route('tasks.export.ndjson', 'GET', '/api/tasks/export/?format=ndjson&status=todo'),
+        Route('tasks.bulk_create', 'POST', '/api/tasks/bulk/', bulk_tasks, expected_status=201),
+        Route('tasks.bulk_update', 'PATCH', '/api/tasks/bulk/', bulk_updates),
+        Route('tasks.bulk_delete', 'DELETE', '/api/tasks/bulk/', bulk_deletes),
+        Route('dashboard', 'GET', '/api/dashboard/'),
+        Route('batch', 'POST', '/api/batch/', batch),
+        Route('auth.register', 'POST', '/api/auth/register/', registration, auth=False),
+        Route('auth.login', 'POST', '/api/auth/login/', credentials, auth=False),
+        Route('auth.profile', 'GET', '/api/auth/profile/'),
+        Route('auth.logout', 'POST', '/api/auth/logout/', logout),
+        Route('auth.refresh', 'POST', '/api/auth/refresh/', refresh, auth=False),
+        Route('auth.jwks', 'GET', '/api/auth/jwks/', auth=False),
+        Route('token.obtain', 'POST', '/api/token/', credentials, auth=False),
+        Route('token.refresh', 'POST', '/api/token/refresh/', refresh, auth=False),
+    ]
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def send(client, route, context, path, data):
+    headers = {'HTTP_AUTHORIZATION': f'Bearer {context.access_token}'} if route.auth else {}
+    if route.method == 'GET':
+        response = client.get(path, **headers)
+    else:
+        body = json.dumps(data) if data is not None else None
+        response = client.generic(route.method, path, body, content_type='application/json', **headers)
+    if response.streaming:
+        # Streamed bodies are produced as they are read.
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def benchmark_route(client, route, context, iterations=50, warmup=5):
+    """Request a route repeatedly and summarize latency, queries and memory."""
+    timings = []
+    queries = 0
+    errors = 0
+    status = None
+    for n in range(warmup + iterations):
+        # Built outside the measurement: building may create rows.
+        path, data = route.build(context)
+        # Requests are still throttled, but never run out of tokens.
+        buckets.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = send(client, route, context, path, data)
+            elapsed = time.perf_counter() - started
+        if n < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        queries = max(queries, len(captured))
+        status = response.status_code
+        if status != route.expected_status:
+            errors += 1
+
+    # Measured separately: tracing allocations slows every request down.
+    path, data = route.build(context)
+    tracemalloc.start()
+    try:
+        send(client, route, context, path, data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return RouteResult(
+        name=route.name,
+        method=route.method,
+        path=path,
+        status=status,
+        iterations=iterations,
+        p50_ms=round(percentile(timings, 50), 3),
+        p90_ms=round(percentile(timings, 90), 3),
+        p99_ms=round(percentile(timings, 99), 3),
+        max_ms=round(max(timings), 3),
+        queries=queries,
+        peak_kib=round(peak / 1024, 1),
+        errors=errors,
+    )
+
+
+def run_benchmarks(context, iterations=50, warmup=5, names=None):
+    client = APIClient(raise_request_exception=False)
+    results = []
+    # The test client's default host, allowed here as the test runner does.
+    # Every request is served by this process, so a local task cache is coherent.
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), \
+            task_cache.single_process_mode():
+        for route in api_routes(client):
+            if names and route.name not in names:
+                continue
+            results.append(benchmark_route(client, route, context, iterations, warmup))
+    return results
+
+
+def check_budgets(results, budgets):
+    """Return messages for routes that failed or exceeded their budget.
+
+    ``budgets`` maps route names to ``{"queries": n, "p90_ms": ms}``; either
+    key may be omitted.
+    """
+    violations = []
+    for result in results:
+        if result.errors:
+            violations.append(f'{result.name}: {result.errors} requests returned an unexpected status '
+                              f'(last {result.status})')
+        budget = budgets.get(result.name, {})
+        if 'queries' in budget and result.queries > budget['queries']:
+            violations.append(f'{result.name}: {result.queries} queries, budget {budget["queries"]}')
+        if 'p90_ms' in budget and result.p90_ms > budget['p90_ms']:
+            violations.append(f'{result.name}: p90 {result.p90_ms} ms, budget {budget["p90_ms"]} ms')
+    return violations
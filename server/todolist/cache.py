@@ -0,0 +1,46 @@
+"""Cache backends for the CACHES setting.
+
+Caches are shared through Redis when ``REDIS_URL`` is set. Without it each
+process uses LocMemCache below, a local stand-in for development and tests
+that counts its evictions the way Redis reports ``evicted_keys``.
+"""
+from collections import Counter
+
+from django.core.cache.backends import locmem
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.redis import RedisCache
+
+
+_evictions = Counter()
+
+
+class LocMemCache(locmem.LocMemCache):
+    """Django's LocMemCache, counting the entries culled to stay under MAX_ENTRIES."""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.name = name
+
+    def _cull(self):
+        # Called with the cache's lock held.
+        size = len(self._cache)
+        super()._cull()
+        _evictions[self.name] += size - len(self._cache)
+
+    def evictions(self):
+        return _evictions[self.name]
+
+
+def evictions(cache):
+    """Entries the cache evicted to make room, or None if the backend cannot tell."""
+    if isinstance(cache, LocMemCache):
+        return cache.evictions()
+    if isinstance(cache, RedisCache):
+        # Counts evictions of the whole Redis server, not only this cache's keys.
+        return cache._cache.get_client().info('stats').get('evicted_keys')
+    return None
+
+
+def is_shared(cache):
+    """Whether every worker process sees the same entries of ``cache``."""
+    return not isinstance(cache, (locmem.LocMemCache, DummyCache))
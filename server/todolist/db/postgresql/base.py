@@ -0,0 +1,158 @@
+"""PostgreSQL backend with optional connection pooling (psycopg_pool).
+
+Set ``OPTIONS['pool']`` to True, or to ConnectionPool arguments such as
+``min_size``, ``max_size`` and ``timeout``, to borrow connections from a pool
+shared by the threads of the process instead of connecting for every
+request; closing the Django connection returns it to the pool. With
+CONN_HEALTH_CHECKS the pool checks a connection before handing it out. The
+option follows the pooling built into Django 5.1, so switching back to
+``django.db.backends.postgresql`` after upgrading keeps the settings.
+
+Connection acquisition times are recorded per alias and reported, with the
+pool's own counters, by pool_metrics().
+"""
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base, creation
+
+from todolist.instrumentation import Histogram
+
+
+# Upper bounds (ms) of the acquisition latency buckets; the last one is open.
+ACQUIRE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 100, 1000)
+
+_pools = {}
+_acquisitions = {}
+_lock = threading.Lock()
+
+
+def observe_acquisition(alias, milliseconds):
+    with _lock:
+        if alias not in _acquisitions:
+            _acquisitions[alias] = Histogram(ACQUIRE_BUCKETS)
+        _acquisitions[alias].observe(milliseconds)
+
+
+def pool_metrics():
+    """Per alias: acquisition latency and, when pooled, connections in use and waiting."""
+    with _lock:
+        acquisitions = {alias: histogram.as_dict() for alias, histogram in _acquisitions.items()}
+        pools = dict(_pools)
+    metrics = {alias: {'pooled': False, 'acquire_ms': data} for alias, data in acquisitions.items()}
+    for (alias, _), pool in pools.items():
+        stats = pool.get_stats()
+        size, available = stats.get('pool_size', 0), stats.get('pool_available', 0)
+        metrics.setdefault(alias, {'acquire_ms': None}).update({
+            'pooled': True,
+            'size': size,
+            'min_size': pool.min_size,
+            'max_size': pool.max_size,
+            'in_use': size - available,
+            'available': available,
+            'waiting': stats.get('requests_waiting', 0),
+            'requests': stats.get('requests_num', 0),
+            'requests_queued': stats.get('requests_queued', 0),
+            'requests_wait_ms': stats.get('requests_wait_ms', 0),
+            'requests_errors': stats.get('requests_errors', 0),
+            'connections_opened': stats.get('connections_num', 0),
+            'connections_lost': stats.get('connections_lost', 0),
+        })
+    return metrics
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Pooled connections to the test database would block DROP DATABASE.
+        self.connection.close_pool()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    @property
+    def pool(self):
+        """This process's pool for the database, or None without pooling."""
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if self.alias == NO_DB_ALIAS or not options:
+            return None
+        # Keyed by name too: the test runner renames the database.
+        key = (self.alias, self.settings_dict['NAME'])
+        pool = _pools.get(key)
+        if pool is not None:
+            return pool
+
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured('Pooled connections cannot be persistent; set CONN_MAX_AGE to 0.')
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError as exc:
+            raise ImproperlyConfigured('OPTIONS["pool"] requires the psycopg-pool package.') from exc
+
+        kwargs = self.get_connection_params()
+        # Django sets the connection's autocommit mode after checkout.
+        kwargs['autocommit'] = True
+        pool = ConnectionPool(
+            kwargs=kwargs,
+            open=False,
+            check=ConnectionPool.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+            name=self.alias,
+            **({} if options is True else options),
+        )
+        with _lock:
+            pool = _pools.setdefault(key, pool)
+        return pool
+
+    def close_pool(self):
+        """Close this alias's pools; connections still checked out are closed on return."""
+        with _lock:
+            pools = [_pools.pop(key) for key in list(_pools) if key[0] == self.alias]
+        for pool in pools:
+            pool.close()
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        started = time.perf_counter()
+        if pool is None:
+            connection = super().get_new_connection(conn_params)
+        else:
+            connection = self.get_pooled_connection(pool)
+        observe_acquisition(self.alias, (time.perf_counter() - started) * 1000)
+        return connection
+
+    def get_pooled_connection(self, pool):
+        # The isolation level handling of the parent's get_new_connection().
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            self.isolation_level = base.IsolationLevel(
+                base.IsolationLevel.READ_COMMITTED if isolation_level is None else isolation_level
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f'Invalid transaction isolation level {isolation_level} specified. '
+                f'Use one of the psycopg.IsolationLevel values.'
+            )
+        # Opens the pool on first use; a no-op afterwards.
+        pool.open()
+        connection = pool.getconn()
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        pool = getattr(self.connection, '_pool', None)
+        if pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # The pool rolls back an open transaction before reusing the
+            # connection, and closes it if the pool has been closed.
+            pool.putconn(self.connection)
@@ -0,0 +1,298 @@
+"""Per-request query counts and timings, Server-Timing headers and route metrics.
+
+Queries are timed with database execute wrappers rather than DEBUG query
+logging, so the cost per query is two clock reads and a comparison. The
+wrapper is installed on every connection and finds the request's metrics
+in a context variable, which sync_to_async copies into its threads: the
+async ORM's queries are counted like the others.
+"""
+import bisect
+import heapq
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last one is open.
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+SLOWEST_QUERIES = 5
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def get_settings():
+    return getattr(settings, 'REQUEST_INSTRUMENTATION', {})
+
+
+class RequestMetrics:
+    """Timings collected while handling one request, in seconds."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.view = 0.0
+        self.total = 0.0
+        self.view_started = None
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db += elapsed
+            if len(self.slowest) < SLOWEST_QUERIES:
+                heapq.heappush(self.slowest, (elapsed, self.queries, sql))
+            elif elapsed > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (elapsed, self.queries, sql))
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize * 1000:.1f}',
+            f'view;dur={self.view * 1000:.1f}',
+            f'total;dur={self.total * 1000:.1f}',
+        ])
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper timing the query for the request in the current context."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_timing(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        # First in the list: execute_wrapper() removes the last one on exit.
+        connection.execute_wrappers.insert(0, record_query)
+
+
+# Connections opened by threads after this; time_queries() covers the others.
+connection_created.connect(install_query_timing)
+
+
+def current_metrics():
+    """The metrics of the request being handled, or None outside one."""
+    return _current.get()
+
+
+class TimedSerializerMixin:
+    """Count a DRF serializer's ``.data`` towards the request's serializer time."""
+
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+
+@contextmanager
+def timed_serialization():
+    """Add the enclosed time to the current request's serializer time."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialize += time.perf_counter() - started
+
+
+class Histogram:
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def as_dict(self):
+        bounds = [str(bound) for bound in self.bounds] + ['+Inf']
+        return {'buckets': dict(zip(bounds, self.counts)), 'sum': round(self.sum, 3)}
+
+
+class RouteMetrics:
+    """Histograms for one route: latency, DB time, serializer time and queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = Histogram()
+        self.db_ms = Histogram()
+        self.serialize_ms = Histogram()
+        self.queries = Histogram()
+
+    def observe(self, metrics, status_code):
+        self.count += 1
+        if status_code >= 500:
+            self.errors += 1
+        self.total_ms.observe(metrics.total * 1000)
+        self.db_ms.observe(metrics.db * 1000)
+        self.serialize_ms.observe(metrics.serialize * 1000)
+        self.queries.observe(metrics.queries)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': self.total_ms.as_dict(),
+            'db_ms': self.db_ms.as_dict(),
+            'serialize_ms': self.serialize_ms.as_dict(),
+            'queries': self.queries.as_dict(),
+        }
+
+
+class MetricsRegistry:
+    """In-process aggregate of request metrics keyed by method and route name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def observe(self, route, metrics, status_code):
+        with self._lock:
+            if route not in self._routes:
+                self._routes[route] = RouteMetrics()
+            self._routes[route].observe(metrics, status_code)
+
+    def snapshot(self):
+        with self._lock:
+            return {route: data.as_dict() for route, data in sorted(self._routes.items())}
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+registry = MetricsRegistry()
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return f'{request.method} {match.view_name if match else "<unresolved>"}'
+
+
+class InstrumentationMiddleware:
+    """Record query count and DB, serializer, view and total time per request.
+
+    Adds a ``Server-Timing`` header, feeds the route histograms served by
+    the metrics endpoint and logs a sample of slow requests with their
+    slowest SQL statements. Must be the first entry in MIDDLEWARE.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django runs sync hooks in a thread under ASGI; these don't block.
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+        options = get_settings()
+        self.enabled = options.get('ENABLED', True)
+        self.server_timing = options.get('SERVER_TIMING', True)
+        self.slow_request_ms = options.get('SLOW_REQUEST_MS', 500)
+        self.slow_sample_rate = options.get('SLOW_REQUEST_SAMPLE_RATE', 0.1)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        self.time_queries()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        self.time_queries()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, metrics)
+        return response
+
+    def time_queries(self):
+        # Connections of this thread may predate the connection_created hook.
+        for alias in connections:
+            install_query_timing(connections[alias])
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.start_view()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.start_view()
+
+    def process_template_response(self, request, response):
+        return self.render(response)
+
+    async def aprocess_template_response(self, request, response):
+        return await sync_to_async(self.render)(response)
+
+    def start_view(self):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view_started = time.perf_counter()
+
+    def render(self, response):
+        # DRF responses render after the view returns; time that separately.
+        metrics = _current.get()
+        if metrics is not None and metrics.view_started is not None:
+            metrics.view = time.perf_counter() - metrics.view_started
+            with timed_serialization():
+                response.render()
+        return response
+
+    def finish(self, request, response, metrics):
+        metrics.total = time.perf_counter() - metrics.started
+        if metrics.view_started is not None and not metrics.view:
+            metrics.view = time.perf_counter() - metrics.view_started
+        route = route_name(request)
+        registry.observe(route, metrics, response.status_code)
+        if self.server_timing:
+            response['Server-Timing'] = metrics.server_timing()
+        if metrics.total * 1000 >= self.slow_request_ms and random.random() < self.slow_sample_rate:
+            statements = ''.join(
+                f'\n  {elapsed * 1000:.1f} ms: {sql}' for elapsed, _, sql in sorted(metrics.slowest, reverse=True)
+            )
+            logger.warning(
+                'Slow request %s %s (%s): %.1f ms total, %.1f ms in %d queries, %.1f ms serializing.'
+                ' Slowest queries:%s',
+                request.method, request.path, route, metrics.total * 1000,
+                metrics.db * 1000, metrics.queries, metrics.serialize * 1000, statements,
+            )
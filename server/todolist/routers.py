@@ -0,0 +1,163 @@
+"""Read replica routing.
+
+Reads made while handling a safe (GET, HEAD, OPTIONS) request go to one of
+the ``DATABASE_REPLICAS['ALIASES']`` databases, picked once per request.
+Everything else uses the primary: writes, unsafe requests, transactions,
+and work outside requests such as management commands and the overdue
+sweep.
+
+Replicas lag behind the primary, so a user whose data was written in the
+last ``STICKY_SECONDS`` keeps reading from the primary, in every worker:
+the pin is kept in the ``CACHE`` cache, which must therefore be shared
+between workers (ReplicaRoutingMiddleware refuses to start otherwise).
+Users are known from their JWT (accounts.authentication sets them for the
+request), which happens before the view's first query.
+"""
+import logging
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .cache import is_shared
+
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_current = ContextVar('database_routing', default=None)
+
+
+def get_settings():
+    return getattr(settings, 'DATABASE_REPLICAS', {})
+
+
+def replica_aliases():
+    return get_settings().get('ALIASES', [])
+
+
+class RoutingState:
+    """Routing decisions for one request."""
+
+    def __init__(self, method):
+        self.primary = method not in SAFE_METHODS
+        self.user_id = None
+        self.user_pinned = None
+        self.replica = None
+        self.wrote = False
+
+
+@contextmanager
+def request_routing(method):
+    """Route the reads of a request with this HTTP method."""
+    token = _current.set(RoutingState(method))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def set_request_user(user_id):
+    """Record the authenticated user of the current request, if any."""
+    state = _current.get()
+    if state is not None and state.user_id != user_id:
+        state.user_id = user_id
+        state.user_pinned = None
+
+
+def pin_key(user_id):
+    return f'db:primary:{user_id}'
+
+
+def pin_user(user_id):
+    """Send the user's reads to the primary for the next STICKY_SECONDS."""
+    if not replica_aliases():
+        return
+    try:
+        caches[get_settings().get('CACHE', 'default')].set(
+            pin_key(user_id), True, get_settings().get('STICKY_SECONDS', 5)
+        )
+    except Exception:
+        logger.warning('Could not pin user %s to the primary database', user_id, exc_info=True)
+
+
+def user_is_pinned(user_id):
+    try:
+        return bool(caches[get_settings().get('CACHE', 'default')].get(pin_key(user_id)))
+    except Exception:
+        logger.warning('Could not read the primary database pin of user %s', user_id, exc_info=True)
+        return True
+
+
+class ReplicaRouter:
+    """Send safe request reads to a replica unless the user has written recently."""
+
+    def db_for_read(self, model, **hints):
+        aliases = replica_aliases()
+        state = _current.get()
+        if not aliases or state is None or state.primary:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        if state.user_id is not None:
+            if state.user_pinned is None:
+                state.user_pinned = user_is_pinned(state.user_id)
+            if state.user_pinned:
+                return None
+        if state.replica is None:
+            state.replica = random.choice(aliases)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None and not state.wrote:
+            state.wrote = True
+            if state.user_id is not None:
+                pin_user(state.user_id)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the primary's schema through replication.
+        return False if db in replica_aliases() else None
+
+
+class ReplicaRoutingMiddleware:
+    """Scope database routing decisions to each request."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        alias = get_settings().get('CACHE', 'default')
+        if replica_aliases() and not is_shared(caches[alias]):
+            # A pin set in one worker would not keep the user's reads in
+            # the others on the primary.
+            raise ImproperlyConfigured(
+                f'Read replicas need a cache shared between workers for the primary pins; '
+                f'the {alias!r} cache is local to each process (set REDIS_URL).'
+            )
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_routing(request.method):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with request_routing(request.method):
+            return await self.get_response(request)
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     # Third party apps
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
     # Local apps
     'accounts',
@@ -48,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'todolist.instrumentation.InstrumentationMiddleware',
+    'todolist.routers.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -58,6 +61,14 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Middleware for the native async views under /api/async/ (see
+# todolist.async_api.AsyncAPIHandler); all of it runs without thread hops.
+ASYNC_API_MIDDLEWARE = [
+    'todolist.instrumentation.InstrumentationMiddleware',
+    'todolist.routers.ReplicaRoutingMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+]
+
 ROOT_URLCONF = 'todolist.urls'
 
 TEMPLATES = [
@@ -80,17 +91,98 @@ WSGI_APPLICATION = 'todolist.wsgi.application'
 
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Connections are borrowed from a per-process pool of DB_POOL_MIN_SIZE to
+# DB_POOL_MAX_SIZE connections (see todolist.db.postgresql); requests wait up
+# to DB_POOL_TIMEOUT seconds for a free one. Pooled connections are closed
+# after DB_POOL_MAX_IDLE seconds unused and DB_POOL_MAX_LIFETIME seconds in
+# total. With DB_POOL=0, DB_CONN_MAX_AGE keeps each thread's connection open
+# for that many seconds instead (0 connects per request). Health checks test
+# reused connections before handing them out.
+#
+# DB_ENGINE=sqlite uses the SQLite file DB_NAME (default db.sqlite3 next to
+# manage.py) instead: for running the server and the test suite without
+# Postgres. The pool and read replicas are Postgres-only.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'postgresql')
+if DB_ENGINE not in ('postgresql', 'sqlite'):
+    raise ImproperlyConfigured(f'DB_ENGINE must be "postgresql" or "sqlite", not {DB_ENGINE!r}.')
+
+DB_POOL = os.environ.get('DB_POOL', '1') == '1'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'todolist.db.postgresql',
         'NAME': os.environ.get('DB_NAME', 'todolist'),
         'USER': os.environ.get('DB_USER', 'todouser'),
         'PASSWORD': os.environ.get('DB_PASSWORD', 'todopassword'),
         'HOST': os.environ.get('DB_HOST', 'db'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', '0')),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+                'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+                'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+                'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', '300')),
+                'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', '3600')),
+            },
+        } if DB_POOL else {},
+    }
+}
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', str(BASE_DIR / 'db.sqlite3')),
+        }
+    }
+
+# Read replicas of the default database, as comma-separated host[:port][/name]
+# entries (port and name default to the primary's). Reads of safe requests
+# go to a replica unless the user wrote in the last DB_REPLICA_STICKY_SECONDS
+# (see todolist.routers); pins are shared through the CACHE cache, so
+# replicas also need REDIS_URL.
+DB_REPLICAS = os.environ.get('DB_REPLICAS', '') if DB_ENGINE == 'postgresql' else ''
+for n, replica in enumerate(filter(None, DB_REPLICAS.split(',')), 1):
+    address, _, name = replica.strip().partition('/')
+    host, _, port = address.partition(':')
+    DATABASES[f'replica{n}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['todolist.routers.ReplicaRouter']
+
+DATABASE_REPLICAS = {
+    'ALIASES': [alias for alias in DATABASES if alias != 'default'],
+    'STICKY_SECONDS': int(os.environ.get('DB_REPLICA_STICKY_SECONDS', '5')),
+    'CACHE': 'default',
+}
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/ref/settings/#caches
+# Shared between workers through Redis when REDIS_URL is set; otherwise each
+# process keeps a local in-memory stand-in (todolist.cache.LocMemCache).
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'todolist.cache.LocMemCache',
+        'LOCATION': 'todolist',
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('LOCAL_CACHE_MAX_ENTRIES', '10000'))},
     }
 }
 
@@ -113,6 +205,21 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The first hasher hashes new passwords; hashes made by the others still
+# verify and are upgraded on the user's next login. PASSWORD_HASHER picks
+# the preferred one (argon2 requires the argon2-cffi package).
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHER = PASSWORD_HASHER_CHOICES[os.environ.get('PASSWORD_HASHER', 'pbkdf2')]
+PASSWORD_HASHERS = [PASSWORD_HASHER] + [
+    hasher for hasher in PASSWORD_HASHER_CHOICES.values() if hasher != PASSWORD_HASHER
+]
+
+AUTHENTICATION_BACKENDS = ['accounts.backends.PooledPasswordBackend']
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -139,7 +246,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -151,6 +258,13 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'todolist.throttling.TokenBucketThrottle',
+    ],
+    # Trusted proxies in front of the API, each appending to X-Forwarded-For.
+    # With 0 the throttles key anonymous clients on REMOTE_ADDR, since the
+    # header can be set by the client.
+    'NUM_PROXIES': int(os.environ.get('API_NUM_PROXIES', '0')),
 }
 
 # JWT Configuration
@@ -175,17 +289,33 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'USER_AUTHENTICATION_RULE': 'rest_framework_simplejwt.authentication.default_user_authentication_rule',
     
-    'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    'AUTH_TOKEN_CLASSES': ('accounts.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.serializers.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.TokenRefreshSerializer',
 }
 
-REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ),
-    'DEFAULT_PERMISSION_CLASSES': [
-        'rest_framework.permissions.IsAuthenticated',
-    ],
+# Asymmetric token signing (accounts.keys). With JWT_KEYS_DIR set, tokens
+# are signed by the JWT_ACTIVE_KEY key of that directory (<kid>.pem files,
+# see `manage.py generate_signing_key`), and other services can verify them
+# with the public keys at /api/auth/jwks/. Without it, tokens use HS256
+# with SECRET_KEY. Such legacy tokens are still accepted after switching
+# while JWT_ACCEPT_LEGACY_HS256 is 1.
+JWT_KEYS = {
+    'DIRECTORY': os.environ.get('JWT_KEYS_DIR') or None,
+    'ACTIVE': os.environ.get('JWT_ACTIVE_KEY') or None,
+    'ACCEPT_LEGACY_HS256': os.environ.get('JWT_ACCEPT_LEGACY_HS256', '1') == '1',
+    'RELOAD_INTERVAL': int(os.environ.get('JWT_KEYS_RELOAD_INTERVAL', '30')),
+    'JWKS_MAX_AGE': int(os.environ.get('JWT_JWKS_MAX_AGE', '300')),
+}
+
+# Revoked refresh tokens are checked against a per-process index of the
+# blacklist table (accounts.tokens), refreshed at most every SYNC_INTERVAL
+# seconds. `manage.py purge_expired_tokens --loop` keeps the tables small.
+TOKEN_REVOCATION = {
+    'SYNC_INTERVAL': float(os.environ.get('TOKEN_REVOCATION_SYNC_INTERVAL', '1')),
+    'PURGE_BATCH_SIZE': int(os.environ.get('TOKEN_PURGE_BATCH_SIZE', '1000')),
 }
 
 # CORS Configuration for React Frontend
@@ -204,3 +334,130 @@ ALLOWED_HOSTS = ['localhost', '127.0.0.1', '0.0.0.0']
 
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.CustomUser'
+
+# Task stats: keep per-user counters updated on task writes so
+# /api/tasks/stats/ does not scan the user's task rows.
+TASK_STATS_COUNTERS = os.environ.get('TASK_STATS_COUNTERS', '1') == '1'
+
+# ETag/Last-Modified validators for task reads roll over at this interval
+# (seconds) because is_overdue/days_until_due depend on the current time.
+TASK_ETAG_TIME_WINDOW = int(os.environ.get('TASK_ETAG_TIME_WINDOW', '60'))
+
+# The overdue flags and counters are kept current by one sweeper per
+# deployment: `manage.py sweep_overdue --loop` (the sweeper service in
+# docker-compose.yml). Setting this starts an in-process sweeper every that
+# many seconds in each WSGI/ASGI worker instead, for single-worker setups.
+TASK_OVERDUE_SWEEP_INTERVAL = int(os.environ.get('TASK_OVERDUE_SWEEP_INTERVAL', '0'))
+
+# Maximum number of tasks accepted by a single /api/tasks/bulk/ request.
+TASK_BULK_MAX_ITEMS = int(os.environ.get('TASK_BULK_MAX_ITEMS', '10000'))
+
+# Rows fetched per server-side cursor round trip (and encoded per streamed
+# chunk) by /api/tasks/export/.
+TASK_EXPORT_CHUNK_SIZE = int(os.environ.get('TASK_EXPORT_CHUNK_SIZE', '2000'))
+
+# Task imports (`manage.py import_tasks`, /api/tasks/import/) load valid
+# rows in transactions of this many rows; the API reports at most
+# TASK_IMPORT_MAX_REPORTED_ERRORS invalid rows in its response.
+TASK_IMPORT_CHUNK_SIZE = int(os.environ.get('TASK_IMPORT_CHUNK_SIZE', '5000'))
+TASK_IMPORT_MAX_REPORTED_ERRORS = int(os.environ.get('TASK_IMPORT_MAX_REPORTED_ERRORS', '1000'))
+
+# Delta sync at /api/tasks/changes/: rows per page (and the page_size
+# maximum), seconds of recent writes repeated on the next sync to cover
+# commits landing out of timestamp order, and how long deletions are kept.
+# Cursors older than the retention get 410 and must refetch the task list.
+TASK_SYNC = {
+    'PAGE_SIZE': int(os.environ.get('TASK_SYNC_PAGE_SIZE', '500')),
+    'OVERLAP_SECONDS': int(os.environ.get('TASK_SYNC_OVERLAP_SECONDS', '5')),
+    'TOMBSTONE_RETENTION_DAYS': int(os.environ.get('TASK_TOMBSTONE_RETENTION_DAYS', '30')),
+}
+
+# Task change events streamed at /api/tasks/stream/ (ASGI only). HUB fans
+# events out within one process; with several workers point it at a
+# broker-backed subclass of tasks.events.EventHub. Streams send a comment
+# every HEARTBEAT_SECONDS, close after MAX_STREAM_SECONDS so clients
+# reconnect, and hold at most QUEUE_SIZE undelivered events.
+TASK_EVENTS = {
+    'HUB': os.environ.get('TASK_EVENT_HUB', 'tasks.events.EventHub'),
+    'QUEUE_SIZE': int(os.environ.get('TASK_EVENT_QUEUE_SIZE', '100')),
+    'HEARTBEAT_SECONDS': int(os.environ.get('TASK_EVENT_HEARTBEAT_SECONDS', '15')),
+    'MAX_STREAM_SECONDS': int(os.environ.get('TASK_EVENT_MAX_STREAM_SECONDS', '300')),
+    'RETRY_MS': int(os.environ.get('TASK_EVENT_RETRY_MS', '3000')),
+}
+
+# Read-through cache of task detail rows, stats and overdue lists (see
+# tasks.cache). Entries live in the ALIAS cache for TIMEOUT seconds unless a
+# write of their user invalidates them first; concurrent misses wait up to
+# COALESCE_TIMEOUT seconds for the request already computing the entry.
+# The ALIAS cache must be shared by the workers (REDIS_URL); on the local
+# fallback the cache stays off unless TASK_CACHE_SINGLE_PROCESS=1 declares
+# that a single process serves the API.
+TASK_CACHE = {
+    'ENABLED': os.environ.get('TASK_CACHE', '1') == '1',
+    'SINGLE_PROCESS': os.environ.get('TASK_CACHE_SINGLE_PROCESS', '0') == '1',
+    'ALIAS': os.environ.get('TASK_CACHE_ALIAS', 'default'),
+    'TIMEOUT': int(os.environ.get('TASK_CACHE_TIMEOUT', '300')),
+    'COALESCE_TIMEOUT': float(os.environ.get('TASK_CACHE_COALESCE_TIMEOUT', '5')),
+}
+
+# Users resolved from JWTs are cached per process (LRU with TTL). Set
+# AUTH_USER_CACHE_BACKEND to a CACHES alias to share entries between workers.
+AUTH_USER_CACHE = {
+    'MAX_SIZE': int(os.environ.get('AUTH_USER_CACHE_SIZE', '10000')),
+    'TTL': int(os.environ.get('AUTH_USER_CACHE_TTL', '30')),
+    'BACKEND': os.environ.get('AUTH_USER_CACHE_BACKEND') or None,
+}
+
+# Per-request query/timing instrumentation: Server-Timing headers, route
+# histograms at /api/metrics/ and a sampled log of slow requests.
+REQUEST_INSTRUMENTATION = {
+    'ENABLED': os.environ.get('REQUEST_INSTRUMENTATION', '1') == '1',
+    'SERVER_TIMING': os.environ.get('REQUEST_SERVER_TIMING', '1') == '1',
+    'SLOW_REQUEST_MS': int(os.environ.get('SLOW_REQUEST_MS', '500')),
+    'SLOW_REQUEST_SAMPLE_RATE': float(os.environ.get('SLOW_REQUEST_SAMPLE_RATE', '0.1')),
+}
+
+# Token bucket rate limits (todolist.throttling), per route and user, or per
+# route and client IP for anonymous requests. "N/period" allows bursts of N
+# requests, refilled at N per period. RATES are keyed by URL name; other
+# routes use DEFAULT_RATES. Set API_THROTTLE_BACKEND to a CACHES alias to
+# share buckets between workers; only Redis updates them atomically.
+API_THROTTLES = {
+    'ENABLED': os.environ.get('API_THROTTLES', '1') == '1',
+    'BACKEND': os.environ.get('API_THROTTLE_BACKEND') or None,
+    'MAX_BUCKETS': int(os.environ.get('API_THROTTLE_MAX_BUCKETS', '100000')),
+    'DEFAULT_RATES': {
+        'user': os.environ.get('API_THROTTLE_USER_RATE', '600/min'),
+        'anon': os.environ.get('API_THROTTLE_ANON_RATE', '120/min'),
+    },
+    'RATES': {
+        'login': '10/min',
+        'async_login': '10/min',
+        'token_obtain_pair': '10/min',
+        'register': '5/min',
+        'token_refresh': '30/min',
+        'task-stats': '120/min',
+        'async-task-stats': '120/min',
+        'task-export': '20/min',
+        'batch': '60/min',
+    },
+}
+
+# POST /api/batch/ (todolist.batch): sub-requests per batch, threads of the
+# process-wide pool running a batch's consecutive reads concurrently, and
+# seconds after which a batch's remaining sub-requests are answered with 504.
+API_BATCH = {
+    'MAX_REQUESTS': int(os.environ.get('API_BATCH_MAX_REQUESTS', '20')),
+    'WORKERS': int(os.environ.get('API_BATCH_WORKERS', '4')),
+    'TIMEOUT': float(os.environ.get('API_BATCH_TIMEOUT', '10')),
+    # Streamed responses, and batches themselves.
+    'EXCLUDED_ROUTES': ['batch', 'task-export'],
+}
+
+# Password hashing runs in this many worker processes (0 hashes on the
+# request thread). Logins beyond MAX_PENDING in-flight hashes get a 503.
+PASSWORD_POOL = {
+    'WORKERS': int(os.environ.get('PASSWORD_POOL_WORKERS', '2')),
+    'MAX_PENDING': int(os.environ.get('PASSWORD_POOL_MAX_PENDING', '64')),
+    'TIMEOUT': int(os.environ.get('PASSWORD_POOL_TIMEOUT', '10')),
+}
@@ -0,0 +1,182 @@
+"""Token bucket rate limiting for the API.
+
+Every route has a bucket per user, or per client IP for anonymous requests
+(registration, login, token refresh). The client IP is REMOTE_ADDR unless
+REST_FRAMEWORK's NUM_PROXIES says how many trusted proxies append to
+X-Forwarded-For, which clients can otherwise set freely. A bucket holds up
+to N tokens and refills at N per period, from the ``API_THROTTLES['RATES']``
+entry of the route's URL name ("10/min") or the DEFAULT_RATES one. Each
+request takes a token. A request finding the bucket empty gets a 429 with
+Retry-After set to when the next token arrives.
+
+Buckets live in this process: one lock, a dict lookup and some float
+arithmetic per request, a few microseconds (manage.py benchmark_throttling).
+At most MAX_BUCKETS are kept, dropping the least recently used; a dropped
+bucket starts over full, as it would be after being idle that long anyway.
+With ``BACKEND`` naming a CACHES alias, buckets are kept in that cache
+instead and shared by every worker, at the cost of a cache round trip. On
+Redis the bucket is updated by a Lua script, atomically. Other backends
+read and write it in two round trips, so requests racing in different
+workers may share a token: up to one extra request per concurrent worker
+gets through.
+
+TokenBucketThrottle is in DEFAULT_THROTTLE_CLASSES, so it applies to the
+DRF views; todolist.async_api applies it to the native async views with
+aallow_request, which keeps the shared cache round trip off the event loop.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+# take() on a bucket kept as a Redis hash. The wait is returned as a string:
+# Redis truncates Lua numbers to integers.
+TAKE_SCRIPT = """
+local capacity, refill_rate, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = capacity
+if state[1] then
+    tokens = math.min(capacity, tonumber(state[1]) + (now - tonumber(state[2])) * refill_rate)
+end
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / refill_rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.max(1, math.floor((capacity - tokens) / refill_rate) + 1))
+return tostring(wait)
+"""
+
+
+def get_settings():
+    return getattr(settings, 'API_THROTTLES', {})
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """(capacity, tokens per second) for a rate such as "100/min"."""
+    count, _, period = rate.partition('/')
+    try:
+        capacity = int(count)
+        seconds = PERIODS[period]
+    except (KeyError, ValueError):
+        raise ValueError(f'Invalid rate {rate!r}; expected "<count>/<s|min|hour|day>".') from None
+    return capacity, capacity / seconds
+
+
+def take(state, capacity, refill_rate, now):
+    """Take a token from a bucket in ``state`` (tokens, updated at).
+
+    Returns the new state and the seconds until a token is available, 0.0
+    if one was taken.
+    """
+    if state is None:
+        tokens = capacity
+    else:
+        tokens = min(capacity, state[0] + (now - state[1]) * refill_rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) / refill_rate
+
+
+class BucketStore:
+    """Token buckets by key: in this process, or in a shared cache."""
+
+    def __init__(self, max_size=100000, backend=None):
+        self.max_size = max_size
+        self.backend = backend
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = get_settings()
+        return cls(max_size=options.get('MAX_BUCKETS', 100000), backend=options.get('BACKEND'))
+
+    @property
+    def shared(self):
+        return caches[self.backend] if self.backend else None
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def consume(self, key, capacity, refill_rate):
+        """Take a token from the bucket ``key``; return the wait, 0.0 if taken."""
+        if self.backend:
+            return self.consume_shared(key, capacity, refill_rate)
+        now = time.monotonic()
+        with self._lock:
+            state, wait = take(self._buckets.get(key), capacity, refill_rate, now)
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def consume_shared(self, key, capacity, refill_rate):
+        cache = self.shared
+        key = f'throttle:{key}'
+        # Wall clock: the state is read by other processes.
+        now = time.time()
+        if isinstance(cache, RedisCache):
+            key = cache.make_and_validate_key(key)
+            client = cache._cache.get_client(key, write=True)
+            return float(client.eval(TAKE_SCRIPT, 1, key, capacity, refill_rate, now))
+        state, wait = take(cache.get(key), capacity, refill_rate, now)
+        # Expires when it would be full again.
+        cache.set(key, state, timeout=max(1, int((capacity - state[0]) / refill_rate) + 1))
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+buckets = BucketStore.from_settings()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle by route and user (or client IP) with ``buckets``."""
+
+    def __init__(self):
+        self.wait_time = None
+
+    def allow_request(self, request, view):
+        options = get_settings()
+        if not options.get('ENABLED', True):
+            return True
+        match = getattr(request, 'resolver_match', None)
+        route = (match.url_name or match.view_name) if match is not None else request.path
+        user = request.user
+        authenticated = user is not None and user.is_authenticated
+        rate = options.get('RATES', {}).get(route)
+        if rate is None:
+            rate = options.get('DEFAULT_RATES', {}).get('user' if authenticated else 'anon')
+            if rate is None:
+                return True
+        if authenticated:
+            key = f'{route}:user:{user.pk}'
+        else:
+            key = f'{route}:ip:{self.get_ident(request)}'
+        self.wait_time = buckets.consume(key, *parse_rate(rate))
+        return self.wait_time == 0.0
+
+    async def aallow_request(self, request, view):
+        if buckets.backend:
+            return await sync_to_async(self.allow_request, thread_sensitive=False)(request, view)
+        # Local buckets take microseconds, less than the thread hop.
+        return self.allow_request(request, view)
+
+    def wait(self):
+        return self.wait_time
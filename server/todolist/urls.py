@@ -20,6 +20,8 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from tasks.views import DashboardView
+from .views import batch_view, metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -31,4 +33,13 @@ urlpatterns = [
     # API endpoints
     path('api/auth/', include('accounts.urls')),
     path('api/tasks/', include('tasks.urls')),
+    path('api/dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('api/batch/', batch_view, name='batch'),
+    
+    # Native async read endpoints for ASGI deployments
+    path('api/async/auth/', include('accounts.async_urls')),
+    path('api/async/tasks/', include('tasks.async_urls')),
+    
+    # Request metrics collected by todolist.instrumentation
+    path('api/metrics/', metrics_view, name='metrics'),
 ]
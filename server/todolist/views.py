@@ -0,0 +1,31 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+
+from tasks.cache import task_cache
+
+from .batch import BatchSerializer, execute
+from .db.postgresql.base import pool_metrics
+from .instrumentation import BUCKETS, registry
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """Per-route request histograms collected by InstrumentationMiddleware,
+    database connection pool usage and the task cache's hit/miss counts."""
+    return Response({
+        'buckets_ms': list(BUCKETS),
+        'routes': registry.snapshot(),
+        'database': pool_metrics(),
+        'task_cache': task_cache.metrics(),
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch_view(request):
+    """Run a list of API requests as the authenticated user; see todolist.batch."""
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return Response({'responses': execute(request, serializer.validated_data['requests'])})
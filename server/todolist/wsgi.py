@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todolist.settings')
 
 application = get_wsgi_application()
+
+# Only with TASK_OVERDUE_SWEEP_INTERVAL set; see sweep_overdue --loop.
+from tasks.overdue import start_sweeper  # noqa: E402
+
+start_sweeper()